@@ -50,6 +50,12 @@ def read_write_test(
     #conn.handle: FPGA_ETH_Helper
     #conn.handle.hostname = "192.168.2.3"
     #conn.handle.port = "1024"
+    #conn.handle.pipelined = True  # Send each block of I2C operations to the FPGA in as few buffers as possible
+
+    ## For an emulated USB ISS connection (no hardware needed)
+    #conn.connection_type = "USB-ISS Emulator"
+    #conn.handle: USB_ISS_Helper
+    #conn.handle.iss.add_device(chip_address)
 
     conn.connect()
 
@@ -128,6 +134,20 @@ def read_write_test(
         #chip.read_all_block("ETROC2", "Pixel Config:3:4") # Block name for a spacific pixel
         #chip.read_all_block("ETROC2", "Pixel Config") # Block name for all pixels
         #chip.write_all_block("ETROC2", "Pixel Config") # Block name for all pixels
+        ## Queue register reads and writes, they are merged into a few block transfers when the with block exits (the handles are only updated then)
+        #with chip.batch():
+        #    chip.write_register("ETROC2", "Peripheral Config", "PeriCfg0")
+        #    chip.write_register("ETROC2", "Peripheral Config", "PeriCfg1")
+        #    chip.read_register("ETROC2", "Peripheral Status", "PeriSta0")
+        ## Record every transaction to a capture file, then re-execute it later (timing="original" keeps the recorded pacing)
+        #conn.start_capture("session.i2ccap")
+        #chip.read_all()
+        #conn.stop_capture()
+        #report = conn.replay_capture("session.i2ccap", timing="fast")
+        #print(report['mismatches'])
+        ## A capture can also stand in for the hardware with the "Capture Replay" connection type
+        #conn.connection_type = "Capture Replay"
+        #conn.handle.capture_file = "session.i2ccap"
 
     except Exception:
         import traceback
@@ -0,0 +1,197 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+import logging
+import time
+import struct
+import i2c_gui
+from i2c_gui.fpga_eth_emulator import FPGA_ETH_Emulator
+from i2c_gui.fpga_eth_helper import FPGA_ETH_Helper
+
+def benchmark(
+    emulator: FPGA_ETH_Emulator,
+    device_address: int,
+    byte_count: int,
+    ):
+    logger = logging.getLogger("Script_Logger")
+
+    Script_Helper = i2c_gui.ScriptHelper(logger)
+
+    # No pacing delay, so only the protocol itself is measured
+    conn = i2c_gui.Connection_Controller(Script_Helper, successive_i2c_delay_us=0, transfer_size_file="")
+    conn.connection_type = "FPGA-Eth"
+    conn.handle: FPGA_ETH_Helper
+    conn.handle.hostname = emulator.address[0]
+    conn.handle.port = emulator.address[1]
+
+    results = {}
+    for pipelined in [False, True]:
+        for completion_wait in ["Fixed", "Poll"]:
+            conn.handle.pipelined = pipelined
+            conn.handle.completion_wait = completion_wait
+            conn.connect()
+            try:
+                data = [i & 0xff for i in range(byte_count)]
+
+                start = time.perf_counter()
+                conn.write_device_memory(device_address, 0x0000, data)
+                write_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                readback = conn.read_device_memory(device_address, 0x0000, byte_count)
+                read_time = time.perf_counter() - start
+
+                if list(readback) != data:
+                    logger.error("Readback from the emulator does not match the written data")
+            finally:
+                conn.disconnect()
+
+            name = "{} / {}".format("Pipelined" if pipelined else "Sequential", completion_wait)
+            results[name] = (write_time, read_time)
+
+    #  A read sent as a single burst, without waiting for the I2C transactions, must fail against
+    # the emulator, since the real firmware does not hold commands back while the I2C engine is busy
+    conn.connect()
+    try:
+        commands = conn.handle._i2c_read_memory_commands(device_address, 0x0000, 4)
+        conn.handle._socket.sendall(struct.pack('>{}I'.format(len(commands)), *commands))
+        replies = struct.unpack('>4I', conn.handle._recv_exact(16))
+        time.sleep(0.01)  # Let the last transaction end before disconnecting
+    finally:
+        conn.disconnect()
+
+    if [reply & FPGA_ETH_Helper._status_data_mask for reply in replies] == data[:4]:
+        logger.error("A read which did not wait for the I2C transactions succeeded against the emulator")
+    else:
+        logger.info("A read which did not wait for the I2C transactions failed against the emulator, as expected")
+
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local emulator of the FPGA Ethernet I2C interface')
+    parser.add_argument(
+        '--host',
+        help = 'The host to listen on. Default: 127.0.0.1',
+        default = "127.0.0.1",
+        dest = 'host',
+        type = str,
+    )
+    parser.add_argument(
+        '-p',
+        '--port',
+        help = 'The port to listen on. Default: 1024',
+        default = 1024,
+        dest = 'port',
+        type = int,
+    )
+    parser.add_argument(
+        '--device',
+        help = 'Address of an emulated I2C device with a 16 bit register address. Can be used multiple times. Default: 0x72',
+        action = 'append',
+        dest = 'devices',
+        type = str,
+    )
+    parser.add_argument(
+        '--i2c-byte-us',
+        help = 'Time taken to transfer a single byte on the I2C bus, in us. Default: 23',
+        default = 23,
+        dest = 'i2c_byte_us',
+        type = float,
+    )
+    parser.add_argument(
+        '--command-us',
+        help = 'Time taken by the FPGA to process any single command, in us. Default: 0',
+        default = 0,
+        dest = 'command_us',
+        type = float,
+    )
+    parser.add_argument(
+        '--round-trip-us',
+        help = 'Network delay added to every reply, in us, as for an FPGA which is not on the local host. Default: 0',
+        default = 0,
+        dest = 'round_trip_us',
+        type = float,
+    )
+    parser.add_argument(
+        '-b',
+        '--benchmark',
+        help = 'Instead of serving forever, benchmark the FPGA_ETH_Helper against the emulator and exit',
+        action = 'store_true',
+        dest = 'benchmark',
+    )
+    parser.add_argument(
+        '--benchmark-bytes',
+        help = 'Number of bytes written and read back when benchmarking. Default: 256',
+        default = 256,
+        dest = 'benchmark_bytes',
+        type = int,
+    )
+    parser.add_argument(
+        '-l',
+        '--log-level',
+        help = 'Set the logging level. Default: INFO',
+        choices = ["CRITICAL","ERROR","WARNING","INFO","DEBUG","TRACE","DETAILED_TRACE","NOTSET"],
+        default = "INFO",
+        dest = 'log_level',
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s:%(name)s:%(message)s', level=getattr(logging, args.log_level))
+
+    devices = args.devices
+    if devices is None:
+        devices = ["0x72"]
+
+    emulator = FPGA_ETH_Emulator(
+        host=args.host,
+        port=args.port,
+        latency_us={
+            'config_write': args.command_us,
+            'config_read': args.command_us,
+            'status_read': args.command_us,
+            'pulse': args.command_us,
+            'i2c_byte': args.i2c_byte_us,
+            'round_trip': args.round_trip_us,
+        },
+    )
+    for device in devices:
+        emulator.add_device(int(device, 0) & 0x7f)
+
+    if args.benchmark:
+        with emulator:
+            results = benchmark(emulator, int(devices[0], 0) & 0x7f, args.benchmark_bytes)
+        print("Benchmark of {} bytes against the FPGA emulator:".format(args.benchmark_bytes))
+        for name in results:
+            write_time, read_time = results[name]
+            print("  {:>22}: write {:8.3f} s ({:10.1f} B/s), read {:8.3f} s ({:10.1f} B/s)".format(
+                name,
+                write_time,
+                args.benchmark_bytes/write_time,
+                read_time,
+                args.benchmark_bytes/read_time,
+            ))
+        print("Emulator statistics: {}".format(emulator.statistics))
+    else:
+        emulator.serve_forever()
@@ -25,6 +25,7 @@ import i2c_gui
 import i2c_gui.chips
 from i2c_gui.usb_iss_helper import USB_ISS_Helper
 from i2c_gui.fpga_eth_helper import FPGA_ETH_Helper
+from i2c_gui.fault_injection_helper import I2C_Fault_Model
 
 from pathlib import Path
 
@@ -223,6 +224,7 @@ def slow(
     port: str = "COM3",
     chip_address: int = 0x72,
     ws_address: int = None,
+    fault_model: I2C_Fault_Model = None,
     ):
     logger = logging.getLogger("Script_Logger")
 
@@ -241,6 +243,10 @@ def slow(
     #conn.handle: FPGA_ETH_Helper
     #conn.handle.hostname = "192.168.2.3"
     #conn.handle.port = "1024"
+    #conn.handle.pipelined = True  # Send each block of I2C operations to the FPGA in as few buffers as possible
+
+    if fault_model is not None:
+        conn.inject_faults(fault_model)
 
     conn.connect()
 
@@ -263,6 +269,10 @@ def slow(
     finally:
         conn.disconnect()
 
+    if fault_model is not None:
+        print("Injected faults: {}".format(fault_model.statistics))
+        print(conn.metrics.format())
+
     return error_summary
 
 def fast(
@@ -270,6 +280,7 @@ def fast(
     port: str = "COM3",
     chip_address: int = 0x72,
     ws_address: int = None,
+    fault_model: I2C_Fault_Model = None,
     ):
     logger = logging.getLogger("Script_Logger")
 
@@ -288,6 +299,10 @@ def fast(
     #conn.handle: FPGA_ETH_Helper
     #conn.handle.hostname = "192.168.2.3"
     #conn.handle.port = "1024"
+    #conn.handle.pipelined = True  # Send each block of I2C operations to the FPGA in as few buffers as possible
+
+    if fault_model is not None:
+        conn.inject_faults(fault_model)
 
     conn.connect()
 
@@ -308,6 +323,10 @@ def fast(
     finally:
         conn.disconnect()
 
+    if fault_model is not None:
+        print("Injected faults: {}".format(fault_model.statistics))
+        print(conn.metrics.format())
+
     return error_summary
 
 
@@ -395,6 +414,21 @@ if __name__ == "__main__":
         dest = 'ws_address',
         type = str,
     )
+    parser.add_argument(
+        '--fault-seed',
+        help='Seed of the random faults injected in the I2C transfers, so that a run can be reproduced. Default: None',
+        default = None,
+        dest = 'fault_seed',
+        type = int,
+    )
+    for fault in I2C_Fault_Model.faults:
+        parser.add_argument(
+            '--fault-{}'.format(fault.replace('_', '-')),
+            help='Probability of injecting a {} fault in each I2C transfer. Default: 0'.format(fault.replace('_', ' ')),
+            default = 0,
+            dest = 'fault_{}'.format(fault),
+            type = float,
+        )
     parser.add_argument(
         '-o',
         '--output_log',
@@ -454,12 +488,18 @@ if __name__ == "__main__":
     else:
         ws_address = int(args.ws_address, 0) & 0x7f
 
+    fault_probabilities = {fault: getattr(args, 'fault_{}'.format(fault)) for fault in I2C_Fault_Model.faults}
+    fault_model = None
+    if sum(fault_probabilities.values()) > 0:
+        fault_model = I2C_Fault_Model(seed=args.fault_seed, **fault_probabilities)
+
     if args.slow:
         errors = slow(
             error_mask=error_mask,
             port=args.port,
             chip_address = chip_address,
             ws_address = ws_address,
+            fault_model = fault_model,
         )
     else:
         errors = fast(
@@ -467,6 +507,7 @@ if __name__ == "__main__":
             port=args.port,
             chip_address = chip_address,
             ws_address = ws_address,
+            fault_model = fault_model,
         )
 
     if errors is None:
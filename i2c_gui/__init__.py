@@ -34,6 +34,7 @@ from .ad5593r_gui import AD5593R_GUI
 from .multi_gui import Multi_GUI
 from .script_helper import ScriptHelper
 from .connection_controller import Connection_Controller
+from .connection_pool import Connection_Pool
 
 from .functions import validate_8bit_register
 from .functions import validate_variable_bit_register
@@ -73,6 +74,7 @@ __all__ = [
     "Multi_GUI",
     "ScriptHelper",
     "Connection_Controller",
+    "Connection_Pool",
     "validate_8bit_register",
     "validate_variable_bit_register",
     "validate_i2c_address",
@@ -30,7 +30,6 @@ import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to t
 import logging
 
 import importlib.resources
-from PIL import ImageTk, Image
 
 from tkinter import filedialog as tkfd
 from tkinter.messagebox import showinfo
@@ -208,6 +207,7 @@ class Base_GUI(GUI_Helper):
 
     def _create_monitor_menu_entries(self, monitormenu: tk.Menu):
         monitormenu.add_command(label='Open I2C Monitor', command=self._open_i2c_monitor)#, state='disabled')
+        monitormenu.add_command(label='Open I2C Metrics', command=self._open_i2c_metrics)
         monitormenu.add_command(label='Open Logging Monitor', command=self._open_logging_monitor)#, state='disabled')
 
     def _create_utility_menu_entries(self, utilitymenu: tk.Menu):
@@ -217,6 +217,10 @@ class Base_GUI(GUI_Helper):
         if hasattr(self, '_i2c_controller') and self._i2c_controller is not None:
             self._i2c_controller.display_i2c_window()
 
+    def _open_i2c_metrics(self):
+        if hasattr(self, '_i2c_controller') and self._i2c_controller is not None:
+            self._i2c_controller.display_i2c_metrics_window()
+
     def _open_logging_monitor(self):
         if hasattr(self, '_logging_helper') and self._logging_helper is not None:
             self._logging_helper.display_logging()
@@ -239,6 +243,8 @@ class Base_GUI(GUI_Helper):
         self._status_display.send_message(message=message, status=status)
 
     def _about_contents(self, element: tk.Tk, column: int, row: int):
+        from PIL import ImageTk, Image
+
         self._about_img = ImageTk.PhotoImage(Image.open(importlib.resources.open_binary("i2c_gui.static", "ETROC1.png")))
         self._about_img_label = tk.Label(element, image = self._about_img)
         self._about_img_label.grid(column=column, row=row, sticky='')
@@ -0,0 +1,285 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .connection_controller import Connection_Controller
+from .i2c_messages import encode_direct_i2c
+from .i2c_messages import decode_direct_i2c
+
+import struct
+import threading
+import time
+
+#  A capture file starts with a magic string and the wall clock time the capture was started at,
+# followed by one record per transaction. Each record has a fixed size header followed by the
+# request bytes (written data or direct commands) and the response bytes (read data, direct
+# reply, the check result or the error message for failed transactions)
+capture_magic = b'I2CCAP\x01\x00'
+capture_file_header = struct.Struct('<8sd')
+capture_record_header = struct.Struct('<BBddBIBHBIII')
+
+capture_kinds = {
+    'Read': ord('R'),
+    'Write': ord('W'),
+    'Check': ord('C'),
+    'Direct': ord('D'),
+}
+capture_access_types = ['Normal', 'Repeated Start']
+
+class Bus_Capture_Record:
+    __slots__ = ('kind', 'ok', 'offset_s', 'duration_us', 'device_address', 'memory_address', 'register_bits', 'register_length', 'access_type', 'byte_count', 'request', 'response')
+
+    def __init__(self, kind: str, ok: bool, offset_s: float, duration_us: float, device_address: int, memory_address: int, register_bits: int, register_length: int, access_type: str, byte_count: int, request: bytes, response: bytes):
+        self.kind = kind
+        self.ok = ok
+        self.offset_s = offset_s
+        self.duration_us = duration_us
+        self.device_address = device_address
+        self.memory_address = memory_address
+        self.register_bits = register_bits
+        self.register_length = register_length
+        self.access_type = access_type
+        self.byte_count = byte_count
+        self.request = request
+        self.response = response
+
+    @property
+    def error(self):
+        if self.ok:
+            return None
+        return self.response.decode('utf-8', errors='replace')
+
+    @property
+    def commands(self):
+        return decode_direct_i2c(self.request)
+
+    @property
+    def found(self):
+        return self.response == b'\x01'
+
+    def pack(self) -> bytes:
+        return capture_record_header.pack(
+            capture_kinds[self.kind],
+            1 if self.ok else 0,
+            self.offset_s,
+            self.duration_us,
+            self.device_address & 0xff,
+            self.memory_address & 0xffffffff,
+            self.register_bits,
+            self.register_length,
+            capture_access_types.index(self.access_type),
+            self.byte_count,
+            len(self.request),
+            len(self.response),
+        ) + self.request + self.response
+
+def read_bus_capture(file_name: str):
+    # Generator over the records of a capture file, which are only read from disk as they are needed
+    kind_names = {capture_kinds[name]: name for name in capture_kinds}
+
+    with open(file_name, "rb") as in_file:
+        magic, _ = capture_file_header.unpack(in_file.read(capture_file_header.size))
+        if magic != capture_magic:
+            raise RuntimeError("The file {} is not an I2C bus capture".format(file_name))
+
+        while True:
+            header = in_file.read(capture_record_header.size)
+            if len(header) == 0:
+                break
+            if len(header) != capture_record_header.size:
+                raise RuntimeError("The I2C bus capture {} is truncated".format(file_name))
+
+            kind, ok, offset_s, duration_us, device_address, memory_address, register_bits, register_length, access_type, byte_count, request_size, response_size = capture_record_header.unpack(header)
+            request = in_file.read(request_size)
+            response = in_file.read(response_size)
+            if len(request) != request_size or len(response) != response_size:
+                raise RuntimeError("The I2C bus capture {} is truncated".format(file_name))
+
+            yield Bus_Capture_Record(kind_names[kind], ok == 1, offset_s, duration_us, device_address, memory_address, register_bits, register_length, capture_access_types[access_type], byte_count, request, response)
+
+class Bus_Capture_Recorder:
+    #  Writes every transaction which goes through a Connection_Controller to a capture file, the
+    # controller calls the recorder in place of the connection helper while a capture is running
+    def __init__(self, file_name: str):
+        self._file_name = file_name
+        self._lock = threading.Lock()
+        self._file = open(file_name, "wb")
+        self._start_time = time.time()
+        self._start_counter = time.perf_counter()
+        self._record_count = 0
+
+        self._file.write(capture_file_header.pack(capture_magic, self._start_time))
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    @property
+    def record_count(self):
+        return self._record_count
+
+    @property
+    def is_open(self):
+        return self._file is not None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, record: Bus_Capture_Record):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(record.pack())
+            self._record_count += 1
+
+    def _run(self, function, args: tuple, kind: str, device_address: int = 0, memory_address: int = 0, register_bits: int = 0, register_length: int = 0, access_type: str = 'Normal', byte_count: int = 0, request: bytes = b''):
+        start = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception as error:
+            end = time.perf_counter()
+            self._write(Bus_Capture_Record(kind, False, start - self._start_counter, (end - start) * 10**6, device_address, memory_address, register_bits, register_length, access_type, byte_count, request, str(error).encode('utf-8')))
+            raise
+        end = time.perf_counter()
+
+        if kind == 'Check':
+            response = b'\x01' if result else b'\x00'
+        elif kind == 'Write':
+            response = b''
+        else:
+            response = bytes(result)
+        self._write(Bus_Capture_Record(kind, True, start - self._start_counter, (end - start) * 10**6, device_address, memory_address, register_bits, register_length, access_type, byte_count, request, response))
+        return result
+
+    def check_i2c_device(self, function, address: int):
+        return self._run(function, (address,), 'Check', device_address=address)
+
+    def scan_i2c_devices(self, function, addresses: list[int]):
+        #  A scan is recorded as one Check per probed address, so that it can be replayed by any
+        # backend. The duration of the scan is shared evenly between the probes
+        start = time.perf_counter()
+        try:
+            found = function(addresses)
+        except Exception as error:
+            self._write_scan(addresses, start, time.perf_counter(), None, str(error).encode('utf-8'))
+            raise
+        self._write_scan(addresses, start, time.perf_counter(), found)
+        return found
+
+    def _write_scan(self, addresses: list[int], start: float, end: float, found: list[int], error: bytes = b''):
+        probe_us = (end - start) * 10**6 / max(len(addresses), 1)
+        for index, address in enumerate(addresses):
+            if found is None:
+                response = error
+            else:
+                response = b'\x01' if address in found else b'\x00'
+            self._write(Bus_Capture_Record('Check', found is not None, start - self._start_counter + index * probe_us / 10**6, probe_us, address, 0, 0, 0, 'Normal', 0, b'', response))
+
+    def read_device_memory(self, function, device_address: int, memory_address: int, byte_count: int, register_bits: int, register_length: int, read_type: str):
+        return self._run(function, (device_address, memory_address, byte_count, register_bits, register_length, read_type), 'Read', device_address, memory_address, register_bits, register_length, read_type, byte_count)
+
+    def write_device_memory(self, function, device_address: int, memory_address: int, data: list[int], register_bits: int, register_length: int, write_type: str):
+        return self._run(function, (device_address, memory_address, data, register_bits, register_length, write_type), 'Write', device_address, memory_address, register_bits, register_length, write_type, len(data), bytes(data))
+
+    def direct_i2c(self, function, commands: list):
+        try:
+            request = b''.join([payload for payload, _ in encode_direct_i2c(commands)])
+        except RuntimeError:
+            request = b''  # Invalid sequences are still recorded, with the error raised by the backend
+        return self._run(function, (commands,), 'Direct', byte_count=len(commands), request=request)
+
+class Bus_Capture_Replayer:
+    #  Re-executes a capture file through a Connection_Controller and compares the results with
+    # the recorded ones. With timing="original" every transaction is started at the same offset
+    # from the start of the replay as in the capture (scaled by speed), otherwise the transactions
+    # are executed back to back as fast as the backend allows
+    def __init__(self, i2c_controller: Connection_Controller, file_name: str, timing: str = "fast", speed: float = 1.0):
+        if timing not in ["fast", "original"]:
+            raise RuntimeError("Unknown timing for replaying an I2C bus capture: {}".format(timing))
+        if speed <= 0:
+            raise RuntimeError("The replay speed must be positive")
+
+        self._i2c_controller = i2c_controller
+        self._file_name = file_name
+        self._timing = timing
+        self._speed = speed
+
+    def _execute(self, record: Bus_Capture_Record):
+        if record.kind == 'Read':
+            return bytes(self._i2c_controller.read_device_memory(record.device_address, record.memory_address, record.byte_count, record.register_bits, record.register_length, record.access_type))
+        elif record.kind == 'Write':
+            self._i2c_controller.write_device_memory(record.device_address, record.memory_address, list(record.request), record.register_bits, record.register_length, record.access_type)
+            return b''
+        elif record.kind == 'Check':
+            return b'\x01' if self._i2c_controller.check_i2c_device(hex(record.device_address)) else b'\x00'
+        return bytes(self._i2c_controller.direct_i2c(record.commands))
+
+    def replay(self, stop_on_mismatch: bool = False):
+        report = {
+            'transactions': 0,
+            'mismatches': [],
+            'recorded_time_s': 0,
+            'replay_time_s': 0,
+        }
+
+        start = time.perf_counter()
+        for index, record in enumerate(read_bus_capture(self._file_name)):
+            if self._timing == "original":
+                delay = start + record.offset_s / self._speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            try:
+                response = self._execute(record)
+                ok = True
+            except Exception as error:
+                response = str(error).encode('utf-8')
+                ok = False
+
+            report['transactions'] += 1
+            report['recorded_time_s'] = record.offset_s + record.duration_us * 10**-6
+            if ok != record.ok or (ok and response != record.response):
+                report['mismatches'] += [{
+                    'index': index,
+                    'kind': record.kind,
+                    'device_address': record.device_address,
+                    'memory_address': record.memory_address,
+                    'expected': record.response if record.ok else record.error,
+                    'received': response if ok else response.decode('utf-8', errors='replace'),
+                }]
+                if stop_on_mismatch:
+                    break
+
+        report['replay_time_s'] = time.perf_counter() - start
+        return report
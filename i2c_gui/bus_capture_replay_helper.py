@@ -0,0 +1,198 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .base_gui import Base_GUI
+from .bus_capture import Bus_Capture_Record
+from .bus_capture import read_bus_capture
+from .i2c_messages import encode_direct_i2c
+
+from collections import deque
+
+import tkinter as tk
+import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+from tkinter import filedialog as tkfd
+import os
+import time
+
+class Bus_Capture_Replay_Helper(I2C_Connection_Helper):
+    #  Emulated backend which answers every transaction with the response recorded in a capture
+    # file. Transactions are matched on all their parameters and, for identical transactions, in
+    # the order they were recorded, so a session can be reproduced without any hardware
+    def __init__(self, parent: Base_GUI, timing: str = "fast"):
+        super().__init__(parent, None, False)
+
+        self._capture_file_var = self._new_variable(tk.StringVar)
+        self._responses: dict[tuple, deque[Bus_Capture_Record]] = {}
+        self.timing = timing
+
+    @property
+    def capture_file(self):
+        return self._capture_file_var.get()
+
+    @capture_file.setter
+    def capture_file(self, value: str):
+        self._capture_file_var.set(value)
+
+    @property
+    def timing(self):
+        return self._timing
+
+    @timing.setter
+    def timing(self, value: str):
+        if value not in ["fast", "original"]:
+            raise RuntimeError("Unknown timing for replaying an I2C bus capture: {}".format(value))
+        self._timing = value
+
+    @property
+    def connection_id(self):
+        return self.capture_file
+
+    @property
+    def remaining_responses(self):
+        return sum([len(self._responses[key]) for key in self._responses])
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        return None
+
+    def _record_key(self, record: Bus_Capture_Record):
+        if record.kind == 'Check':
+            return ('Check', record.device_address)
+        elif record.kind == 'Direct':
+            return ('Direct', record.request)
+        return (record.kind, record.device_address, record.memory_address, record.register_bits, record.register_length, record.access_type, record.byte_count, record.request)
+
+    def load(self, file_name: str = None):
+        if file_name is not None:
+            self.capture_file = file_name
+
+        self._responses = {}
+        count = 0
+        for record in read_bus_capture(self.capture_file):
+            key = self._record_key(record)
+            if key not in self._responses:
+                self._responses[key] = deque()
+            self._responses[key].append(record)
+            count += 1
+        return count
+
+    def _next_response(self, key: tuple) -> Bus_Capture_Record:
+        if key not in self._responses or len(self._responses[key]) == 0:
+            if key[0] == 'Direct':
+                raise RuntimeError("The I2C bus capture has no recorded response left for this direct I2C command sequence")
+            raise RuntimeError("The I2C bus capture has no recorded response left for this {} transaction with the I2C device with address 0x{:02x}".format(key[0].lower(), key[1]))
+
+        record = self._responses[key].popleft()
+        if self._timing == "original" and record.duration_us > 0:
+            time.sleep(record.duration_us * 10**-6)
+        if not record.ok:
+            raise RuntimeError(record.error)
+        return record
+
+    def _check_i2c_device(self, address: int):
+        return self._next_response(('Check', address)).found
+
+    def check_i2c_device(self, address: int):
+        if not self.is_connected or self._no_connect:
+            return False
+        return self._check_i2c_device(address)
+
+    def _read_device_memory_bytes(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> bytearray:
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to read registers from it")
+
+        record = self._next_response(('Read', device_address, memory_address, register_bits, register_length, read_type, byte_count, b''))
+        self._trace.record('Read', device_address, memory_address, byte_count, record.response, status="Replayed", duration_us=record.duration_us)
+        return bytearray(record.response)
+
+    def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to write registers to it")
+
+        record = self._next_response(('Write', device_address, memory_address, register_bits, register_length, write_type, len(data), bytes(data)))
+        self._trace.record('Write', device_address, memory_address, len(data), data, status="Replayed", duration_us=record.duration_us)
+
+    def _direct_i2c(self, commands: list) -> list[int]:
+        request = b''.join([payload for payload, _ in encode_direct_i2c(commands)])
+        return list(self._next_response(('Direct', request)).response)
+
+    def display_in_frame(self, frame: ttk.Frame):
+        if hasattr(self, '_frame') and self._frame is not None:
+            tmp = self._frame.children.copy()
+            for widget in tmp:
+                tmp[widget].destroy()
+
+        self._frame = frame
+        self._capture_file_label = ttk.Label(self._frame, text="Capture:")
+        self._capture_file_label.grid(column=0, row=0, sticky=(tk.W, tk.E))
+
+        self._capture_file_entry = ttk.Entry(self._frame, textvariable=self._capture_file_var, width=30)
+        self._capture_file_entry.grid(column=1, row=0, sticky=(tk.W, tk.E), padx=(0,5))
+
+        self._capture_file_button = ttk.Button(self._frame, text="Browse", command=self._browse_capture_file)
+        self._capture_file_button.grid(column=2, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(3, weight=1)
+
+    def _browse_capture_file(self):
+        filename = tkfd.askopenfilename(
+            parent=self._frame,
+            title='Load I2C Bus Capture',
+            initialdir='./',
+            filetypes=[('I2C bus captures', '*.i2ccap')],
+        )
+
+        if filename is None or filename == "":
+            return
+
+        self.capture_file = filename
+
+    def validate_connection_params(self):
+        if not os.path.isfile(self.capture_file):
+            self.send_message("Please choose an existing I2C bus capture file", "Error")
+            return False
+
+        return True
+
+    def connect(self, no_connect: bool = False):
+        self._no_connect = no_connect
+        try:
+            count = self.load()
+        except (OSError, RuntimeError) as error:
+            self.send_message("Unable to load the I2C bus capture {}: {}".format(self.capture_file, error), "Error")
+            return False
+
+        if hasattr(self, "_capture_file_entry"):
+            self._capture_file_entry.config(state="disabled")
+            self._capture_file_button.config(state="disabled")
+        self.send_message("Replaying {} transactions from the I2C bus capture {}".format(count, self.capture_file))
+        return True
+
+    def disconnect(self):
+        self._responses = {}
+
+        if hasattr(self, "_capture_file_entry"):
+            self._capture_file_entry.config(state="normal")
+            self._capture_file_button.config(state="normal")
+        self.send_message("Stopped replaying the I2C bus capture {}".format(self.capture_file))
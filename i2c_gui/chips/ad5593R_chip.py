@@ -30,7 +30,7 @@ from .base_chip import Base_Chip
 from ..gui_helper import GUI_Helper
 from .address_space_controller import Address_Space_Controller
 from ..i2c_messages import I2CMessages
-from math import ceil
+from ..i2c_messages import direct_read_commands
 
 import tkinter as tk
 import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
@@ -375,20 +375,13 @@ class AD5593R_Chip(Base_Chip):
         self._i2c_controller.direct_i2c([I2CMessages.START, I2CMessages.WRITE2, self._i2c_address << 1, 0b01000000, I2CMessages.STOP])
 
         # Actually read the ADC conversion data (Step 4 from the "ADC Operation" in the manual)
-        data = []
-        num_repeats = ceil(num_measurements/8)  #  each measurement is 2 bytes and we want to read a max of 16 bytes at a time
-        for i in range(num_repeats):
-            num_bytes = 16
-            if i == num_repeats - 1:
-                num_bytes = num_measurements*2 - i*16
+        #  Each measurement is 2 bytes, the read is split into as many direct transfers as needed
+        # by the connection
+        commands = [I2CMessages.START, I2CMessages.WRITE1, (self._i2c_address << 1) + 1]
+        commands += direct_read_commands(num_measurements*2)
+        commands += [I2CMessages.STOP]
 
-            commands = [I2CMessages.START, I2CMessages.WRITE1, (self._i2c_address << 1) + 1]
-
-            commands += [getattr(I2CMessages, f'READ{num_bytes - 1}')]
-
-            commands += [I2CMessages.NACK, I2CMessages.READ1, I2CMessages.STOP]
-
-            data += self._i2c_controller.direct_i2c(commands)
+        data = self._i2c_controller.direct_i2c(commands)
 
         # Stop ADC conversion (explained at the end of the "ADC Operation" in the manual)
         adc_sequence_handle.set(0x0000)
@@ -28,12 +28,24 @@ if TYPE_CHECKING:
 from ..gui_helper import GUI_Helper
 
 from ..functions import hex_0fill
+from ..i2c_retry_policy import I2C_Partial_Transfer_Error
+from .sparse_memory import Sparse_Memory
 
+from array import array
 import tkinter as tk
 import logging
+import sys
 import time
 
+# Array type codes for the unsigned integer sizes the machine supports natively, indexed by byte count
+array_typecodes = {array(typecode).itemsize: typecode for typecode in 'BHILQ'}
+
 class Address_Space_Controller(GUI_Helper):
+    #  When reading the full address space or writing the modified registers, ranges separated by
+    # at most this many registers are transferred together, since that is cheaper than starting a
+    # new transfer
+    _max_transfer_gap = 16
+
     def __init__(
         self,
         parent: GUI_Helper,
@@ -75,10 +87,27 @@ class Address_Space_Controller(GUI_Helper):
 
         self._not_read = True
 
-        self._memory = [None for val in range(self._memory_size)]
-        self._read_only_map = [True for val in range(self._memory_size)]
+        #  The register values are kept in a sparse memory which only stores the mapped registers,
+        # using the smallest native unsigned type which fits a register. The 'memory' plane holds
+        # the values read back from the chip (only meaningful where 'valid' is set) and the
+        # 'pending' plane the values which will be written. Unmapped registers are read only. The
+        # Tk variables are only created for the registers which are actually displayed
+        value_typecode = None
+        for typecode in 'BHILQ':
+            if array(typecode).itemsize * 8 >= self._register_length:
+                value_typecode = typecode
+                break
 
-        self._display_vars = [tk.StringVar(value = "0", name="{}_{}_Reg{}".format(self._parent._unique_name, self._name, val)) for val in range(self._memory_size)]
+        self._shadow = Sparse_Memory({
+            'memory': (value_typecode, 0),
+            'valid': ('B', 0),
+            'pending': (value_typecode, 0),
+            'read_only': ('B', 1),
+        })
+        register_defaults = {}
+        register_read_only = {}
+
+        self._display_vars = {}
 
         self._register_map = {}
         for block_name in register_map:
@@ -99,8 +128,8 @@ class Address_Space_Controller(GUI_Helper):
                         read_only = register_map[block_name]["Registers"][register]['read_only']
                     full_address = base_address + offset
                     self._register_map[block_name + "/" + register] = full_address
-                    self._display_vars[full_address].set(hex_0fill(register_map[block_name]["Registers"][register]['default'], self._register_length))
-                    self._read_only_map[full_address] = read_only
+                    register_defaults[full_address] = register_map[block_name]["Registers"][register]['default']
+                    register_read_only[full_address] = read_only
             elif "Indexer" in register_map[block_name]:
                 indexer_info = register_map[block_name]['Indexer']
                 min_address, max_address, base_addresses = self._get_indexed_block_address_range(block_name, indexer_info, register_map[block_name]['Registers'])
@@ -127,13 +156,31 @@ class Address_Space_Controller(GUI_Helper):
                             read_only = register_map[block_name]["Registers"][register]['read_only']
                         full_register_name = base_name + "/" + register
                         self._register_map[full_register_name] = full_address
-                        self._display_vars[full_address].set(hex_0fill(register_map[block_name]["Registers"][register]['default'], self._register_length))
-                        self._read_only_map[full_address] = read_only
+                        register_defaults[full_address] = register_map[block_name]["Registers"][register]['default']
+                        register_read_only[full_address] = read_only
             else:
                 self._logger.error("An impossible condition occured, there was a memory block defined which does not have a base address and does not have an indexer")
 
+        self._shadow.map_ranges([(address, 1) for address in register_defaults])
+        pending = self._shadow.plane('pending')
+        read_only_map = self._shadow.plane('read_only')
+        for address in register_defaults:
+            index = self._shadow.index(address)
+            pending[index] = register_defaults[address]
+            read_only_map[index] = register_read_only[address]
+
+        #  The addresses whose pending value is not known to be in the chip, either because it was
+        # changed or because the register was never read, are tracked as they change so finding
+        # whether the address space was modified does not need to go through all the registers
+        self._dirty = set(self._shadow.addresses())
+
+        #  The decoded values only record which register bits they are built from, their Tk
+        # variables are created the first time they are requested
         self._decoded_display_vars = {}
         self._decoded_bit_size = {}
+        self._decoded_fields = {}
+        self._decoded_dependencies = {}
+        self._updating_decoded_value = None
         if decoded_registers is not None:
             for block_name in decoded_registers:
                 if block_name not in register_map:
@@ -163,17 +210,19 @@ class Address_Space_Controller(GUI_Helper):
                         self._logger.error("An impossible condition occured, there was a memory block defined which does not have a base address and does not have an indexer")
 
     def _build_decoded_value(self, value: str, block_ref: str, value_bits: int, decoding_position_info: list[tuple]):
-        self._decoded_display_vars[block_ref + "/" + value] = tk.StringVar(name="{}_{}_{}_{}".format(self._parent._unique_name, self._name, block_ref, value))
         self._decoded_bit_size[block_ref + "/" + value] = value_bits
 
+        #  The textual position of each slice of the value is compiled once into a field
+        # descriptor: (register address, register bit shift, value bit shift, mask), so decoding
+        # and encoding only need integer operations
+        fields = []
         for regInfo in decoding_position_info:
-            register = regInfo[0]
-
-            register_var = self._display_vars[self._register_map[block_ref + "/" + register]]
-            self._update_decoded_value(block_ref, value, value_bits, regInfo)
-            # Note: Save ? these callbacks in case they need to be handled later
-            register_var.trace_add('write', lambda var, index, mode, block_ref=block_ref, value=value, value_bits=value_bits, position=regInfo:self._update_decoded_value(block_ref, value, value_bits, position))
-            self._decoded_display_vars[block_ref + "/" + value].trace_add('write', lambda var, index, mode, block_ref=block_ref, value=value, value_bits=value_bits, position=regInfo:self._update_register(block_ref, value, value_bits, position))
+            register_shift, register_width = self._get_bit_index_shift_width(regInfo[1])
+            value_shift,    value_width    = self._get_bit_index_shift_width(regInfo[2])
+            if register_width != value_width:
+                raise RuntimeError("The register bits {} and value bits {} of the decoded value {} do not have the same size".format(regInfo[1], regInfo[2], block_ref + "/" + value))
+            fields += [(self._register_map[block_ref + "/" + regInfo[0]], register_shift, value_shift, (1 << register_width) - 1)]
+        self._decoded_fields[block_ref + "/" + value] = fields
 
     def _get_indexed_block_address_range(self, block_name, indexer_info, register_map):
         indexer_function = indexer_info['function']
@@ -234,102 +283,180 @@ class Address_Space_Controller(GUI_Helper):
         if self._i2c_address is None or self._not_read:
             return "Unknown"
 
-        for idx  in range(self._memory_size):
-            value = self._display_vars[idx].get()
-            if value == "" or value == "0x":
-                value = 0
-            else:
-                value = int(value, 0)
-            if value != self._memory[idx]:
-                return True
-        return False
-
-    def _update_register(self, block, value, bits, position):
-        #self._logger.detailed_trace("Entered Address_Space_Controller._update_register(block={}, value={}, bits={}, position={})".format(block, value, bits, position))
-        register_string = "{}/{}[{}]".format(block, position[0], position[1])
-        decoded_string = "{}[{}]".format(value, position[2])
-        self._logger.detailed_trace("Attempting to update register {} from decoded value {}".format(register_string, decoded_string))
-        if hasattr(self, "_updating_from_register"):  # Avoid an infinite loop where the two variables trigger each other
-            return
-
-        self._logger.trace("Updating register {} from decoded value {}".format(register_string, decoded_string))
-
-        self._updating_from_decoded_value = decoded_string
+        return len(self._dirty) > 0
 
-        register_min_idx, register_max_idx = self._get_bit_index_min_max(position[1], 8)
-        value_min_idx,    value_max_idx    = self._get_bit_index_min_max(position[2], bits)
-
-        register_repr = self._build_bit_repr(self._display_vars[self._register_map[block + "/" + position[0]]], 8)
-        value_repr = self._build_bit_repr(self._decoded_display_vars[block + "/" + value], bits)
-
-        register_repr = [i for i in register_repr]
-        value_repr = [i for i in value_repr]
-        register_repr[register_min_idx:register_max_idx] = value_repr[value_min_idx:value_max_idx]
-        register_repr = ''.join(register_repr)
+    @property
+    def modified_addresses(self):
+        return sorted(self._dirty)
+
+    def _update_dirty(self, address, data_size):
+        memory = self._shadow.plane('memory')
+        valid = self._shadow.plane('valid')
+        pending = self._shadow.plane('pending')
+        for segment_address, index, length in self._shadow.segments(address, data_size):
+            for idx in range(length):
+                if valid[index + idx] and pending[index + idx] == memory[index + idx]:
+                    self._dirty.discard(segment_address + idx)
+                else:
+                    self._dirty.add(segment_address + idx)
+
+    def _get_pending(self, address):
+        index = self._shadow.index(address)
+        if index is None:
+            return 0
+        return self._shadow.plane('pending')[index]
+
+    def _is_read_only(self, address):
+        index = self._shadow.index(address)
+        return index is None or self._shadow.plane('read_only')[index] != 0
+
+    def _parse_value(self, value: str):
+        if value == "" or value == "0x":
+            return 0
+        try:
+            return int(value, 0)
+        except ValueError:
+            return None
+
+    def _get_register_var(self, address):
+        if address not in self._display_vars:
+            var = self._new_variable(tk.StringVar, value=hex_0fill(self._get_pending(address), self._register_length), name="{}_{}_Reg{}".format(self._parent._unique_name, self._name, address))
+            var.trace_add('write', lambda var, index, mode, address=address: self._update_pending_from_register_var(address))
+            self._display_vars[address] = var
+        return self._display_vars[address]
+
+    def _get_decoded_var(self, value_name):
+        if value_name not in self._decoded_display_vars:
+            for address, _, _, _ in self._decoded_fields[value_name]:
+                self._decoded_dependencies.setdefault(address, [])
+                if value_name not in self._decoded_dependencies[address]:
+                    self._decoded_dependencies[address] += [value_name]
+
+            var = self._new_variable(tk.StringVar, value=self._format_decoded_value(value_name), name="{}_{}_{}".format(self._parent._unique_name, self._name, value_name.replace("/", "_")))
+            var.trace_add('write', lambda var, index, mode, value_name=value_name: self._update_pending_from_decoded_var(value_name))
+            self._decoded_display_vars[value_name] = var
+        return self._decoded_display_vars[value_name]
 
-        register_repr = '0b' + register_repr
-        self._display_vars[self._register_map[block + "/" + position[0]]].set(hex_0fill(int(register_repr, 0), self._register_length))
+    def _update_pending_from_register_var(self, address):
+        value = self._parse_value(self._display_vars[address].get())
+        if value is None or value < 0 or value >= (1 << self._register_length):
+            return  # Invalid values are left in the entry for the user to correct, they never reach the pending memory
+        if value == self._get_pending(address):
+            return
 
-        del self._updating_from_decoded_value
+        self._shadow.set('pending', address, [value])
+        self._update_dirty(address, 1)
+        self._refresh_decoded_vars(address)
 
-    def _update_decoded_value(self, block, value, bits, position):
-        #self._logger.detailed_trace("Entered Address_Space_Controller._update_decoded_value(block={}, value={}, bits={}, position={})".format(block, value, bits, position))
-        register_string = "{}/{}[{}]".format(block, position[0], position[1])
-        decoded_string = "{}[{}]".format(value, position[2])
-        self._logger.detailed_trace("Attempting to update decoded value {} from register {}".format(decoded_string, register_string))
-        if hasattr(self, "_updating_from_decoded_value"):  # Avoid an infinite loop where the two variables trigger each other
-            if self._updating_from_decoded_value == decoded_string:
-                return
+    def _update_pending_from_decoded_var(self, value_name):
+        if self._updating_decoded_value is not None:  # Avoid an infinite loop where the decoded value and its registers trigger each other
+            return
 
-        self._logger.trace("Updating decoded value {} from register {}".format(decoded_string, register_string))
+        bits = self._decoded_bit_size[value_name]
+        value = self._parse_value(self._decoded_display_vars[value_name].get())
+        if value is None or value < 0 or value >= (1 << bits):
+            return
+        if value == self._decode_value(value_name):
+            return
 
-        self._updating_from_register = True
+        self._logger.trace("Updating the registers of decoded value {}".format(value_name))
 
-        register_min_idx, register_max_idx = self._get_bit_index_min_max(position[1], 8)
-        value_min_idx,    value_max_idx    = self._get_bit_index_min_max(position[2], bits)
+        self._encode_value(value_name, value)
 
-        register_repr = self._build_bit_repr(self._display_vars[self._register_map[block + "/" + position[0]]], 8)
-        value_repr = self._build_bit_repr(self._decoded_display_vars[block + "/" + value], bits)
+    def _encode_value(self, value_name, value):
+        self._updating_decoded_value = value_name
+        try:
+            for address, register_shift, value_shift, mask in self._decoded_fields[value_name]:
+                register = self._get_pending(address)
+                register = (register & ~(mask << register_shift)) | (((value >> value_shift) & mask) << register_shift)
+                self.set_pending_block(address, [register])
+        finally:
+            self._updating_decoded_value = None
 
-        register_repr = [i for i in register_repr]
-        value_repr = [i for i in value_repr]
-        value_repr[value_min_idx:value_max_idx] = register_repr[register_min_idx:register_max_idx]
-        value_repr = ''.join(value_repr)
+    def _decode_value(self, value_name):
+        value = 0
+        for address, register_shift, value_shift, mask in self._decoded_fields[value_name]:
+            value |= ((self._get_pending(address) >> register_shift) & mask) << value_shift
+        return value
 
-        if bits == 1:
-            self._decoded_display_vars[block + "/" + value].set(value_repr)
+    def get_decoded_value(self, value_name):
+        return self._decode_value(value_name)
+
+    def set_decoded_value(self, value_name, value: int):
+        bits = self._decoded_bit_size[value_name]
+        if value < 0 or value >= (1 << bits):
+            raise RuntimeError("The value {} does not fit in the {} bits of the decoded value {}".format(value, bits, value_name))
+        self._encode_value(value_name, value)
+
+        if value_name in self._decoded_display_vars:
+            value_repr = self._format_decoded_value(value_name)
+            if self._decoded_display_vars[value_name].get() != value_repr:
+                self._decoded_display_vars[value_name].set(value_repr)
+
+    def _format_decoded_value(self, value_name):
+        value = self._decode_value(value_name)
+        if self._decoded_bit_size[value_name] == 1:
+            return str(value)
+        return hex_0fill(value, self._decoded_bit_size[value_name])
+
+    def _refresh_decoded_vars(self, address):
+        for value_name in self._decoded_dependencies.get(address, []):
+            if value_name == self._updating_decoded_value:
+                continue
+            value_repr = self._format_decoded_value(value_name)
+            if self._decoded_display_vars[value_name].get() != value_repr:
+                self._decoded_display_vars[value_name].set(value_repr)
+
+    def _refresh_display(self, address, data_size):
+        #  Only the addresses with a bound Tk variable have something to update, so for large
+        # ranges those addresses are looked up instead of going through the whole range
+        end_address = address + data_size
+        if data_size <= len(self._display_vars) + len(self._decoded_dependencies):
+            addresses = range(address, end_address)
         else:
-            value_repr = '0b' + value_repr
-            self._decoded_display_vars[block + "/" + value].set(hex_0fill(int(value_repr, 0), bits))
-
-        del self._updating_from_register
-
-    def _build_bit_repr(self, var: tk.Variable, bit_length: int=8):
-        binary_string = ''.join(["0" for i in range(bit_length)])
-        value = var.get()
-
-        if value != "" and value != "0x":
-            binary_string = format(int(value, 0), 'b')
-            if len(binary_string) < bit_length:
-                prepend = '0'*(bit_length-len(binary_string))
-                binary_string = prepend + binary_string
-
-        return binary_string
-
-    def _get_bit_index_min_max(self, index: str, bit_size: int=8):
-        bit_idx_limits = index.split('-')
-
-        for idx in range(len(bit_idx_limits)):
-            bit_idx_limits[idx] = int(bit_idx_limits[idx])
+            addresses = sorted(set(idx for idx in self._display_vars if address <= idx < end_address) | set(idx for idx in self._decoded_dependencies if address <= idx < end_address))
+
+        for idx in addresses:
+            if idx in self._display_vars:
+                value_repr = hex_0fill(self._get_pending(idx), self._register_length)
+                if self._display_vars[idx].get() != value_repr:
+                    self._display_vars[idx].set(value_repr)
+            if idx in self._decoded_dependencies:
+                self._refresh_decoded_vars(idx)
+
+    def get_pending_block(self, address, data_size):
+        return self._shadow.get('pending', address, data_size)
+
+    def set_pending_block(self, address, values):
+        self._shadow.set('pending', address, values)
+        self._update_dirty(address, len(values))
+        self._refresh_display(address, len(values))
+
+    def get_pending_values(self):
+        #  Only the declared registers are returned, the ones mapped on demand, such as the ETROC2
+        # broadcast addresses, are not part of the configuration
+        pending = self._shadow.plane('pending')
+        return {address: pending[self._shadow.index(address)] for address in self._shadow.declared_addresses()}
+
+    def set_pending_values(self, values: dict[int, int]):
+        self._shadow.map_ranges([(address, 1) for address in values if not self._shadow.is_mapped(address)])
+        for address in values:
+            self._shadow.set('pending', address, [values[address]])
+        for address in values:
+            self._update_dirty(address, 1)
+            self._refresh_display(address, 1)
+
+    def set_read_only(self, address, data_size, read_only: bool = True):
+        self._shadow.set('read_only', address, [1 if read_only else 0] * data_size)
+        self._update_dirty(address, data_size)
+
+    def _get_bit_index_shift_width(self, index: str):
+        # Bit indexes are either a single bit, "3", or an inclusive range from the high to the low bit, "7-4"
+        bit_idx_limits = [int(limit) for limit in index.split('-')]
 
         if len(bit_idx_limits) == 1:
-            max_val = bit_size - bit_idx_limits[0]
-            min_val = max_val - 1
-        else:
-            min_val = bit_size - bit_idx_limits[0] - 1
-            max_val = bit_size - bit_idx_limits[1]
-
-        return (min_val, max_val)
+            return (bit_idx_limits[0], 1)
+        return (bit_idx_limits[1], bit_idx_limits[0] - bit_idx_limits[1] + 1)
 
     def update_i2c_address(self, address: int):
         if address != self._i2c_address:
@@ -342,13 +469,16 @@ class Address_Space_Controller(GUI_Helper):
                 self._logger.info("Reset the I2C address for the address space '{}'".format(self._name))
 
     def get_memory(self, register_name):
-        return self._memory[self._register_map[register_name]]
+        index = self._shadow.index(self._register_map[register_name])
+        if not self._shadow.plane('valid')[index]:
+            return None
+        return self._shadow.plane('memory')[index]
 
     def get_display_var(self, register_name):
-        return self._display_vars[self._register_map[register_name]]
+        return self._get_register_var(self._register_map[register_name])
 
     def get_decoded_display_var(self, value_name):
-        return self._decoded_display_vars[value_name]
+        return self._get_decoded_var(value_name)
 
     def get_decoded_bit_size(self, value_name):
         return self._decoded_bit_size[value_name]
@@ -360,24 +490,143 @@ class Address_Space_Controller(GUI_Helper):
 
         self._logger.info("Reading the full '{}' address space".format(self._name))
 
-        if self.read_memory_block(0, self._memory_size):
+        success = True
+        for address, data_size in self._read_ranges():
+            if not self.read_memory_block(address, data_size):
+                success = False
+        if success:
             self._not_read = False
 
-    def write_all(self, write_check: bool = True):
+    def _read_ranges(self):
+        # Only the declared registers are read, the ranges separated by small gaps are joined
+        ranges = []
+        for address, data_size in self._shadow.declared_ranges:
+            if len(ranges) > 0 and address - (ranges[-1][0] + ranges[-1][1]) <= self._max_transfer_gap:
+                ranges[-1] = (ranges[-1][0], address + data_size - ranges[-1][0])
+            else:
+                ranges += [(address, data_size)]
+        return ranges
+
+    #  The fetch_all/store_all and prepare_write_all/transfer_write/check_write pairs split the
+    # full address space operations into the bus transfers, which do not touch any Tk variable and
+    # can run on a worker thread, and the parts which must run on the main thread
+    def fetch_all(self):
         if self._i2c_address is None:
+            return None
+
+        from math import ceil
+        read_bytes = ceil(self._register_length/8)
+        fetched = []
+        for address, data_size in self._read_ranges():
+            try:
+                fetched += [(address, data_size, self._i2c_controller._read_device_memory_bytes(self._i2c_address, address, data_size*read_bytes, self._register_bits, self._register_length, self._read_type))]
+            except I2C_Partial_Transfer_Error as error:
+                # The parts which were read are stored by store_all on the main thread
+                fetched += [(address, data_size, error)]
+        return fetched
+
+    def store_all(self, data):
+        if data is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return
+
+        success = True
+        for address, data_size, block_data in data:
+            if isinstance(block_data, I2C_Partial_Transfer_Error):
+                self._store_partial_memory_block(address, block_data)
+                success = False
+            else:
+                self._store_memory_block(address, data_size, block_data)
+        if success:
+            self._not_read = False
+
+    def prepare_write_all(self):
+        if self._i2c_address is None:
+            return None
+
+        start_time = time.perf_counter()
+        prepared = []
+        for address, data_size in self._writable_ranges(0, self._memory_size):
+            prepared += [(address, data_size, self._encode_memory_values(self._commit_pending(address, data_size)))]
+        self._add_planning_time(start_time)
+        return prepared
+
+    def transfer_write(self, prepared, write_check: bool = True):
+        if prepared is None:
+            return None
+
+        readbacks = []
+        for address, data_size, data in prepared:
+            try:
+                self._i2c_controller.write_device_memory(self._i2c_address, address, data, self._register_bits, self._register_length, self._write_type)
+            except I2C_Partial_Transfer_Error as error:
+                # The failed ranges are reported by check_write, in place of the readback
+                readbacks += [error]
+                continue
+            if write_check:
+                readbacks += [self._i2c_controller._read_device_memory_bytes(self._i2c_address, address, len(data), self._register_bits, self._register_length, self._read_type)]
+        return readbacks
+
+    def check_write(self, prepared, readbacks):
+        if prepared is None:
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
             return False
 
-        for val in self._read_only_map:
-            if val:
-                self._logger.info("Unable to write the full '{}' address space because there are some read only registers, breaking it into smaller blocks".format(self._name))
-                return self.write_memory_block_with_split_for_read_only(0, self._memory_size, write_check)
+        success = True
+        for idx in range(len(readbacks)):
+            address, data_size, _ = prepared[idx]
+            if isinstance(readbacks[idx], I2C_Partial_Transfer_Error):
+                self._report_failed_ranges("write", readbacks[idx])
+                success = False
+            elif not self._check_written_memory_block(address, data_size, readbacks[idx]):
+                success = False
+
+        if len(readbacks) == 0:
+            self._parent.update_whether_modified()
+
+        return success
+
+    def write_all(self, write_check: bool = True):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
 
+        if self._writable_ranges(0, self._memory_size) != [(0, self._memory_size)]:
+            self._logger.info("Unable to write the full '{}' address space because there are some read only registers, breaking it into smaller blocks".format(self._name))
+            return self.write_memory_block_with_split_for_read_only(0, self._memory_size, write_check)
 
         self._logger.info("Writing the full '{}' address space".format(self._name))
 
         return self.write_memory_block(0, self._memory_size, write_check=write_check)
 
+    def write_modified(self, write_check: bool = True):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        addresses = [address for address in sorted(self._dirty) if not self._is_read_only(address)]
+        self._logger.info("Writing the {} modified registers of the '{}' address space".format(len(addresses), self._name))
+
+        ranges = []
+        for address in addresses:
+            if len(ranges) > 0:
+                gap_address = ranges[-1][0] + ranges[-1][1]
+                gap_size = address - gap_address
+                if gap_size <= self._max_transfer_gap and self._writable_ranges(gap_address, gap_size + 1) == [(gap_address, gap_size + 1)]:
+                    ranges[-1] = (ranges[-1][0], address - ranges[-1][0] + 1)
+                    continue
+            ranges += [(address, 1)]
+
+        success = True
+        for address, data_size in ranges:
+            if data_size == 1:
+                if not self.write_memory_register(address, write_check):
+                    success = False
+            elif not self.write_memory_block(address, data_size, write_check):
+                success = False
+
+        return success
+
     def _read_memory_address_with_endian(self, address):
         if self._i2c_address is None:
             self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
@@ -386,22 +635,61 @@ class Address_Space_Controller(GUI_Helper):
         from math import ceil
 
         read_bytes = ceil(self._register_length/8)
-        tmp = self._i2c_controller.read_device_memory(self._i2c_address, address, read_bytes, self._register_bits, self._register_length, self._read_type)
+        tmp = self._i2c_controller._read_device_memory_bytes(self._i2c_address, address, read_bytes, self._register_bits, self._register_length, self._read_type)
+
+        return self._decode_register_bytes(tmp)
+
+    def _commit_pending(self, address, data_size):
+        #  The pending values of a mapped range about to be written are copied to the read back
+        # values, which are then compared against the write check readback
+        index = self._shadow.index(address)
+        values = self._shadow.plane('pending')[index:index+data_size]
+        self._shadow.plane('memory')[index:index+data_size] = values
+        self._shadow.plane('valid')[index:index+data_size] = array('B', [1]) * data_size
+        self._dirty.difference_update(range(address, address + data_size))
+        return values
+
+    def _decode_register_bytes(self, tmp):
+        if len(tmp) == 1:
+            return tmp[0]
+
+        #TODO: Add a compensation scheme for when the number of bits in a register is not an exact multiple of 8
+
+        return int.from_bytes(tmp, self._endianness)
+
+    def _decode_memory_bytes(self, tmp, data_size):
+        from math import ceil
+        read_bytes = ceil(self._register_length/8)
 
         if read_bytes == 1:
-            return tmp[0]
+            return list(tmp[:data_size])
 
-        value = 0
-        if self._endianness == 'little':
-            for i in range(len(tmp)):
-                value = (value << 8) | tmp[len(tmp) - i - 1]
-        else:
-            for i in range(len(tmp)):
-                value = (value << 8) | tmp[i]
+        view = memoryview(tmp)[:data_size*read_bytes]
+        if read_bytes in array_typecodes:
+            #  Registers with a native integer size are converted in a single pass, the byte order
+            # is only swapped when it does not match the byte order of the machine
+            values = array(array_typecodes[read_bytes])
+            values.frombytes(view)
+            if self._endianness != sys.byteorder:
+                values.byteswap()
+            return values.tolist()
 
-        #TODO: Add a compensation scheme for when the number of bits in a register is not an exact multiple of 8
+        return [int.from_bytes(view[i*read_bytes:(i+1)*read_bytes], self._endianness) for i in range(data_size)]
 
-        return value
+    def _encode_memory_values(self, values):
+        from math import ceil
+        write_bytes = ceil(self._register_length/8)
+
+        if write_bytes == 1:
+            return list(values)
+
+        tmp = []
+        for value in values:
+            register_bytes = [(value >> (8 * i)) & 0xff for i in range(write_bytes)]
+            if self._endianness == "big":
+                register_bytes.reverse()
+            tmp += register_bytes
+        return tmp
 
     def read_memory_register(self, address):
         if self._i2c_address is None:
@@ -410,8 +698,27 @@ class Address_Space_Controller(GUI_Helper):
 
         self._logger.info("Reading register at address {} in the address space '{}'".format(address, self._name))
 
-        self._memory[address] = self._read_memory_address_with_endian(address)
-        self._display_vars[address].set(hex_0fill(self._memory[address], self._register_length))
+        batch = self._i2c_controller.active_batch
+        if batch is not None:
+            #  Inside a batch the read is only queued, the memory and display are updated once the
+            # batch is executed
+            from math import ceil
+            handle = batch.read_device_memory(self._i2c_address, address, ceil(self._register_length/8), self._register_bits, self._register_length, self._read_type)
+            handle.add_done_callback(lambda handle: self._store_read_register(address, handle))
+            return
+
+        self._store_register_value(address, self._read_memory_address_with_endian(address))
+
+    def _store_read_register(self, address, handle):
+        if handle.exception is not None:
+            return
+
+        self._store_register_value(address, self._decode_register_bytes(handle.result))
+
+    def _store_register_value(self, address, value):
+        self._shadow.set('memory', address, [value])
+        self._shadow.set('valid', address, [1])
+        self.set_pending_block(address, [value])  # Also updates the dirty addresses
 
         self._parent.update_whether_modified()
 
@@ -420,7 +727,7 @@ class Address_Space_Controller(GUI_Helper):
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
             return False
 
-        if self._read_only_map[address]:
+        if self._is_read_only(address):
             self._logger.info("Unable to write to the register at address {} in the address space '{}' because it is read only".format(address, self._name))
             return False
 
@@ -428,35 +735,54 @@ class Address_Space_Controller(GUI_Helper):
 
         from math import ceil
         write_bytes = ceil(self._register_length/8)
-        register_bytes = []
 
-        self._memory[address] = int(self._display_vars[address].get(), 0)
-        tmp = self._memory[address]
-        for idx in range(write_bytes):
-            register_bytes += [tmp & 0xff]
-            tmp = tmp >> 8
-        if self._endianness == "big":
-            register_bytes.reverse()
+        register_bytes = self._encode_memory_values(self._commit_pending(address, 1))
+
+        if read_address is None:
+            read_address = address
+
+        batch = self._i2c_controller.active_batch
+        if batch is not None:
+            #  Inside a batch the write and its readback are only queued, so the write check is
+            # done once the batch is executed
+            batch.write_device_memory(self._i2c_address, address, register_bytes, self._register_bits, self._register_length, self._write_type)
+            if write_check:
+                handle = batch.read_device_memory(self._i2c_address, read_address, write_bytes, self._register_bits, self._register_length, self._read_type)
+                handle.add_done_callback(lambda handle: self._check_written_register(address, handle))
+            else:
+                self._parent.update_whether_modified()
+            return True
 
         self._i2c_controller.write_device_memory(self._i2c_address, address, register_bytes, self._register_bits, self._register_length, self._write_type)
 
         if write_check:
             #time.sleep(self._readback_delay_us/10E6)  # because sleep accepts seconds
 
-            if read_address is None:
-                read_address = address
-
             tmp = self._read_memory_address_with_endian(read_address)
-            if self._memory[address] != tmp:
-                self.send_message("Failure to write register at address 0x{:0x} in the {} address space (I2C address 0x{:0x})".format(address, self._name, self._i2c_address),
-                                  status="Error"
-                )
-                self._memory[address] = tmp
-                # self._display_vars[address].set(hex_0fill(tmp, self._register_length))
+            return self._check_written_register_value(address, tmp)
 
-                self._parent.update_whether_modified()
+        self._parent.update_whether_modified()
+
+        return True
+
+    def _check_written_register(self, address, handle):
+        if handle.exception is not None:
+            return
+
+        self._check_written_register_value(address, self._decode_register_bytes(handle.result))
+
+    def _check_written_register_value(self, address, tmp):
+        index = self._shadow.index(address)
+        if self._shadow.plane('memory')[index] != tmp:
+            self.send_message("Failure to write register at address 0x{:0x} in the {} address space (I2C address 0x{:0x})".format(address, self._name, self._i2c_address),
+                                status="Error"
+            )
+            self._shadow.plane('memory')[index] = tmp
+            self._update_dirty(address, 1)
 
-                return False
+            self._parent.update_whether_modified()
+
+            return False
 
         self._parent.update_whether_modified()
 
@@ -473,49 +799,84 @@ class Address_Space_Controller(GUI_Helper):
 
         self._logger.info("Reading a block of {} registers ({} bytes each) starting at address {} in the address space '{}'".format(data_size, read_bytes, address, self._name))
 
-        tmp = self._i2c_controller.read_device_memory(self._i2c_address, address, data_size*read_bytes, self._register_bits, self._register_length, self._read_type)
-        for i in range(data_size):
-            if read_bytes == 1:
-                self._memory[address+i] = tmp[i]
-            else:
-                value = 0
-                base_idx = i * read_bytes
-                if self._endianness == 'little':
-                    for idx in range(read_bytes):
-                        value = (value << 8) | tmp[base_idx + read_bytes - 1 - idx]
-                else:
-                    for idx in range(read_bytes):
-                        value = (value << 8) | tmp[base_idx + idx]
-                self._memory[address+i] = value
-            self._display_vars[address+i].set(hex_0fill(self._memory[address+i], self._register_length))
+        try:
+            tmp = self._i2c_controller._read_device_memory_bytes(self._i2c_address, address, data_size*read_bytes, self._register_bits, self._register_length, self._read_type)
+        except I2C_Partial_Transfer_Error as error:
+            self._store_partial_memory_block(address, error)
+            return False
+        self._store_memory_block(address, data_size, tmp)
+
+        return True
+
+    def _store_partial_memory_block(self, address, error: I2C_Partial_Transfer_Error):
+        #  Only the ranges which were read successfully are stored, the registers in the failed
+        # ranges keep their previous values and are reported
+        from math import ceil
+        read_bytes = ceil(self._register_length/8)
+
+        for memory_address, byte_offset, length in error.completed_ranges:
+            self._store_memory_block(memory_address, length//read_bytes, error.data[byte_offset:byte_offset + length])
+        self._report_failed_ranges("read", error)
+
+    def _report_failed_ranges(self, operation: str, error: I2C_Partial_Transfer_Error):
+        from math import ceil
+        register_bytes = ceil(self._register_length/8)
+
+        failed = ["0x{:0x}-0x{:0x}".format(memory_address, memory_address + length//register_bytes - 1) for memory_address, _, length in error.failed_ranges]
+        self.send_message("Failure to {} some registers in the {} address space (I2C address 0x{:0x}), the other registers were transferred. The following register address ranges failed: {}".format(operation, self._name, self._i2c_address, ', '.join(failed)),
+                            status="Error"
+        )
+
+    def _store_memory_block(self, address, data_size, tmp):
+        start_time = time.perf_counter()
+        values = self._decode_memory_bytes(tmp, data_size)
+        #  Only the mapped registers are stored, the values read for the unmapped registers in
+        # between are dropped
+        for segment_address, index, length in self._shadow.segments(address, data_size):
+            segment_values = values[segment_address-address:segment_address-address+length]
+            self._shadow.set('memory', segment_address, segment_values)
+            self._shadow.set('valid', segment_address, [1] * length)
+            self._shadow.set('pending', segment_address, segment_values)
+            self._dirty.difference_update(range(segment_address, segment_address + length))
+        self._refresh_display(address, data_size)
 
         self._parent.update_whether_modified()
+        self._add_planning_time(start_time)
 
-        return True
+    def _add_planning_time(self, start_time: float):
+        # Time spent preparing or decoding register blocks, reported as the planning layer of the I2C metrics
+        self._i2c_controller.metrics.add_layer_time('planning', (time.perf_counter() - start_time) * 10**6)
 
-    def write_memory_block_with_split_for_read_only(self, address, data_size, write_check: bool = True, read_address = None):
-        start_address = None
+    def _writable_ranges(self, address, data_size):
+        # Unmapped registers are read only, so only the mapped segments have to be checked
+        read_only_map = self._shadow.plane('read_only')
         ranges = []
+        for segment_address, index, length in self._shadow.segments(address, data_size):
+            start_address = None
+            for idx in range(length):
+                if not read_only_map[index + idx] and start_address is None:
+                    start_address = segment_address + idx
+                if read_only_map[index + idx] and start_address is not None:
+                    ranges += [(start_address, segment_address + idx - start_address)]
+                    start_address = None
+            if start_address is not None:
+                ranges += [(start_address, segment_address + length - start_address)]
+        return ranges
 
-        for idx in range(data_size):
-            if not self._read_only_map[address + idx] and start_address is None:
-                start_address = address + idx
-            if self._read_only_map[address + idx] and start_address is not None:
-                ranges += [(start_address, address + idx - start_address)]
-                start_address = None
-        if start_address is not None:
-            if read_address is None:
-                read_address = address
-            ranges += [(start_address, address + idx - start_address + 1, start_address - address + read_address)]
+    def write_memory_block_with_split_for_read_only(self, address, data_size, write_check: bool = True, read_address = None):
+        if read_address is None:
+            read_address = address
+        ranges = self._writable_ranges(address, data_size)
 
         success = True
         self._logger.info("Found {} ranges without read only registers".format(len(ranges)))
-        for range_param in ranges:
-            if range_param[1] == 1:
-                if not self.write_memory_register(range_param[0], write_check, range_param[2]):
+        for start_address, range_size in ranges:
+            range_read_address = start_address - address + read_address
+            if range_size == 1:
+                if not self.write_memory_register(start_address, write_check, range_read_address):
                     success = False
             else:
-                if not self.write_memory_block(range_param[0], range_param[1], write_check, range_param[2]):
+                if not self.write_memory_block(start_address, range_size, write_check, range_read_address):
                     success = False
 
         return success
@@ -525,76 +886,68 @@ class Address_Space_Controller(GUI_Helper):
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
             return False
 
-        has_read_only = False
-        for idx in range(data_size):
-            if self._read_only_map[address + idx]:
-                has_read_only = True
-                break
-        if has_read_only:
+        if self._writable_ranges(address, data_size) != [(address, data_size)]:
             self._logger.info("The block of {} bytes starting at address {} in the address space '{}' covers one or more registers which are read only, it will be broken down into smaller blocks which do not cover the read only registers".format(data_size, address, self._name))
             self.write_memory_block_with_split_for_read_only(address, data_size, write_check, read_address)
             return False
 
         self._logger.info("Writing a block of {} bytes starting at address {} in the address space '{}'".format(data_size, address, self._name))
 
-        from math import ceil
-
-        write_bytes = ceil(self._register_length/8)
-
-        for i in range(data_size):
-            self._memory[address+i] = int(self._display_vars[address+i].get(), 0)
-
-        if write_bytes == 1:
-            tmp = self._memory[address:address+data_size]
-        else:
-            tmp = [None for i in range(data_size * write_bytes)]
-            for idx in range(data_size):
-                for i in range(write_bytes):
-                    if self._endianness == 'little':
-                        tmp[idx*write_bytes + i] = (self._memory[idx] >> (8 * i)) & 0xff
-                    else:
-                        tmp[idx*write_bytes + i] = (self._memory[idx] >> (8 * (write_bytes - 1 - i))) & 0xff
-
-        self._i2c_controller.write_device_memory(self._i2c_address, address, tmp, self._register_bits, self._register_length, self._write_type)
+        start_time = time.perf_counter()
+        tmp = self._encode_memory_values(self._commit_pending(address, data_size))
+        self._add_planning_time(start_time)
+
+        if read_address is None:
+            read_address = address
+
+        try:
+            self._i2c_controller.write_device_memory(self._i2c_address, address, tmp, self._register_bits, self._register_length, self._write_type)
+        except I2C_Partial_Transfer_Error as error:
+            #  The failed ranges are reported straight away and only the ranges which were written
+            # are read back
+            self._report_failed_ranges("write", error)
+            if write_check:
+                from math import ceil
+                write_bytes = ceil(self._register_length/8)
+                for memory_address, byte_offset, length in error.completed_ranges:
+                    readback = self._i2c_controller._read_device_memory_bytes(self._i2c_address, read_address + memory_address - address, length, self._register_bits, self._register_length, self._read_type)
+                    self._check_written_memory_block(memory_address, length//write_bytes, readback)
+            else:
+                self._parent.update_whether_modified()
+            return False
 
         if write_check:
             #time.sleep(self._readback_delay_us/10E6)  # because sleep accepts seconds
 
-            if read_address is None:
-                read_address = address
+            tmp = self._i2c_controller._read_device_memory_bytes(self._i2c_address, read_address, len(tmp), self._register_bits, self._register_length, self._read_type)
+            return self._check_written_memory_block(address, data_size, tmp)
 
-            tmp = self._i2c_controller.read_device_memory(self._i2c_address, read_address, data_size*write_bytes, self._register_bits, self._register_length, self._read_type)
-            if write_bytes != 1:
-                read_tmp = tmp
-                tmp = [None for i in range(data_size)]
+        self._parent.update_whether_modified()
 
-                for base_idx in range(data_size):
-                    value = 0
-                    if self._endianness == 'little':
-                        for i in range(write_bytes):
-                            value = (value << 8) | read_tmp[(base_idx + 1) * write_bytes - 1 - i]
-                    else:
-                        for i in range(write_bytes):
-                            value = (value << 8) | read_tmp[base_idx * write_bytes + i]
-                    tmp[base_idx] = value
-
-                    del read_tmp
-
-            failed = []
-            for i in range(data_size):
-                if self._memory[address+i] != tmp[i]:
-                    failed += [address+i]
-                    self._memory[address+i] = tmp[i]
-                    # self._display_vars[address+i].set(hex_0fill(tmp[i], self._register_length))
-            if len(failed) != 0:
-                failed = ["0x{:0x}".format(i) for i in failed]
-                self.send_message("Failure to write memory block at address 0x{:0x} with length {} in the {} address space (I2C address 0x{:0x}). The following register addresses failed to write: {}".format(address, data_size, self._name, self._i2c_address, ', '.join(failed)),
-                                  status="Error"
-                )
+        return True
 
-                self._parent.update_whether_modified()
+    def _check_written_memory_block(self, address, data_size, tmp):
+        start_time = time.perf_counter()
+        values = self._decode_memory_bytes(tmp, data_size)
 
-                return False
+        memory = self._shadow.plane('memory')
+        index = self._shadow.index(address)
+        failed = []
+        for i in range(data_size):
+            if memory[index+i] != values[i]:
+                failed += [address+i]
+                memory[index+i] = values[i]
+                self._dirty.add(address+i)
+        self._add_planning_time(start_time)
+        if len(failed) != 0:
+            failed = ["0x{:0x}".format(i) for i in failed]
+            self.send_message("Failure to write memory block at address 0x{:0x} with length {} in the {} address space (I2C address 0x{:0x}). The following register addresses failed to write: {}".format(address, data_size, self._name, self._i2c_address, ', '.join(failed)),
+                                status="Error"
+            )
+
+            self._parent.update_whether_modified()
+
+            return False
 
         self._parent.update_whether_modified()
 
@@ -622,8 +975,7 @@ class Address_Space_Controller(GUI_Helper):
         original_address = address
         if "Write Base Address" in block:
             address = block["Write Base Address"]
-            for idx in range(block["Length"]):
-                self._display_vars[address+idx].set(self._display_vars[original_address+idx].get())
+            self.set_pending_block(address, self.get_pending_block(original_address, block["Length"]))
 
         return self.write_memory_block(block["Base Address"], block["Length"], write_check, original_address)
 
@@ -647,26 +999,16 @@ class Address_Space_Controller(GUI_Helper):
         address = self._register_map[block_name + "/" + register_name]
         original_address = address
         if "Write Base Address" in self._blocks[block_name]:
-            val = self._display_vars[address].get()
+            val = self._get_pending(address)
             new_base = self._blocks[block_name]["Write Base Address"]
             old_base = self._blocks[block_name]["Base Address"]
             address = address - old_base + new_base
-            self._display_vars[address].set(val)
+            self.set_pending_block(address, [val])
 
         return self.write_memory_register(address, write_check, original_address)
 
     def reset(self):
-        register_count = len(self._register_map)
-        count = 0
-        lastUpdateTime = time.time_ns()
         for register_ref in self._register_map:
-            thisTime = time.time_ns()
-            if thisTime - lastUpdateTime > 0.3 * 10**9:
-                lastUpdateTime = thisTime
-                self.display_progress("Resetting:", count*100./register_count)
-                #self._parent._parent._frame.update_idletasks()
-                self._parent._parent._frame.update()
-
             full_address = self._register_map[register_ref]
 
             register_info = register_ref.split("/")
@@ -675,21 +1017,18 @@ class Address_Space_Controller(GUI_Helper):
             block_info = block_ref.split(":")
             block_name = block_info[0]
 
-            default_value = self._register_map_metadata[block_name]["Registers"][register_name]['default']
-            self._display_vars[full_address].set(hex_0fill(default_value, self._register_length))
-            count += 1
-        self.clear_progress()
+            self._shadow.set('pending', full_address, [self._register_map_metadata[block_name]["Registers"][register_name]['default']])
+        self._update_dirty(0, self._memory_size)
+        self._refresh_display(0, self._memory_size)
 
     def revert(self):
-        lastUpdateTime = time.time_ns()
-        for idx in range(self._memory_size):
-            thisTime = time.time_ns()
-            if thisTime - lastUpdateTime > 0.3 * 10**9:
-                lastUpdateTime = thisTime
-                self.display_progress("Reverting:", idx*100./self._memory_size)
-                #self._parent._parent._frame.update_idletasks()
-                self._parent._parent._frame.update()
-
-            if self._memory[idx] is not None:
-                self._display_vars[idx].set(hex_0fill(self._memory[idx], self._register_length))
-        self.clear_progress()
+        # Only the modified registers can differ from the read back values
+        memory = self._shadow.plane('memory')
+        valid = self._shadow.plane('valid')
+        pending = self._shadow.plane('pending')
+        for address in list(self._dirty):
+            index = self._shadow.index(address)
+            if valid[index]:
+                pending[index] = memory[index]
+                self._dirty.discard(address)
+        self._refresh_display(0, self._memory_size)
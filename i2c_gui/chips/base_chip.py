@@ -36,7 +36,6 @@ import logging
 import itertools
 import pickle
 
-from ..functions import hex_0fill
 
 class Base_Chip(GUI_Helper):
     newid = itertools.count()
@@ -90,9 +89,9 @@ class Base_Chip(GUI_Helper):
                     self._block_array_display_vars[address_space][block] = {}
                     self._block_array_decoded_display_vars[address_space][block] = {}
                     for register in self._register_model[address_space]["Register Blocks"][block]["Registers"]:
-                        self._block_array_display_vars[address_space][block][register] = tk.StringVar(name="{}_Display_{}_{}_{}".format(self._unique_name, address_space, block, register))
+                        self._block_array_display_vars[address_space][block][register] = self._new_variable(tk.StringVar, name="{}_Display_{}_{}_{}".format(self._unique_name, address_space, block, register))
                     for value in self._register_decoding[address_space]["Register Blocks"][block]:
-                        self._block_array_decoded_display_vars[address_space][block][value] = tk.StringVar(name="{}_DecodedDisplay_{}_{}_{}".format(self._unique_name, address_space, block, value))
+                        self._block_array_decoded_display_vars[address_space][block][value] = self._new_variable(tk.StringVar, name="{}_DecodedDisplay_{}_{}_{}".format(self._unique_name, address_space, block, value))
 
     @property
     def tabs(self):
@@ -192,7 +191,7 @@ class Base_Chip(GUI_Helper):
                 value=maximum
 
             self._indexer_vars[variable] = {
-                "variable": tk.StringVar(name="{}_Indexer_{}".format(self._unique_name, variable)),
+                "variable": self._new_variable(tk.StringVar, name="{}_Indexer_{}".format(self._unique_name, variable)),
                 "min": minimum,
                 "max": maximum
             }
@@ -222,14 +221,9 @@ class Base_Chip(GUI_Helper):
 
         for address_space_name in self._address_space:
             address_space: Address_Space_Controller = self._address_space[address_space_name]
-            size = address_space._memory_size
 
-            conf = [None for idx in range(size)]
-
-            for idx in range(size):
-                conf[idx] = int(address_space._display_vars[idx].get(), 0)
-
-            info[address_space_name] = conf
+            # Only the mapped registers are saved, as a dictionary from register address to value
+            info[address_space_name] = address_space.get_pending_values()
 
         self.save_pickle_file(config_file, info)
 
@@ -238,12 +232,14 @@ class Base_Chip(GUI_Helper):
 
         for address_space_name in self._address_space:
             address_space: Address_Space_Controller = self._address_space[address_space_name]
-            size = address_space._memory_size
 
-            length = address_space._register_length
+            values = info[address_space_name]
+            if isinstance(values, list):
+                #  Config files from older versions store the full address space as a list, only
+                # the registers which are mapped are loaded from them
+                values = {address: values[address] for address in address_space.get_pending_values() if address < len(values)}
 
-            for idx in range(size):
-                address_space._display_vars[idx].set(hex_0fill(info[address_space_name][idx], length))
+            address_space.set_pending_values(values)
 
         self.update_whether_modified()
 
@@ -350,6 +346,11 @@ class Base_Chip(GUI_Helper):
         if name in self._tabs:
             self._tabs.__delitem__(name)
 
+    def batch(self, max_read_gap: int = 0):
+        #  Register reads and writes done inside "with chip.batch():" are queued and coalesced into
+        # block transfers when the with block exits, the display vars are only updated then
+        return self._i2c_controller.batch(max_read_gap)
+
     def read_all(self):
         for address_space in self._address_space:
             self.read_all_address_space(address_space)
@@ -362,6 +363,50 @@ class Base_Chip(GUI_Helper):
 
         return success
 
+    def write_modified(self, write_check: bool = True):
+        success = True
+        for address_space in self._address_space:
+            if not self.write_modified_address_space(address_space, write_check=write_check):
+                success = False
+
+        return success
+
+    @property
+    def i2c_controller(self):
+        return self._i2c_controller
+
+    #  Staged versions of read_all and write_all, used by the Connection_Pool to run the bus
+    # transfers of several chips concurrently. fetch_all and transfer_write_all only do I/O and can
+    # run on a worker thread, the other methods must be called from the main thread
+    def fetch_all(self):
+        fetched = {}
+        for address_space in self._address_space:
+            fetched[address_space] = self._address_space[address_space].fetch_all()
+        return fetched
+
+    def store_all(self, fetched):
+        for address_space in fetched:
+            self._address_space[address_space].store_all(fetched[address_space])
+
+    def prepare_write_all(self):
+        prepared = {}
+        for address_space in self._address_space:
+            prepared[address_space] = self._address_space[address_space].prepare_write_all()
+        return prepared
+
+    def transfer_write_all(self, prepared, write_check: bool = True):
+        readbacks = {}
+        for address_space in prepared:
+            readbacks[address_space] = self._address_space[address_space].transfer_write(prepared[address_space], write_check)
+        return readbacks
+
+    def check_write_all(self, prepared, readbacks):
+        success = True
+        for address_space in prepared:
+            if not self._address_space[address_space].check_write(prepared[address_space], readbacks[address_space]):
+                success = False
+        return success
+
     def update_whether_modified(self):
         pass
 
@@ -375,6 +420,11 @@ class Base_Chip(GUI_Helper):
         address_space: Address_Space_Controller = self._address_space[address_space_name]
         return address_space.write_all(write_check=write_check)
 
+    def write_modified_address_space(self, address_space_name: str, write_check: bool = True):
+        self._logger.info("Writing modified registers of address space: {}".format(address_space_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        return address_space.write_modified(write_check=write_check)
+
     def read_all_block(self, address_space_name: str, block_name: str, full_array: bool = False):
         self._validate_indexers()
         block_ref, _ = self._gen_block_ref_from_indexers(
@@ -1818,23 +1818,19 @@ class ETROC2_Chip(Base_Chip):
             displayed_block_info = address_space._blocks[block_ref]
             block_length = displayed_block_info["Length"]
 
-            # Copy values from displayed variables into the broadcast address space for writing out
-            for offset in range(block_length):
-                displayed_address = displayed_block_info["Base Address"] + offset
-                broadcast_address = broadcast_base_address + offset
-                address_space._display_vars[broadcast_address].set(
-                    address_space._display_vars[displayed_address].get()
-                )
+            # Copy values from displayed registers into the broadcast address space for writing out
+            address_space.set_pending_block(
+                broadcast_base_address,
+                address_space.get_pending_block(displayed_block_info["Base Address"], block_length)
+            )
 
-                # Temporarily disable the read-only property on the broadcast address
-                address_space._read_only_map[broadcast_address] = False
+            # Temporarily disable the read-only property on the broadcast addresses
+            address_space.set_read_only(broadcast_base_address, block_length, False)
 
             return_status = address_space.write_memory_block(broadcast_base_address, block_length, write_check=write_check)
 
             # Re-enable the read-only on the broadcast address
-            for offset in range(block_length):
-                broadcast_address = broadcast_base_address + offset
-                address_space._read_only_map[broadcast_address] = True
+            address_space.set_read_only(broadcast_base_address, block_length, True)
 
             # TODO: Validate broadcast write
 
@@ -1872,18 +1868,16 @@ class ETROC2_Chip(Base_Chip):
             displayed_block_info = address_space._blocks[block_ref]
             displayed_address = displayed_block_info["Base Address"] + offset
 
-            # Copy values from displayed variable into the broadcast address for writing out
-            address_space._display_vars[broadcast_address].set(
-                address_space._display_vars[displayed_address].get()
-            )
+            # Copy values from displayed register into the broadcast address for writing out
+            address_space.set_pending_block(broadcast_address, address_space.get_pending_block(displayed_address, 1))
 
             # Temporarily disable the read-only property on the broadcast address
-            address_space._read_only_map[broadcast_address] = False
+            address_space.set_read_only(broadcast_address, 1, False)
 
             return_status = address_space.write_memory_register(broadcast_address, write_check=write_check)
 
             # Re-enable the read-only on the broadcast address
-            address_space._read_only_map[broadcast_address] = True
+            address_space.set_read_only(broadcast_address, 1, True)
 
             # TODO: Validate broadcast write
 
@@ -0,0 +1,162 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+
+class Sparse_Memory:
+    #  Register storage for address spaces where only some address ranges are mapped. The mapped
+    # ranges are kept sorted and merged, and each plane (read back values, pending values, flags...)
+    # stores the values of all the mapped addresses back to back in a compact array, so the storage
+    # scales with the number of mapped registers instead of the size of the address space.
+    # Addresses which only get mapped on demand, when a value is set, are stored like the others
+    # but are not part of the declared ranges
+    def __init__(self, planes: dict[str, tuple[str, int]], ranges: list[tuple[int, int]] = None):
+        # Each plane is described by the array typecode of its values (None for a plain list) and its default value
+        self._plane_types = planes
+
+        self._starts = []
+        self._lengths = []
+        self._declared_starts = []
+        self._declared_lengths = []
+        self._offsets = []
+        self._size = 0
+        self._planes = {name: self._new_plane(name, 0) for name in self._plane_types}
+
+        if ranges is not None:
+            self.map_ranges(ranges)
+
+    def _new_plane(self, name: str, size: int):
+        typecode, default = self._plane_types[name]
+        if typecode is None:
+            return [default] * size
+        return array(typecode, [default]) * size
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def ranges(self):
+        return list(zip(self._starts, self._lengths))
+
+    @property
+    def declared_ranges(self):
+        return list(zip(self._declared_starts, self._declared_lengths))
+
+    def addresses(self):
+        for start, length in zip(self._starts, self._lengths):
+            yield from range(start, start + length)
+
+    def declared_addresses(self):
+        for start, length in zip(self._declared_starts, self._declared_lengths):
+            yield from range(start, start + length)
+
+    def plane(self, name: str):
+        return self._planes[name]
+
+    def index(self, address: int):
+        pos = bisect_right(self._starts, address) - 1
+        if pos < 0 or address >= self._starts[pos] + self._lengths[pos]:
+            return None
+        return self._offsets[pos] + address - self._starts[pos]
+
+    def is_mapped(self, address: int, data_size: int = 1):
+        pos = bisect_right(self._starts, address) - 1
+        return pos >= 0 and address + data_size <= self._starts[pos] + self._lengths[pos]
+
+    def segments(self, address: int, data_size: int):
+        # The mapped parts of an address range, as (address, plane index, length) tuples
+        end_address = address + data_size
+        segments = []
+        pos = max(bisect_right(self._starts, address) - 1, 0)
+        while pos < len(self._starts) and self._starts[pos] < end_address:
+            start = max(self._starts[pos], address)
+            end = min(self._starts[pos] + self._lengths[pos], end_address)
+            if end > start:
+                segments += [(start, self._offsets[pos] + start - self._starts[pos], end - start)]
+            pos += 1
+        return segments
+
+    def _merge_ranges(self, starts: list[int], lengths: list[int], ranges: list[tuple[int, int]]):
+        merged = sorted(list(zip(starts, lengths)) + [(address, length) for address, length in ranges if length > 0])
+
+        starts = []
+        lengths = []
+        for start, length in merged:
+            if len(starts) > 0 and start <= starts[-1] + lengths[-1]:
+                lengths[-1] = max(lengths[-1], start + length - starts[-1])
+            else:
+                starts += [start]
+                lengths += [length]
+        return starts, lengths
+
+    def map_ranges(self, ranges: list[tuple[int, int]], declared: bool = True):
+        if declared:
+            self._declared_starts, self._declared_lengths = self._merge_ranges(self._declared_starts, self._declared_lengths, ranges)
+
+        starts, lengths = self._merge_ranges(self._starts, self._lengths, ranges)
+        if starts == self._starts and lengths == self._lengths:
+            return
+
+        old_ranges = list(zip(self._starts, self._lengths, self._offsets))
+        old_planes = self._planes
+
+        self._starts = starts
+        self._lengths = lengths
+        self._offsets = []
+        self._size = 0
+        for length in lengths:
+            self._offsets += [self._size]
+            self._size += length
+
+        #  Every old range is contained in a single new range, so the values are moved over one
+        # range at a time
+        self._planes = {name: self._new_plane(name, self._size) for name in self._plane_types}
+        for start, length, offset in old_ranges:
+            index = self.index(start)
+            for name in self._planes:
+                self._planes[name][index:index+length] = old_planes[name][offset:offset+length]
+
+    def get(self, name: str, address: int, data_size: int):
+        # Unmapped addresses read as the default value of the plane
+        values = [self._plane_types[name][1]] * data_size
+        plane = self._planes[name]
+        for start, index, length in self.segments(address, data_size):
+            values[start-address:start-address+length] = plane[index:index+length]
+        return values
+
+    def set(self, name: str, address: int, values):
+        # Writing to unmapped addresses maps them, without declaring them
+        if len(values) == 0:
+            return
+        if not self.is_mapped(address, len(values)):
+            self.map_ranges([(address, len(values))], declared=False)
+
+        index = self.index(address)
+        typecode = self._plane_types[name][0]
+        if typecode is None:
+            self._planes[name][index:index+len(values)] = list(values)
+        else:
+            self._planes[name][index:index+len(values)] = array(typecode, values)
@@ -31,13 +31,6 @@ import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to t
 import logging
 import time
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.figure import Figure
-import pandas
-import time
-
 from tkinter import filedialog as tkfd
 
 class Waveform_Sampler_Helper(GUI_Helper):
@@ -63,7 +56,7 @@ class Waveform_Sampler_Helper(GUI_Helper):
         for control in self._control_decoded_assoc:
             var, values = self._control_decoded_assoc[control]
             self._decoded_display_vars[control] = self._parent.get_decoded_display_var("Waveform Sampler", "Config", var)
-            self._control_vars[control] = tk.StringVar()
+            self._control_vars[control] = self._new_variable(tk.StringVar)
             self._control_var_updating[control] = None
             self._update_display_from_config(control)
 
@@ -205,6 +198,14 @@ class Waveform_Sampler_Helper(GUI_Helper):
             self._window.focus()
             return
 
+        #  The plotting libraries are only needed for the window, so scripts using the helper do not
+        # depend on them
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        import matplotlib
+        matplotlib.use('TkAgg')
+        from matplotlib.figure import Figure
+        import pandas
+
         state = "disabled"
         if self.is_connected:
             state = "normal"
@@ -349,6 +350,8 @@ class Waveform_Sampler_Helper(GUI_Helper):
         self._canvas.draw()
 
     def read_memory(self):
+        import pandas
+
         # Enable reading data from WS (change the value, then write it):
         self._ws_read_en.set(1)
         self._parent.write_decoded_value("Waveform Sampler", "Config", "rd_en_I2C", no_message=True)
@@ -29,15 +29,35 @@ from .functions import validate_bit_length
 from .functions import validate_variable_bit_register
 
 from math import ceil
+from concurrent.futures import Future
 
 import tkinter as tk
 import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+from tkinter import filedialog as tkfd
 import logging
 import time
 import re
+import os
+import pickle
+import asyncio
+import queue
+import threading
 
 from .usb_iss_helper import USB_ISS_Helper
 from .fpga_eth_helper import FPGA_ETH_Helper
+from .usb_iss_emulator import UsbIss_Emulator
+from .linux_i2c_dev_helper import Linux_I2C_Dev_Helper
+from .linux_i2c_dev_emulator import Linux_I2C_Dev_Emulator
+from .bus_capture_replay_helper import Bus_Capture_Replay_Helper
+from .bus_capture import Bus_Capture_Recorder
+from .bus_capture import Bus_Capture_Replayer
+from .fault_injection_helper import Fault_Injection_Helper
+from .fault_injection_helper import I2C_Fault_Model
+from .i2c_pacer import I2C_Pacer
+from .i2c_transaction_trace import I2C_Transaction_Trace
+from .i2c_metrics import I2C_Metrics
+from .i2c_retry_policy import Retry_Policy
+from .transaction_batch import Transaction_Batch
 
 class Connection_Controller(GUI_Helper):
     _orange_col = '#f0c010'
@@ -47,15 +67,23 @@ class Connection_Controller(GUI_Helper):
     _connection_types = [
         "USB-ISS",
         "FPGA-Eth",
+        "USB-ISS Emulator",
+        "Linux I2C-Dev",
+        "Linux I2C-Dev Emulator",
+        "Capture Replay",
     ]
 
     _parent: Base_GUI
     def __init__(
         self,
         parent: Base_GUI,
-        usb_iss_max_seq_byte = 8,
+        usb_iss_max_seq_byte = "Auto",
         override_logger = None,
         successive_i2c_delay_us : int = 10000,
+        reconnect_attempts: int = 5,
+        reconnect_backoff_s: float = 0.1,
+        retry_policy: Retry_Policy = None,
+        transfer_size_file: str = None,
     ):
         if override_logger is None:
             super().__init__(parent, None, parent._logger)
@@ -63,42 +91,96 @@ class Connection_Controller(GUI_Helper):
             super().__init__(parent, None, override_logger)
         self._is_connected = False
 
-        self._time_last_i2c_command = time.time_ns()
-
         self._usb_iss_max_seq_byte = usb_iss_max_seq_byte
+        self._usb_iss_emulator = None
+        self._linux_i2c_dev_emulator = None
+
+        #  Negotiated and calibrated transfer sizes of each connection, indexed by connection type
+        # and connection id. They are saved to transfer_size_file, by default in the home directory,
+        # so a calibration carries over to the next session. An empty file name disables saving
+        if transfer_size_file is None:
+            transfer_size_file = os.path.join(os.path.expanduser("~"), ".i2c_gui_transfer_sizes.pickle")
+        self._transfer_size_file = transfer_size_file
+        self._transfer_size_cache = self._load_transfer_size_cache()
 
         #  The i2c connection is instantiated as a helper class, the helper class will manage
         # the connection itself, allowing to replace the class with others in case other I2C
         # interfaces need to be supported
         self._i2c_connection = USB_ISS_Helper(self, usb_iss_max_seq_byte)
 
-        self._i2c_connection_type_var = tk.StringVar(value=self._connection_types[0])
+        #  A single pacer is shared by every I2C transaction, whichever connection helper is in use
+        self._pacer = I2C_Pacer(successive_i2c_delay_us)
+        self._i2c_connection.pacer = self._pacer
+
+        #  Transfers are recorded as raw records in a ring buffer, the logging window only formats
+        # the records it has not shown yet
+        self._trace = I2C_Transaction_Trace()
+        self._trace_displayed_sequence = 0
+        self._i2c_connection.trace = self._trace
+
+        # Counters and latency histograms of every layer, cheap enough to be always enabled
+        self._metrics = I2C_Metrics()
+        self._i2c_connection.metrics = self._metrics
+        self._i2c_connection.backend_name = self._connection_types[0]
+
+        #  A lost link is reopened transparently in the middle of an operation, without going
+        # through disconnect, so the chips keep their shadow memory
+        self._reconnect_attempts = reconnect_attempts
+        self._reconnect_backoff_s = reconnect_backoff_s
+        self._i2c_connection.reconnect_attempts = self._reconnect_attempts
+        self._i2c_connection.reconnect_backoff_s = self._reconnect_backoff_s
+
+        if retry_policy is None:
+            retry_policy = Retry_Policy()
+        self._retry_policy = retry_policy
+        self._i2c_connection.retry_policy = self._retry_policy
+
+        self._i2c_connection_type_var = self._new_variable(tk.StringVar, value=self._connection_types[0])
         self._i2c_connection_type_var.trace_add("write", self._update_connection_type) # This should probably be moved lower
 
         self._registered_connection_callbacks = []
 
-        self._successive_i2c_delay_us = successive_i2c_delay_us
+        #  All bus traffic holds the I/O lock, so the calls made by the asynchronous API on the
+        # I/O worker thread never interleave with synchronous calls from other threads
+        self._io_lock = threading.RLock()
+        self._io_executor = None
 
-        from . import __no_connect__
-        if __no_connect__:
-            self._previous_write_value = None
+        # Logging messages sent from other threads wait here until the main thread can display them
+        self._i2c_logging_queue = queue.SimpleQueue()
+
+        # The metrics window refreshes itself periodically, until it is closed
+        self._i2c_metrics_after_id = None
+
+        # While a capture is running every transaction is also written to the capture file
+        self._capture = None
+
+        # While faults are injected, the connection helper is wrapped by a Fault_Injection_Helper
+        self._fault_injection = None
+
+        # Batches which are currently open with a with statement, for each thread
+        self._batch_stack = threading.local()
+
+
+        self._previous_write_value = None
 
         self._do_logging_i2c = False
-        self._i2c_logging_window_status_var = tk.StringVar()
+        self._i2c_logging_window_status_var = self._new_variable(tk.StringVar)
         self._i2c_logging_window_status_var.set("Logging Disabled")
 
-        self._i2c_window_address_var = tk.StringVar()
-        self._i2c_window_register_var = tk.StringVar()
-        self._i2c_window_register_value_var = tk.StringVar()
-        self._i2c_window_block_size_var = tk.StringVar()
+        self._i2c_window_address_var = self._new_variable(tk.StringVar)
+        self._i2c_window_register_var = self._new_variable(tk.StringVar)
+        self._i2c_window_register_value_var = self._new_variable(tk.StringVar)
+        self._i2c_window_block_size_var = self._new_variable(tk.StringVar)
 
-        self._i2c_window_register_length_var = tk.StringVar(value="8")
+        self._i2c_window_register_length_var = self._new_variable(tk.StringVar, value="8")
         self._i2c_window_register_length_var.trace_add("write", self._changed_register_length)
 
-        self._i2c_window_register_address_length_var = tk.StringVar(value="16")
+        self._i2c_window_register_address_length_var = self._new_variable(tk.StringVar, value="16")
         self._i2c_window_register_address_length_var.trace_add("write", self._changed_register_address_length)
 
-        self._enable_readback_var = tk.BooleanVar(value=True)
+        self._fast_scan_var = self._new_variable(tk.BooleanVar, value=True)
+
+        self._enable_readback_var = self._new_variable(tk.BooleanVar, value=True)
         self._enable_readback_var.trace_add("write", self._toggle_enable_readback)
 
     @property
@@ -116,8 +198,188 @@ class Connection_Controller(GUI_Helper):
 
     @property
     def handle(self):
+        if self._fault_injection is not None:
+            return self._fault_injection.inner
         return self._i2c_connection
 
+    @property
+    def transfer_sizes(self):
+        return self._i2c_connection.transfer_sizes
+
+    @property
+    def successive_i2c_delay_us(self):
+        return self._pacer.default_gap_us
+
+    @successive_i2c_delay_us.setter
+    def successive_i2c_delay_us(self, value: int):
+        self._pacer.default_gap_us = value
+
+    @property
+    def pacer(self):
+        return self._pacer
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: Retry_Policy):
+        self._retry_policy = value
+        self._i2c_connection.retry_policy = value
+
+    @property
+    def reconnect_attempts(self):
+        return self._reconnect_attempts
+
+    @reconnect_attempts.setter
+    def reconnect_attempts(self, value: int):
+        #  Set to 0 to disable reconnecting, an operation then fails as soon as the link is lost
+        self._reconnect_attempts = value
+        self._i2c_connection.reconnect_attempts = value
+
+    @property
+    def reconnect_backoff_s(self):
+        return self._reconnect_backoff_s
+
+    @reconnect_backoff_s.setter
+    def reconnect_backoff_s(self, value: float):
+        self._reconnect_backoff_s = value
+        self._i2c_connection.reconnect_backoff_s = value
+
+    @property
+    def trace(self):
+        return self._trace
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def capture(self):
+        return self._capture
+
+    def start_capture(self, file_name: str):
+        #  Record every read, write, check and direct transaction to a binary capture file, which
+        # can later be re-executed with replay_capture or served by the "Capture Replay" connection
+        with self._io_lock:
+            if self._capture is not None:
+                self._capture.close()
+            self._capture = Bus_Capture_Recorder(file_name)
+        return self._capture
+
+    def stop_capture(self):
+        with self._io_lock:
+            if self._capture is None:
+                return
+            self._capture.close()
+            self._capture = None
+
+    def replay_capture(self, file_name: str, timing: str = "fast", speed: float = 1.0, stop_on_mismatch: bool = False):
+        #  Re-execute a capture against the current connection, either back to back or with the
+        # original timing, and report the transactions whose results differ from the recorded ones
+        return Bus_Capture_Replayer(self, file_name, timing, speed).replay(stop_on_mismatch)
+
+    @property
+    def fault_model(self):
+        if self._fault_injection is None:
+            return None
+        return self._fault_injection.fault_model
+
+    def inject_faults(self, fault_model: I2C_Fault_Model):
+        #  Wrap the connection helper so that the faults of fault_model are injected in its
+        # transfers, this also works with __no_connect__, in which case the data is emulated
+        with self._io_lock:
+            if self._fault_injection is not None:
+                self._fault_injection.fault_model = fault_model
+                return
+            self._fault_injection = Fault_Injection_Helper(self, self._i2c_connection, fault_model)
+            if self.is_connected:
+                self._fault_injection._emulated = self._i2c_connection._no_connect
+                self._fault_injection._no_connect = False
+                self._fault_injection.transfer_sizes = self._i2c_connection.transfer_sizes
+                self._fault_injection.calibrated_sizes = self._i2c_connection.calibrated_sizes
+            self._i2c_connection = self._fault_injection
+            self._share_with_connection()
+
+    def stop_injecting_faults(self):
+        with self._io_lock:
+            if self._fault_injection is None:
+                return
+            self._i2c_connection = self._fault_injection.inner
+            self._fault_injection = None
+            self._share_with_connection()
+
+    def _share_with_connection(self):
+        self._i2c_connection.pacer = self._pacer
+        self._i2c_connection.trace = self._trace
+        self._i2c_connection.metrics = self._metrics
+        self._i2c_connection.backend_name = self._i2c_connection_type_var.get()
+        self._i2c_connection.reconnect_attempts = self._reconnect_attempts
+        self._i2c_connection.reconnect_backoff_s = self._reconnect_backoff_s
+        self._i2c_connection.retry_policy = self._retry_policy
+
+    def _no_connect_read(self, byte_count: int):
+        from . import __no_connect_type__
+        retVal = bytearray()
+        if __no_connect_type__ == "check" or self._previous_write_value is None:
+            retVal = bytearray(i & 0xff for i in range(byte_count))
+            if byte_count == 1:
+                retVal[0] = 0x42
+        elif __no_connect_type__ == "echo":
+            retVal = bytearray([self._previous_write_value & 0xff]) * byte_count
+        else:
+            self._logger.error("Massive error, no connect was set, but an incorrect no connect type was chosen, so the I2C emulation behaviour is unknown")
+        return retVal
+
+    def _no_connect_write(self, data: list[int]):
+        from . import __no_connect_type__
+        if __no_connect_type__ == "echo":
+            self._previous_write_value = data[len(data)-1]
+
+    def set_device_gap(self, device_address: int, gap_us: int = None):
+        #  Set the minimum time between the start of successive I2C transactions when talking to
+        # a given device, gap_us=None reverts to the default successive_i2c_delay_us
+        self._pacer.set_device_gap(device_address, gap_us)
+
+    def _transfer_size_cache_key(self):
+        return (self.connection_type, self._i2c_connection.connection_id)
+
+    @property
+    def transfer_size_file(self):
+        return self._transfer_size_file
+
+    def _load_transfer_size_cache(self):
+        if self._transfer_size_file == "" or not os.path.isfile(self._transfer_size_file):
+            return {}
+        try:
+            with open(self._transfer_size_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as error:
+            self._logger.warning("Unable to load the I2C transfer sizes from {}: {}".format(self._transfer_size_file, error))
+            return {}
+
+    def _save_transfer_sizes(self):
+        self._transfer_size_cache[self._transfer_size_cache_key()] = {
+            'negotiated': self._i2c_connection.transfer_sizes,
+            'calibrated': self._i2c_connection.calibrated_sizes,
+        }
+        if self._transfer_size_file == "":
+            return
+        try:
+            with open(self._transfer_size_file, 'wb') as f:
+                pickle.dump(self._transfer_size_cache, f)
+        except OSError as error:
+            self._logger.warning("Unable to save the I2C transfer sizes to {}: {}".format(self._transfer_size_file, error))
+
+    def calibrate_transfer_size(self, device_address: int, memory_address: int = 0, register_bits: int = 16, read_type: str = 'Normal'):
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to calibrate the transfer size")
+
+        with self._io_lock:
+            size = self._i2c_connection.calibrate_transfer_size(device_address, memory_address, register_bits, read_type)
+        self._save_transfer_sizes()
+        return size
+
     def _set_connected(self, value):
         if value != self._is_connected:
             self._is_connected = value
@@ -160,11 +422,33 @@ class Connection_Controller(GUI_Helper):
             self._i2c_connection = FPGA_ETH_Helper(self)
             self.send_message("The FPGA-Eth connection is not fully implement yet - this will not work", "Warning")
             update_display = True
+        elif connection_type == "USB-ISS Emulator":
+            # Keep the same emulator when switching back and forth, so the emulated devices are not lost
+            if self._usb_iss_emulator is None:
+                self._usb_iss_emulator = UsbIss_Emulator()
+            self._i2c_connection = USB_ISS_Helper(self, self._usb_iss_max_seq_byte, iss=self._usb_iss_emulator)
+            update_display = True
+        elif connection_type == "Linux I2C-Dev":
+            self._i2c_connection = Linux_I2C_Dev_Helper(self)
+            update_display = True
+        elif connection_type == "Linux I2C-Dev Emulator":
+            if self._linux_i2c_dev_emulator is None:
+                self._linux_i2c_dev_emulator = Linux_I2C_Dev_Emulator()
+            self._i2c_connection = Linux_I2C_Dev_Helper(self, os_layer=self._linux_i2c_dev_emulator)
+            update_display = True
+        elif connection_type == "Capture Replay":
+            self._i2c_connection = Bus_Capture_Replay_Helper(self)
+            update_display = True
         else:
             self.send_message("Unknown I2C Connection Type: {}".format(connection_type), "Error")
             self._i2c_connection_type_var.set(self._connection_types[0])
             self._update_connection_type()
 
+        if self._fault_injection is not None:
+            self._fault_injection = Fault_Injection_Helper(self, self._i2c_connection, self._fault_injection.fault_model)
+            self._i2c_connection = self._fault_injection
+        self._share_with_connection()
+
         if update_display and hasattr(self, "_i2c_connection_frame") and self._i2c_connection_frame is not None:
             self._i2c_connection_frame.destroy()
 
@@ -174,17 +458,36 @@ class Connection_Controller(GUI_Helper):
             self._i2c_connection.display_in_frame(self._i2c_connection_frame)
 
     def check_i2c_device(self, address: str):
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
+        from . import __no_connect__
+        if __no_connect__ and self._fault_injection is None:
+            return True
+
+        with self._io_lock:
+            if self._capture is not None:
+                return self._capture.check_i2c_device(self._i2c_connection.check_i2c_device, int(address, 0))
+            return self._i2c_connection.check_i2c_device(int(address, 0))
+
+    def fast_scan_i2c_devices(self, addresses = range(128), exclude: list[int] = None) -> list[int]:
+        #  Probe every address in addresses (any iterable, for instance one or more ranges) except
+        # the ones in exclude, in as few transfers as the backend allows
+        if exclude is None:
+            exclude = []
+
+        scan_addresses = []
+        for address in addresses:
+            if address < 0 or address > 0x7f:
+                raise RuntimeError("Invalid I2C address received: {}".format(hex(address)))
+            if address not in exclude and address not in scan_addresses:
+                scan_addresses += [address]
 
         from . import __no_connect__
         if __no_connect__:
-            return True
+            return scan_addresses
 
-        return self._i2c_connection.check_i2c_device(int(address, 0))
+        with self._io_lock:
+            if self._capture is not None:
+                return self._capture.scan_i2c_devices(self._i2c_connection.scan_i2c_devices, scan_addresses)
+            return self._i2c_connection.scan_i2c_devices(scan_addresses)
 
     def register_connection_callback(self, function):
         if function not in self._registered_connection_callbacks:
@@ -221,7 +524,14 @@ class Connection_Controller(GUI_Helper):
             return
 
         from . import __no_connect__
-        if self._i2c_connection.connect(__no_connect__):
+        with self._io_lock:
+            connected = self._i2c_connection.connect(__no_connect__)
+        if connected:
+            #  The backend limits are used straight away, only sizes which a previous calibration of
+            # this connection found to be lower are carried over
+            saved_sizes = self._transfer_size_cache.get(self._transfer_size_cache_key(), {})
+            self._i2c_connection.negotiate_transfer_sizes(saved_sizes.get('calibrated', None))
+            self._save_transfer_sizes()
             if hasattr(self, "_connect_button"):
                 self._connect_button.config(text="Disconnect", command=self.disconnect)
             if hasattr(self, "_connection_type_option"):
@@ -242,7 +552,8 @@ class Connection_Controller(GUI_Helper):
         if not self.is_connected:
             return
 
-        self._i2c_connection.disconnect()
+        with self._io_lock:
+            self._i2c_connection.disconnect()
 
         if hasattr(self, "_connect_button"):
             self._connect_button.config(text="Connect", command=self.connect)
@@ -260,7 +571,12 @@ class Connection_Controller(GUI_Helper):
         if hasattr(self, "_i2c_scan_window"):
             self._toggle_logging_button.config(state='disabled')
 
-    def read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal'):
+    def read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> list[int]:
+        return list(self._read_device_memory_bytes(device_address, memory_address, byte_count, register_bits, register_length, read_type))
+
+    def _read_device_memory_bytes(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> bytearray:
+        #  Returns the bytearray the data was received into, without converting it to a list, for
+        # the chips which decode the data straight from the bytes
         if not self.is_connected:
             raise RuntimeError("You must first connect to a device before trying to read registers from it")
 
@@ -268,27 +584,14 @@ class Connection_Controller(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
         from . import __no_connect__
-        from . import __no_connect_type__
-        if __no_connect__:
-            retVal = []
-            if __no_connect_type__ == "check" or self._previous_write_value is None:
-                retVal = [i for i in range(byte_count)]
-                if byte_count == 1:
-                    retVal[0] = 0x42
-            elif __no_connect_type__ == "echo":
-                retVal = [self._previous_write_value for i in range(byte_count)]
-            else:
-                self._logger.error("Massive error, no connect was set, but an incorrect no connect type was chosen, so the I2C emulation behaviour is unknown")
-            return retVal
-
-        return self._i2c_connection.read_device_memory(device_address, memory_address, byte_count, register_bits, register_length, read_type)
+        if __no_connect__ and self._fault_injection is None:
+            return self._no_connect_read(byte_count)
+
+        with self._io_lock:
+            if self._capture is not None:
+                return self._capture.read_device_memory(self._i2c_connection._read_device_memory_bytes, device_address, memory_address, byte_count, register_bits, register_length, read_type)
+            return self._i2c_connection._read_device_memory_bytes(device_address, memory_address, byte_count, register_bits, register_length, read_type)
 
     def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
         if not self.is_connected:
@@ -298,20 +601,73 @@ class Connection_Controller(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
         from . import __no_connect__
-        from . import __no_connect_type__
-        if __no_connect__:
-            if __no_connect_type__ == "echo":
-                self._previous_write_value = data[len(data)-1]
+        if __no_connect__ and self._fault_injection is None:
+            self._no_connect_write(data)
             return
 
-        self._i2c_connection.write_device_memory(device_address, memory_address, data, register_bits, register_length, write_type)
+        with self._io_lock:
+            if self._capture is not None:
+                self._capture.write_device_memory(self._i2c_connection.write_device_memory, device_address, memory_address, data, register_bits, register_length, write_type)
+                return
+            self._i2c_connection.write_device_memory(device_address, memory_address, data, register_bits, register_length, write_type)
+
+    def _submit_io(self, function, *args, **kwargs) -> Future:
+        if self._io_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="I2C_IO")
+        return self._io_executor.submit(function, *args, **kwargs)
+
+    def batch(self, max_read_gap: int = 0) -> Transaction_Batch:
+        #  Use as "with conn.batch() as batch:", the reads and writes queued on the batch (or by the
+        # chips using this controller) are coalesced and executed when the with block exits
+        return Transaction_Batch(self, max_read_gap)
+
+    @property
+    def active_batch(self) -> Transaction_Batch:
+        stack = getattr(self._batch_stack, "batches", [])
+        if len(stack) == 0:
+            return None
+        return stack[-1]
+
+    def _push_batch(self, batch: Transaction_Batch):
+        if not hasattr(self._batch_stack, "batches"):
+            self._batch_stack.batches = []
+        self._batch_stack.batches += [batch]
+
+    def _pop_batch(self, batch: Transaction_Batch):
+        stack = getattr(self._batch_stack, "batches", [])
+        if batch in stack:
+            stack.remove(batch)
+
+    def shutdown_io_worker(self, wait: bool = True):
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=wait)
+            self._io_executor = None
+
+    def submit_check_i2c_device(self, address: str) -> Future:
+        return self._submit_io(self.check_i2c_device, address)
+
+    def submit_read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> Future:
+        return self._submit_io(self.read_device_memory, device_address, memory_address, byte_count, register_bits, register_length, read_type)
+
+    def submit_write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal') -> Future:
+        return self._submit_io(self.write_device_memory, device_address, memory_address, list(data), register_bits, register_length, write_type)
+
+    def submit_direct_i2c(self, commands: list[int]) -> Future:
+        return self._submit_io(self.direct_i2c, list(commands))
+
+    async def check_i2c_device_async(self, address: str):
+        return await asyncio.wrap_future(self.submit_check_i2c_device(address))
+
+    async def read_device_memory_async(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal'):
+        return await asyncio.wrap_future(self.submit_read_device_memory(device_address, memory_address, byte_count, register_bits, register_length, read_type))
+
+    async def write_device_memory_async(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
+        return await asyncio.wrap_future(self.submit_write_device_memory(device_address, memory_address, data, register_bits, register_length, write_type))
+
+    async def direct_i2c_async(self, commands: list[int]):
+        return await asyncio.wrap_future(self.submit_direct_i2c(commands))
 
     def display_i2c_window(self):
         if hasattr(self, "_i2c_window"):
@@ -376,6 +732,10 @@ class Connection_Controller(GUI_Helper):
         self._clear_logging_button = ttk.Button(self._i2c_window_generic_control_frame, text="Clear Log", command=self.clear_i2c_log)
         self._clear_logging_button.grid(column=200, row=110, sticky=(tk.W, tk.E), padx=(0,5))
 
+        # Place the export log button below the clear log button
+        self._export_logging_button = ttk.Button(self._i2c_window_generic_control_frame, text="Export Log", command=self.export_i2c_log)
+        self._export_logging_button.grid(column=200, row=120, sticky=(tk.W, tk.E), padx=(0,5))
+
         # Place logging status at right of status bar
         self._i2c_logging_status_label = ttk.Label(self._i2c_window_bottom_frame, textvariable=self._i2c_logging_window_status_var)
         self._i2c_logging_status_label.grid(column=500, row=100, sticky=(tk.E), padx=(0,15), pady=(0,5))
@@ -507,6 +867,71 @@ class Connection_Controller(GUI_Helper):
         self._i2c_window.destroy()
         del self._i2c_window
 
+    def display_i2c_metrics_window(self):
+        if hasattr(self, "_i2c_metrics_window"):
+            self._logger.info("I2C metrics window already open")
+            self._i2c_metrics_window.focus()
+            return
+
+        self._i2c_metrics_window = tk.Toplevel(self._parent._root)
+        self._i2c_metrics_window.title(self._parent._title + " - I2C Metrics")
+        self._i2c_metrics_window.protocol('WM_DELETE_WINDOW', self.close_i2c_metrics_window)
+        self._i2c_metrics_window.columnconfigure(100, weight=1)
+        self._i2c_metrics_window.rowconfigure(100, weight=1)
+
+        self._i2c_metrics_window_top_frame = ttk.Frame(self._i2c_metrics_window, padding="0 0 0 0")
+        self._i2c_metrics_window_top_frame.grid(column=100, row=100, sticky=(tk.N, tk.W, tk.E, tk.S))
+        self._i2c_metrics_window_top_frame.columnconfigure(100, weight=1)
+        self._i2c_metrics_window_top_frame.rowconfigure(100, weight=1)
+
+        # Place the metrics table, in a fixed width font so the columns line up
+        self._metrics_display = tk.Text(self._i2c_metrics_window_top_frame, state='disabled', width=140, height=20, wrap='none', font='TkFixedFont')
+        self._metrics_display.grid(column=100, row=100, sticky=(tk.N, tk.W, tk.E, tk.S))
+
+        self._metrics_scrollbar = ttk.Scrollbar(self._i2c_metrics_window_top_frame, command=self._metrics_display.yview)
+        self._metrics_scrollbar.grid(column=101, row=100, sticky=(tk.N, tk.W, tk.E, tk.S))
+        self._metrics_display.config(yscrollcommand=self._metrics_scrollbar.set)
+
+        # Place a control frame on the right side of the top frame
+        self._i2c_metrics_window_control_frame = ttk.Frame(self._i2c_metrics_window_top_frame, padding="5 5 5 5")
+        self._i2c_metrics_window_control_frame.grid(column=500, row=100, sticky=(tk.N, tk.W, tk.E, tk.S))
+
+        self._reset_metrics_button = ttk.Button(self._i2c_metrics_window_control_frame, text="Reset", command=self.reset_i2c_metrics)
+        self._reset_metrics_button.grid(column=100, row=100, sticky=(tk.W, tk.E), padx=(0,5))
+
+        self._update_i2c_metrics_display()
+
+        self._i2c_metrics_window.update()
+        self._i2c_metrics_window.minsize(self._i2c_metrics_window.winfo_width(), self._i2c_metrics_window.winfo_height())
+
+    def close_i2c_metrics_window(self):
+        if not hasattr(self, "_i2c_metrics_window"):
+            self._logger.info("I2C metrics window does not exist")
+            return
+
+        if self._i2c_metrics_after_id is not None:
+            self._i2c_metrics_window.after_cancel(self._i2c_metrics_after_id)
+            self._i2c_metrics_after_id = None
+
+        self._i2c_metrics_window.destroy()
+        del self._i2c_metrics_window
+
+    def reset_i2c_metrics(self):
+        self._metrics.reset()
+        self._update_i2c_metrics_display(reschedule=False)
+
+    def _update_i2c_metrics_display(self, reschedule: bool = True):
+        if not hasattr(self, "_i2c_metrics_window"):
+            return
+
+        self._metrics_display.configure(state='normal')
+        self._metrics_display.delete("1.0", tk.END)
+        self._metrics_display.insert('end', self._metrics.format())
+        self._metrics_display.configure(state='disabled')
+
+        if reschedule:
+            self._i2c_metrics_after_id = self._i2c_metrics_window.after(1000, self._update_i2c_metrics_display)
+
     def toggle_i2c_logging(self):
         self.is_logging_i2c = not self.is_logging_i2c
 
@@ -522,10 +947,27 @@ class Connection_Controller(GUI_Helper):
         #self._text_display.insert('end', self.get_log())
         self._text_display.configure(state='disabled')
 
+    def export_i2c_log(self):
+        filename = tkfd.asksaveasfilename(
+            parent=self._i2c_window,
+            title='Export I2C Transaction Log',
+            initialdir='./',
+            initialfile='i2c_log.txt',
+            defaultextension='txt',
+            filetypes=[('Text files', '*.txt'), ('CSV files', '*.csv')],
+        )
+
+        if filename is None or filename == "":
+            return
+
+        self._logger.trace("Exporting the I2C transaction log to file: {}".format(filename))
+
+        self._trace.export(filename)
+
     def test_i2c_device(self):
         self._normalize_i2c_address()
 
-        self._i2c_connection.check_i2c_device(int(self._i2c_window_address_var.get(), 0))
+        self.check_i2c_device(self._i2c_window_address_var.get())
 
     def read_i2c_device_register(self):
         self._normalize_i2c_address()
@@ -537,7 +979,7 @@ class Connection_Controller(GUI_Helper):
         byte_count = ceil(register_length/8)
         register_address_length = int(self._i2c_window_register_address_length_var.get(), 0)
 
-        self._i2c_connection.read_device_memory(
+        self.read_device_memory(
             int(self._i2c_window_address_var.get(), 0),
             int(self._i2c_window_register_var.get(), 0),
             byte_count = byte_count,
@@ -566,7 +1008,7 @@ class Connection_Controller(GUI_Helper):
                 data[i] = tmp & 0xff
                 tmp = tmp >> 8
 
-        self._i2c_connection.write_device_memory(
+        self.write_device_memory(
             int(self._i2c_window_address_var.get(), 0),
             int(self._i2c_window_register_var.get(), 0),
             data,
@@ -585,7 +1027,7 @@ class Connection_Controller(GUI_Helper):
         byte_count = ceil(register_length/8)
         register_address_length = int(self._i2c_window_register_address_length_var.get(), 0)
 
-        self._i2c_connection.read_device_memory(
+        self.read_device_memory(
             int(self._i2c_window_address_var.get(), 0),
             int(self._i2c_window_register_var.get(), 0),
             int(self._i2c_window_block_size_var.get(), 0) * byte_count,
@@ -622,7 +1064,7 @@ class Connection_Controller(GUI_Helper):
                 data += tmp_data
 
 
-        self._i2c_connection.write_device_memory(
+        self.write_device_memory(
             int(self._i2c_window_address_var.get(), 0),
             int(self._i2c_window_register_var.get(), 0),
             data,
@@ -630,14 +1072,44 @@ class Connection_Controller(GUI_Helper):
             register_length = register_length,
         )
 
-    def direct_i2c(self, commands: list[int]):
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
+    def stream_data_fifo(self, frame_words: int, frame_count: int = None, request_words: int = None):
+        #  Generator of frames read continuously from the data FIFO of the FPGA, see
+        # FPGA_ETH_Helper.stream_fpga_data_fifo. The I/O lock is only held while a frame is being
+        # received, since the generator may be closed from any thread. In between, the helper
+        # refuses any I2C transaction until the stream is exhausted or closed
+        if not hasattr(self._i2c_connection, "stream_fpga_data_fifo"):
+            raise RuntimeError("The {} connection does not have a data FIFO".format(self.connection_type))
+
+        stream = self._i2c_connection.stream_fpga_data_fifo(frame_words, frame_count, request_words)
+        try:
+            while True:
+                with self._io_lock:
+                    frame = next(stream, None)
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            with self._io_lock:
+                stream.close()
 
-        return self._i2c_connection._direct_i2c(commands)
+    def direct_i2c(self, commands: list[int]):
+        with self._io_lock:
+            slept_us = self._pacer.wait()
+            start_time = time.perf_counter()
+            try:
+                if self._capture is not None:
+                    data = self._capture.direct_i2c(self._i2c_connection._direct_i2c, commands)
+                else:
+                    data = self._i2c_connection._direct_i2c(commands)
+            except Exception as error:
+                duration_us = (time.perf_counter() - start_time) * 10**6
+                self._trace.record('Direct', None, length=len(commands), status="Error: {}".format(error), duration_us=duration_us)
+                self._metrics.add_transfer(self._i2c_connection.backend_name, None, 'direct', 0, duration_us, slept_us, ok=False)
+                raise
+            duration_us = (time.perf_counter() - start_time) * 10**6
+            self._trace.record('Direct', None, length=len(data), payload=data, duration_us=duration_us)
+            self._metrics.add_transfer(self._i2c_connection.backend_name, None, 'direct', len(data), duration_us, slept_us)
+            return data
 
     @property
     def is_logging_i2c(self):
@@ -651,6 +1123,8 @@ class Connection_Controller(GUI_Helper):
         self._do_logging_i2c = value
 
         if self._do_logging_i2c:
+            self._trace_displayed_sequence = self._trace.last_sequence
+            self._text_display.after(100, self._display_queued_i2c_logging_messages)
             self._i2c_logging_window_status_var.set("Logging Enabled")
             self._i2c_logging_status_label.config(background = self._green_col, foreground = self._black_col)
             #if self._connection_status_label.cget('background') == '':
@@ -692,10 +1166,40 @@ class Connection_Controller(GUI_Helper):
         if not self.is_logging_i2c:
             return
 
+        # Tk widgets must only be used from the main thread
+        if threading.current_thread() is not threading.main_thread():
+            self._i2c_logging_queue.put(message)
+            return
+
+        self._display_queued_i2c_logging_messages(reschedule=False)
         self._text_display.configure(state='normal')
         self._text_display.insert('end', message + "\n")
         self._text_display.configure(state='disabled')
 
+    def _display_queued_i2c_logging_messages(self, reschedule: bool = True):
+        if not hasattr(self, "_text_display"):
+            return
+
+        messages = []
+        while True:
+            try:
+                messages += [self._i2c_logging_queue.get_nowait()]
+            except queue.Empty:
+                break
+
+        records = self._trace.records(since=self._trace_displayed_sequence)
+        if len(records) > 0:
+            self._trace_displayed_sequence = records[-1].sequence
+            messages += [self._trace.format(records)]
+
+        if len(messages) > 0:
+            self._text_display.configure(state='normal')
+            self._text_display.insert('end', "\n".join(messages) + "\n")
+            self._text_display.configure(state='disabled')
+
+        if reschedule and self.is_logging_i2c:
+            self._text_display.after(100, self._display_queued_i2c_logging_messages)
+
     def display_i2c_scan_window(self):
         if hasattr(self, "_i2c_scan_window"):
             self._logger.info("Scan I2C window already open")
@@ -744,6 +1248,10 @@ class Connection_Controller(GUI_Helper):
         self._clear_scan_button = ttk.Button(self._i2c_scan_window_control_frame, text="Clear", command=self.clear_i2c_scan)
         self._clear_scan_button.grid(column=100, row=110, sticky=(tk.W, tk.E), padx=(0,5))
 
+        # Place the fast scan option below
+        self._fast_scan_checkbutton = ttk.Checkbutton(self._i2c_scan_window_control_frame, variable=self._fast_scan_var, text='Fast Scan')
+        self._fast_scan_checkbutton.grid(column=100, row=120, sticky=(tk.W, tk.E), padx=(0,5))
+
         # Place an empty label below to reserve the vertical space
         self._empty_scan_label = ttk.Label(self._i2c_scan_window_bottom_frame, text=" ")
         self._empty_scan_label.grid(column=0, row=100)
@@ -763,6 +1271,12 @@ class Connection_Controller(GUI_Helper):
         self.scan_progress(0)
 
         found = []
+        if self._fast_scan_var.get():
+            found = [hex_0fill(device_address, 8) for device_address in self.fast_scan_i2c_devices()]
+            self._display_i2c_scan_result(found)
+            self.clear_scan_progress()
+            return
+
         last_update = time.time_ns()
         for device_address in range(128):
             address_hex = hex_0fill(device_address, 8)
@@ -779,6 +1293,10 @@ class Connection_Controller(GUI_Helper):
             # For testing without hardware
             #time.sleep(10**-2)
 
+        self._display_i2c_scan_result(found)
+        self.clear_scan_progress()
+
+    def _display_i2c_scan_result(self, found: list[str]):
         if len(found) == 0:
             self._scan_display.configure(state='normal')
             self._scan_display.insert('end', "Did not find any devices\n\n")
@@ -791,8 +1309,6 @@ class Connection_Controller(GUI_Helper):
             self._scan_display.insert('end', "\n")
             self._scan_display.configure(state='disabled')
 
-        self.clear_scan_progress()
-
     def clear_i2c_scan(self):
         self._scan_display.configure(state='normal')
         self._scan_display.delete("1.0", tk.END)
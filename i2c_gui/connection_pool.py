@@ -0,0 +1,138 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .chips.base_chip import Base_Chip
+from .gui_helper import GUI_Helper
+from .base_gui import Base_GUI
+from .connection_controller import Connection_Controller
+
+from concurrent.futures import Future, wait
+
+
+class Connection_Pool(GUI_Helper):
+    #  A set of named connections, one per I2C bus (a USB-ISS port or an FPGA endpoint). Each
+    # Connection_Controller executes its transfers on its own I/O worker thread, so work on
+    # different buses runs concurrently while work on the same bus stays in order
+    _parent: Base_GUI
+    def __init__(self, parent: Base_GUI, override_logger = None):
+        if override_logger is None:
+            super().__init__(parent, None, parent._logger)
+        else:
+            super().__init__(parent, None, override_logger)
+
+        self._connections: dict[str, Connection_Controller] = {}
+
+    @property
+    def names(self):
+        return list(self._connections.keys())
+
+    def __getitem__(self, name: str) -> Connection_Controller:
+        return self._connections[name]
+
+    def __contains__(self, name: str):
+        return name in self._connections
+
+    def add_connection(self, name: str, connection_type: str = "USB-ISS", **kwargs) -> Connection_Controller:
+        if name in self._connections:
+            raise RuntimeError("A connection with the name {} already exists in the pool".format(name))
+
+        controller = Connection_Controller(self._parent, override_logger=self._logger, **kwargs)
+        controller.connection_type = connection_type
+        self._connections[name] = controller
+        return controller
+
+    def remove_connection(self, name: str):
+        if name not in self._connections:
+            return
+
+        controller = self._connections[name]
+        controller.disconnect()
+        controller.shutdown_io_worker()
+        del self._connections[name]
+
+    def connect_all(self):
+        status = {}
+        for name in self._connections:
+            self._connections[name].connect()
+            status[name] = self._connections[name].is_connected
+        return status
+
+    def disconnect_all(self):
+        for name in self._connections:
+            self._connections[name].disconnect()
+            self._connections[name].shutdown_io_worker()
+
+    def _controller_for(self, target) -> Connection_Controller:
+        if isinstance(target, Connection_Controller):
+            return target
+        if isinstance(target, str):
+            return self._connections[target]
+        # Otherwise assume it is a chip, which is routed to the bus of its own controller
+        return target.i2c_controller
+
+    def submit(self, target, function, *args, **kwargs) -> Future:
+        #  The target can be a connection name, a Connection_Controller or a chip, the function is
+        # run on the I/O worker of the corresponding bus
+        return self._controller_for(target)._submit_io(function, *args, **kwargs)
+
+    def run(self, jobs: list[tuple]):
+        #  Run a list of (target, function, args...) jobs, concurrently for different buses, and
+        # return the results in the same order. If any job fails, the first exception is raised
+        # once every job has finished
+        futures = []
+        for job in jobs:
+            futures += [self.submit(job[0], job[1], *job[2:])]
+        wait(futures)
+
+        results = []
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
+            results += [future.result()]
+        return results
+
+    def scan_all(self, addresses = range(128), exclude: list[int] = None) -> dict[str, list[int]]:
+        # Scan every connected bus at the same time, returning the addresses found on each bus by connection name
+        names = [name for name in self._connections if self._connections[name].is_connected]
+        found = self.run([(name, self._connections[name].fast_scan_i2c_devices, addresses, exclude) for name in names])
+        return {names[idx]: found[idx] for idx in range(len(names))}
+
+    def read_all(self, chips: list[Base_Chip]):
+        fetched = self.run([(chip, chip.fetch_all) for chip in chips])
+        for idx in range(len(chips)):
+            chips[idx].store_all(fetched[idx])
+
+    def write_all(self, chips: list[Base_Chip], write_check: bool = True):
+        prepared = [chip.prepare_write_all() for chip in chips]
+        readbacks = self.run([(chips[idx], chips[idx].transfer_write_all, prepared[idx], write_check) for idx in range(len(chips))])
+
+        success = True
+        for idx in range(len(chips)):
+            if not chips[idx].check_write_all(prepared[idx], readbacks[idx]):
+                success = False
+        return success
@@ -29,7 +29,6 @@ import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to t
 import logging
 
 import importlib.resources
-from PIL import ImageTk, Image
 
 from tkinter import filedialog as tkfd
 
@@ -122,6 +121,8 @@ class ETROC2_GUI(Base_GUI):
             self._chip._display_ws_monitor()
 
     def _about_contents(self, element: tk.Tk, column: int, row: int):
+        from PIL import ImageTk, Image
+
         self._about_img = ImageTk.PhotoImage(Image.open(importlib.resources.open_binary("i2c_gui.static", "ETROC2_Emulator.png")))
         self._about_img_label = tk.Label(element, image = self._about_img)
         self._about_img_label.grid(column=column, row=row, sticky='')
@@ -0,0 +1,253 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .base_gui import Base_GUI
+from .i2c_retry_policy import I2C_Link_Error
+from .i2c_retry_policy import I2C_NACK_Error
+from .i2c_retry_policy import I2C_Short_Read_Error
+
+import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+import random
+import threading
+import time
+
+class I2C_Fault_Model:
+    #  Decides which fault, if any, is injected in each transfer. Faults are either taken from a
+    # schedule, a dictionary of transfer index (counting from 0) to fault, or drawn at random
+    # with the given probabilities from a generator seeded with seed, so that a run is
+    # reproducible. The schedule takes precedence over the probabilities
+    faults = ['nack', 'short_read', 'bit_flip', 'latency_spike', 'disconnect']
+
+    def __init__(
+        self,
+        seed: int = None,
+        nack: float = 0,
+        short_read: float = 0,
+        bit_flip: float = 0,
+        latency_spike: float = 0,
+        disconnect: float = 0,
+        latency_spike_s: float = 0.05,
+        schedule: dict[int, str] = None,
+    ):
+        self._probabilities = {
+            'nack': nack,
+            'short_read': short_read,
+            'bit_flip': bit_flip,
+            'latency_spike': latency_spike,
+            'disconnect': disconnect,
+        }
+        if sum(self._probabilities.values()) > 1:
+            raise RuntimeError("The probabilities of the injected faults can not add up to more than 1")
+
+        if schedule is None:
+            schedule = {}
+        for fault in schedule.values():
+            if fault not in self.faults:
+                raise RuntimeError("Unknown fault to inject: {}".format(fault))
+
+        self._seed = seed
+        self._schedule = dict(schedule)
+        self.latency_spike_s = latency_spike_s
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def transfers(self):
+        return self._transfers
+
+    @property
+    def statistics(self):
+        with self._lock:
+            return dict(self._injected)
+
+    def reset(self):
+        # Start the fault sequence again from the beginning, with the same seed
+        with self._lock:
+            self._random = random.Random(self._seed)
+            self._transfers = 0
+            self._injected = {fault: 0 for fault in self.faults}
+
+    def next_fault(self, operation: str):
+        with self._lock:
+            index = self._transfers
+            self._transfers += 1
+
+            fault = self._schedule.get(index, None)
+            if fault is None:
+                value = self._random.random()
+                for candidate in self.faults:
+                    if value < self._probabilities[candidate]:
+                        fault = candidate
+                        break
+                    value -= self._probabilities[candidate]
+
+            #  Only reads can be short, and a check only sees whether the device acknowledged,
+            # so the faults which do not apply to an operation are not injected
+            if fault == 'short_read' and operation != 'read':
+                fault = None
+            if fault == 'bit_flip' and operation not in ['read', 'write']:
+                fault = None
+
+            if fault is not None:
+                self._injected[fault] += 1
+            return fault
+
+    def random_bit(self, byte_count: int):
+        with self._lock:
+            return self._random.randrange(8 * byte_count)
+
+class Fault_Injection_Helper(I2C_Connection_Helper):
+    #  Wraps another connection helper and injects faults in the transfers it makes, according to
+    # an I2C_Fault_Model. The chunking, pacing, retries and reconnects of the connection layer
+    # run in the wrapper, so the cost of recovering from the faults shows up in the metrics. A
+    # wrapped helper which is connected without hardware (no_connect) still has its transfers
+    # go through the wrapper, with the data emulated like the Connection_Controller does
+    def __init__(self, parent: Base_GUI, inner: I2C_Connection_Helper, fault_model: I2C_Fault_Model):
+        super().__init__(parent, inner._max_seq_byte, inner._swap_endian)
+        self._inner = inner
+        self._fault_model = fault_model
+        self._emulated = False
+        self._link_down = False
+
+    @property
+    def inner(self):
+        return self._inner
+
+    @property
+    def fault_model(self):
+        return self._fault_model
+
+    @fault_model.setter
+    def fault_model(self, value: I2C_Fault_Model):
+        self._fault_model = value
+
+    @property
+    def connection_id(self):
+        return self._inner.connection_id
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        return self._inner._max_transfer_size(operation, register_bits, access_type)
+
+    def _is_link_error(self, error: Exception):
+        if isinstance(error, I2C_Link_Error):
+            return True
+        return self._inner._is_link_error(error)
+
+    def _classify_error(self, error: Exception):
+        kind = self._retry_policy.classify(error)
+        if kind is None:
+            kind = self._inner._classify_error(error)
+        return kind
+
+    def _reopen_link(self):
+        if not self._emulated and not self._inner._reopen_link():
+            return False
+        self._link_down = False
+        return True
+
+    def _inject_fault(self, operation: str, device_address: int):
+        #  Injects the faults which happen before the transfer reaches the bus and returns the
+        # fault, so the caller can inject the ones which corrupt the transfer itself
+        if self._link_down:
+            raise I2C_Link_Error("The link was dropped by the fault injection and has not been reopened")
+
+        fault = self._fault_model.next_fault(operation)
+        if fault == 'nack':
+            raise I2C_NACK_Error("Injected missing ACK on the I2C bus")
+        elif fault == 'disconnect':
+            self._link_down = True
+            raise I2C_Link_Error("Injected loss of the link to the I2C adapter")
+        elif fault == 'latency_spike':
+            time.sleep(self._fault_model.latency_spike_s)
+        return fault
+
+    def _flip_bit(self, data):
+        bit = self._fault_model.random_bit(len(data))
+        data[bit // 8] ^= 1 << (bit % 8)
+
+    def _check_i2c_device(self, address: int):
+        try:
+            self._inject_fault('check', address)
+        except I2C_NACK_Error:
+            return False
+        if self._emulated:
+            return True
+        return self._inner._check_i2c_device(address)
+
+    def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        fault = self._inject_fault('write', address)
+        if fault == 'bit_flip' and len(data) > 0:
+            data = list(data)
+            self._flip_bit(data)
+
+        if self._emulated:
+            self._parent._no_connect_write(data)
+        else:
+            self._inner._write_i2c_device_memory(address, memory_address, data, register_bits, write_type)
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        data = bytearray(byte_count)
+        self._read_i2c_device_memory_into(address, memory_address, memoryview(data), register_bits, read_type)
+        return list(data)
+
+    def _read_i2c_device_memory_into(self, address: int, memory_address: int, buffer: memoryview, register_bits: int = 16, read_type: str = 'Normal'):
+        fault = self._inject_fault('read', address)
+
+        if self._emulated:
+            buffer[:] = self._parent._no_connect_read(len(buffer))
+        else:
+            self._inner._read_i2c_device_memory_into(address, memory_address, buffer, register_bits, read_type)
+
+        if fault == 'short_read':
+            raise I2C_Short_Read_Error("Injected short read, received {} of {} bytes from the I2C device with address 0x{:02x}".format(len(buffer)//2, len(buffer), address))
+        if fault == 'bit_flip' and len(buffer) > 0:
+            self._flip_bit(buffer)
+
+    def _direct_i2c(self, commands: list[int]) -> list[int]:
+        self._inject_fault('direct', None)
+        if self._emulated:
+            return []
+        return self._inner._direct_i2c(commands)
+
+    def display_in_frame(self, frame: ttk.Frame):
+        self._frame = frame
+        self._inner.display_in_frame(frame)
+
+    def validate_connection_params(self):
+        return self._inner.validate_connection_params()
+
+    def connect(self, no_connect: bool = False):
+        #  The wrapper itself never takes the no connect shortcuts of the connection helper, so
+        # the emulated transfers are paced, chunked and retried like real ones
+        if not self._inner.connect(no_connect):
+            return False
+        self._emulated = no_connect
+        self._no_connect = False
+        self._link_down = False
+        return True
+
+    def disconnect(self):
+        self._inner.disconnect()
@@ -0,0 +1,355 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .fpga_eth_helper import FPGA_ETH_Helper
+
+from collections import deque
+
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+class I2C_Slave_Model:
+    def __init__(self, address: int, memory_size: int = 65536, register_bits: int = 16, memory: bytes = None):
+        if register_bits not in [8, 16]:
+            raise RuntimeError("Unknown register bits for the emulated I2C device: {}".format(register_bits))
+
+        self._address = address
+        self._register_bits = register_bits
+        self._memory_size = memory_size
+        self._pointer = 0
+
+        if memory is None:
+            self._memory = bytearray(memory_size)
+        else:
+            if len(memory) != memory_size:
+                raise RuntimeError("The initial memory of the emulated I2C device does not match the memory size")
+            self._memory = bytearray(memory)
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def memory(self):
+        return self._memory
+
+    def write(self, data: list[int]):
+        #  The first bytes of a write set the register pointer (least significant byte first,
+        # matching the byte order used by the FPGA), any remaining bytes are written to memory
+        address_bytes = self._register_bits // 8
+        if len(data) < address_bytes:
+            return
+
+        pointer = 0
+        for idx in range(address_bytes):
+            pointer |= (data[idx] & 0xff) << (8 * idx)
+        self._pointer = pointer % self._memory_size
+
+        for value in data[address_bytes:]:
+            self._memory[self._pointer] = value & 0xff
+            self._pointer = (self._pointer + 1) % self._memory_size
+
+    def read(self, byte_count: int) -> list[int]:
+        data = []
+        for _ in range(byte_count):
+            data += [self._memory[self._pointer]]
+            self._pointer = (self._pointer + 1) % self._memory_size
+        return data
+
+class FPGA_ETH_Emulator:
+    _default_latency_us = {
+        'config_write': 0,
+        'config_read': 0,
+        'status_read': 0,
+        'pulse': 0,
+        'fifo_word': 0,
+        'round_trip': 0,  # Network delay added to every reply sent back, as for an FPGA which is not on the local host
+        'i2c_transaction': 10,  # Fixed overhead of an I2C transaction (start, stop and device address)
+        'i2c_byte': 23,  # Time to shift a byte plus ACK on the bus, 9 bits at 400 kHz
+    }
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1024, latency_us: dict[str, float] = None, logger: logging.Logger = None):
+        self._host = host
+        self._port = port
+
+        #  The emulated firmware keeps processing commands while an I2C transaction is running,
+        # like the real one, so a status read taken too early returns the data and ACK bit of the
+        # previous transaction and a pulse sent too early is lost
+
+        if logger is None:
+            logger = logging.getLogger("FPGA_ETH_Emulator")
+        self._logger = logger
+
+        self._latency_us = dict(self._default_latency_us)
+        if latency_us is not None:
+            for key in latency_us:
+                if key not in self._latency_us:
+                    raise RuntimeError("Unknown latency type for the FPGA emulator: {}".format(key))
+                self._latency_us[key] = latency_us[key]
+
+        self._lock = threading.Lock()
+        self._devices: dict[int, I2C_Slave_Model] = {}
+        self._config_registers = [0 for _ in range(32)]
+        self._status_registers = [0 for _ in range(32)]
+        self._status_registers[0] = FPGA_ETH_Helper._status_done_mask
+        self._i2c_busy_until = 0
+        self._i2c_result_status = None  # Status register 0 once the running I2C transaction is done
+
+        self._fifo = deque()
+        self._fifo_counter = 0
+
+        self._statistics = {
+            'commands': 0,
+            'i2c_transactions': 0,
+            'i2c_overruns': 0,
+            'busy_status_reads': 0,
+            'fifo_words': 0,
+        }
+
+        self._server = None
+        self._server_thread = None
+
+    @property
+    def address(self):
+        if self._server is None:
+            return (self._host, self._port)
+        return self._server.server_address
+
+    @property
+    def statistics(self):
+        with self._lock:
+            return dict(self._statistics)
+
+    def set_latency(self, operation: str, latency_us: float):
+        if operation not in self._latency_us:
+            raise RuntimeError("Unknown latency type for the FPGA emulator: {}".format(operation))
+        self._latency_us[operation] = latency_us
+
+    def add_device(self, address: int, memory_size: int = 65536, register_bits: int = 16, memory: bytes = None) -> I2C_Slave_Model:
+        device = I2C_Slave_Model(address, memory_size, register_bits, memory)
+        with self._lock:
+            self._devices[address] = device
+        return device
+
+    def remove_device(self, address: int):
+        with self._lock:
+            if address in self._devices:
+                del self._devices[address]
+
+    def get_device(self, address: int) -> I2C_Slave_Model:
+        return self._devices[address]
+
+    def push_fifo_data(self, words: list[int]):
+        with self._lock:
+            self._fifo.extend([word & 0xffffffff for word in words])
+
+    def start(self):
+        if self._server is not None:
+            return
+
+        emulator = self
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                emulator._handle_connection(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self._host, self._port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, name="FPGA_ETH_Emulator", daemon=True)
+        self._server_thread.start()
+        self._logger.info("FPGA Ethernet emulator listening on {}:{}".format(*self.address))
+
+    def stop(self):
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._server_thread.join()
+        self._server = None
+        self._server_thread = None
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _handle_connection(self, connection: socket.socket):
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        buffer = b''
+        while True:
+            try:
+                data = connection.recv(65536)
+            except OSError:
+                break
+            if not data:
+                break
+
+            buffer += data
+            word_count = len(buffer) // 4
+            if word_count == 0:
+                continue
+
+            commands = struct.unpack('>{}I'.format(word_count), buffer[:word_count * 4])
+            buffer = buffer[word_count * 4:]
+
+            replies = []
+            for command in commands:
+                replies += self._process_command(command)
+
+            if len(replies) > 0:
+                self._sleep_us(self._latency_us['round_trip'])
+                try:
+                    connection.sendall(struct.pack('>{}I'.format(len(replies)), *replies))
+                except OSError:
+                    break
+
+    def _sleep_us(self, latency_us: float):
+        if latency_us > 0:
+            time.sleep(latency_us * 10**-6)
+
+    def _process_command(self, command: int) -> list[int]:
+        high_word = (command >> 16) & 0xffff
+        low_word = command & 0xffff
+        register = (command >> 16) & 0x1f
+
+        with self._lock:
+            self._statistics['commands'] += 1
+
+        if command & 0x80000000:
+            if command & 0x00200000:  # Config register read
+                self._sleep_us(self._latency_us['config_read'])
+                with self._lock:
+                    return [self._config_registers[register]]
+            else:  # Status register read
+                self._sleep_us(self._latency_us['status_read'])
+                return [self._read_status_register(register)]
+        elif high_word == 0x000b:
+            self._sleep_us(self._latency_us['pulse'])
+            if low_word == FPGA_ETH_Helper._i2c_pulse_register:
+                self._run_i2c_transaction()
+            return []
+        elif high_word == 0x0019:
+            return self._read_fifo(low_word + 1)
+        elif command & 0x00200000:
+            self._sleep_us(self._latency_us['config_write'])
+            with self._lock:
+                self._config_registers[register] = low_word
+            return []
+
+        self._logger.warning("Unknown FPGA command received by the emulator: 0x{:08x}".format(command))
+        return []
+
+    def _complete_i2c_transaction(self):
+        # The data and ACK bit of an I2C transaction only reach the status register once it is done
+        if self._i2c_result_status is not None and time.perf_counter() >= self._i2c_busy_until:
+            self._status_registers[0] = self._i2c_result_status
+            self._i2c_result_status = None
+
+    def _read_status_register(self, register: int) -> int:
+        with self._lock:
+            self._complete_i2c_transaction()
+            status = self._status_registers[register]
+            if register == 0 and self._i2c_result_status is not None:
+                status = (status | FPGA_ETH_Helper._status_busy_mask) & ~FPGA_ETH_Helper._status_done_mask
+                self._statistics['busy_status_reads'] += 1
+            return status
+
+    def _run_i2c_transaction(self):
+        with self._lock:
+            self._complete_i2c_transaction()
+            if self._i2c_result_status is not None:
+                self._statistics['i2c_overruns'] += 1
+                # Only the first one is a warning, the statistics hold the count
+                if self._statistics['i2c_overruns'] == 1:
+                    self._logger.warning("I2C pulse received while the previous I2C transaction is still running, it is ignored")
+                else:
+                    self._logger.debug("I2C pulse received while the previous I2C transaction is still running, it is ignored")
+                return
+
+            val = self._config_registers[5] << 16 | self._config_registers[4]
+            mode = (val >> 24) & 0xff
+            address = (val >> 17) & 0x7f
+            wr = (val >> 16) & 0x1
+            byte1 = (val >> 8) & 0xff
+            byte0 = val & 0xff
+
+            if wr == 0:
+                if mode == 0:
+                    data = [byte1]
+                elif mode == 1:
+                    data = [byte1, byte0]
+                else:
+                    data = [byte1, self._config_registers[6] & 0xff, byte0]
+            else:
+                data = []
+
+            status = self._status_registers[0] & FPGA_ETH_Helper._status_data_mask
+            device = self._devices.get(address, None)
+            if device is None:
+                status |= FPGA_ETH_Helper._status_ack_error_mask
+            elif wr == 0:
+                device.write(data)
+            else:
+                status = device.read(1)[0]
+                data = [status]
+
+            self._i2c_result_status = status | FPGA_ETH_Helper._status_done_mask
+            self._statistics['i2c_transactions'] += 1
+
+            transaction_time_us = self._latency_us['i2c_transaction'] + self._latency_us['i2c_byte'] * (len(data) + 1)
+            self._i2c_busy_until = time.perf_counter() + transaction_time_us * 10**-6
+
+    def _read_fifo(self, count: int) -> list[int]:
+        self._sleep_us(self._latency_us['fifo_word'] * count)
+
+        words = []
+        with self._lock:
+            for _ in range(count):
+                if len(self._fifo) > 0:
+                    words += [self._fifo.popleft()]
+                else:
+                    #  When no data was explicitly pushed, a counter is returned so that the
+                    # consumer can check no words were lost or reordered
+                    words += [self._fifo_counter]
+                    self._fifo_counter = (self._fifo_counter + 1) & 0xffffffff
+            self._statistics['fifo_words'] += count
+        return words
@@ -23,6 +23,8 @@
 from __future__ import annotations
 
 from .i2c_connection_helper import I2C_Connection_Helper
+from .i2c_retry_policy import I2C_Link_Error
+from .i2c_retry_policy import I2C_Timeout_Error
 from .base_gui import Base_GUI
 
 import tkinter as tk
@@ -32,17 +34,71 @@ import time
 
 import socket
 import struct
+import sys
+from array import array
 from .functions import validate_hostname
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class FPGA_ETH_Helper(I2C_Connection_Helper):
-    def __init__(self, parent: Base_GUI, max_seq_byte: int = 8, swap_endian: bool = False):
+    # Bits of status register 0 of the FPGA I2C engine
+    _status_data_mask      = 0x00ff
+    _status_ack_error_mask = 0x0100
+    _status_busy_mask      = 0x0200
+    _status_done_mask      = 0x0400
+
+    _i2c_pulse_register = 0x0001
+
+    # A single data FIFO read command can request at most this many words
+    _fifo_max_request_words = 0x10000
+
+    #  The FPGA runs one I2C transaction per byte, so the transfer size only sets how many of
+    # them are sent together, which is bounded to keep pipelined buffers small
+    _max_block_bytes = 256
+
+    _completion_wait_types = [
+        "Fixed",  # Wait a fixed time before and after each I2C transaction
+        "Poll",   # Poll the status register until the I2C engine reports the transaction is done
+    ]
+
+    def __init__(
+        self,
+        parent: Base_GUI,
+        max_seq_byte: int | str = "Auto",
+        swap_endian: bool = False,
+        pipelined: bool = False,
+        completion_wait: str = "Fixed",
+        poll_timeout_us: int = 100000,
+        poll_initial_interval_us: int = 20,
+        poll_max_interval_us: int = 2000,
+        ):
         super().__init__(parent, max_seq_byte, swap_endian)
 
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-        self._hostname_var = tk.StringVar(value='192.168.2.3') # FPGA IP address
+        self._hostname_var = self._new_variable(tk.StringVar, value='192.168.2.3') # FPGA IP address
+
+        self._port_var = self._new_variable(tk.IntVar, value=1024) # port number
+
+        #  In pipelined mode the FPGA commands needed for a block of I2C operations are sent in
+        # as few buffers as possible instead of one at a time with fixed delays in between
+        self._pipelined_var = self._new_variable(tk.BooleanVar, value=pipelined)
+
+        if completion_wait not in self._completion_wait_types:
+            raise RuntimeError("Unknown completion wait type: {}".format(completion_wait))
+        self._completion_wait_var = self._new_variable(tk.StringVar, value=completion_wait)
+
+        self.poll_timeout_us = poll_timeout_us
+        self.poll_initial_interval_us = poll_initial_interval_us
+        self.poll_max_interval_us = poll_max_interval_us
 
-        self._port_var = tk.IntVar(value=1024) # port number
+        self._last_i2c_transaction_time_us = None
+
+        # Set while the data FIFO is being streamed, the socket then carries nothing but FIFO words
+        self._streaming = False
 
     @property
     def hostname(self):
@@ -60,91 +116,178 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
     def port(self, value: int):
         self._port_var.set(value)
 
-    def _check_i2c_device(self, address: int):
-        mode = 0
-        wr = 1
-        val = mode << 24 | address << 17 | wr << 16  # write device addr and read one byte, ignore read address
+    @property
+    def pipelined(self):
+        return self._pipelined_var.get()
+
+    @pipelined.setter
+    def pipelined(self, value: bool):
+        self._pipelined_var.set(value)
+
+    @property
+    def completion_wait(self):
+        return self._completion_wait_var.get()
 
-        self._write_fpga_config_register(4, 0xffff & val)
-        self._write_fpga_config_register(5, 0xffff & (val>>16))
-        time.sleep(0.01)
-        self._pulse_fpga_register(0x0001)  # Send a pulse to IIC module
-        time.sleep(0.01)
+    @completion_wait.setter
+    def completion_wait(self, value: str):
+        if value not in self._completion_wait_types:
+            raise RuntimeError("Unknown completion wait type: {}".format(value))
+        self._completion_wait_var.set(value)
+
+    @property
+    def last_i2c_transaction_time_us(self):
+        #  Time measured between the pulse starting an I2C transaction and the status register
+        # reporting it as done, only available when polling for completion
+        return self._last_i2c_transaction_time_us
+
+    @property
+    def is_streaming(self):
+        return self._streaming
 
-        ack_error = self._read_fpga_status_register(0) & 0x0100  # the 9th bit of status register is ACK_ERROR
+    @property
+    def connection_id(self):
+        return "{}:{}".format(self.hostname, self.port)
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        #  With fixed waits every byte takes two pulses of 20 ms each, so the chunks are kept small
+        # enough for the progress display and the GUI to be updated regularly
+        if self.pipelined and self.completion_wait == "Poll":
+            return self._max_block_bytes
+        return self._default_seq_byte
+
+    def _check_i2c_device(self, address: int):
+        replies = self._execute_fpga_commands(self._i2c_check_device_commands(address))
+
+        ack_error = replies[-1] & self._status_ack_error_mask  # the 9th bit of status register is ACK_ERROR
         return (ack_error == 0)  # if no error, return true
 
+    def _scan_i2c_devices(self, addresses: list[int]) -> list[int]:
+        #  In pipelined mode the probes of all the addresses are sent as a single burst, which
+        # still waits for each probe to complete as configured by completion_wait. Each probe ends
+        # with one status read holding its ACK error bit
+        if not self.pipelined:
+            return super()._scan_i2c_devices(addresses)
+
+        commands = []
+        for address in addresses:
+            commands += self._i2c_check_device_commands(address)
+        replies = self._execute_fpga_commands_pipelined(commands)
+
+        return [addresses[idx] for idx in range(len(addresses)) if (replies[idx] & self._status_ack_error_mask) == 0]
+
     def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        if write_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support write types which are not of the normal type")
+
+        commands = []
         for index in range(len(data)):
-            self._write_i2c_device_register(
+            commands += self._i2c_write_register_commands(
                 i2c_address = address,
                 memory_address = memory_address + index,
                 data = data[index],
                 addressing_mode = register_bits,
-                write_type = write_type,
             )
-        return
+        self._execute_fpga_commands(commands)
 
     def _write_i2c_device_register(self, i2c_address: int, memory_address: int, data: int, addressing_mode: int = 16, write_type: str = 'Normal'):
         if write_type != 'Normal':
             raise RuntimeError("The FPGA ETH interface does not support write types which are not of the normal type")
+        self._execute_fpga_commands(self._i2c_write_register_commands(i2c_address, memory_address, data, addressing_mode))
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        if read_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
+
+        commands = self._i2c_read_memory_commands(address, memory_address, byte_count, register_bits)
+        return [reply & self._status_data_mask for reply in self._execute_fpga_commands(commands)]
+
+    def _read_i2c_device_memory_into(self, address: int, memory_address: int, buffer: memoryview, register_bits: int = 16, read_type: str = 'Normal'):
+        if read_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
+
+        commands = self._i2c_read_memory_commands(address, memory_address, len(buffer), register_bits)
+        if self.pipelined:
+            #  There is one big endian reply word per byte read and the data is in its least
+            # significant byte, so the data is taken straight out of the received bytes
+            buffer[:] = self._execute_fpga_commands_pipelined_raw(commands)[3::4]
+        else:
+            replies = self._execute_fpga_commands(commands)
+            for idx in range(len(replies)):
+                buffer[idx] = replies[idx] & self._status_data_mask
+
+    def _i2c_read_memory_commands(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16) -> list[int]:
+        commands = []
+        for index in range(byte_count):
+            commands += self._i2c_read_register_commands(
+                i2c_address = address,
+                memory_address = memory_address + index,
+                addressing_mode = register_bits,
+            )
+        return commands
+
+    def _read_i2c_device_register(self, i2c_address: int, memory_address: int, addressing_mode: int = 16, read_type: str = 'Normal') -> int:
+        if read_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
+        return self._execute_fpga_commands(self._i2c_read_register_commands(i2c_address, memory_address, addressing_mode))[-1] & self._status_data_mask
+
+    def _i2c_check_device_commands(self, address: int) -> list[int]:
+        mode = 0
+        wr = 1
+        val = mode << 24 | address << 17 | wr << 16  # write device addr and read one byte, ignore read address
+
+        return [
+            self._fpga_config_write_command(4, 0xffff & val),
+            self._fpga_config_write_command(5, 0xffff & (val>>16)),
+            self._fpga_pulse_command(self._i2c_pulse_register),  # Send a pulse to IIC module
+            self._fpga_status_read_command(0),
+        ]
+
+    def _i2c_write_register_commands(self, i2c_address: int, memory_address: int, data: int, addressing_mode: int = 16) -> list[int]:
         wr = 0  # Operation is a write
         if addressing_mode == 8 :
             mode = 1  # Send an I2C message where 2 bytes are acted on
             val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | (0xff & data)
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            return [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
         elif addressing_mode == 16:
             memory_address_lsb = 0x00ff & memory_address
             memory_address_msb = 0xff00 & memory_address
             mode = 2  # Send an I2C message where 3 bytes are acted on
             val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address_lsb) << 8 | (0xff & data)
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            self._write_fpga_config_register(6, 0xffff & (0xff &(memory_address_msb >> 8)))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            return [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_config_write_command(6, 0xffff & (0xff &(memory_address_msb >> 8))),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
         else:
             self.send_message("Unknown adressing mode for writing an i2c device register", "Error")
-        return
+            return []
 
-    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
-        retVal = []
-        for index in range(byte_count):
-            retVal += [self._read_i2c_device_register(
-                i2c_address = address,
-                memory_address = memory_address + index,
-                addressing_mode = register_bits,
-                read_type = read_type,
-            )]
-        return retVal
-
-    def _read_i2c_device_register(self, i2c_address: int, memory_address: int, addressing_mode: int = 16, read_type: str = 'Normal') -> int:
-        if read_type != 'Normal':
-            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
+    def _i2c_read_register_commands(self, i2c_address: int, memory_address: int, addressing_mode: int = 16) -> list[int]:
+        commands = []
         if addressing_mode == 8 :
             mode = 0  # Send an I2C message where 1 byte is acted on
             wr = 0  # Operation is a write
             val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | 0x00
             #write 8 bit address first
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            commands += [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
 
             #read 8 bit data
             wr = 1  # Operation is a read
             val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | 0x00
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            commands += [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
         elif addressing_mode == 16:
             memory_address_lsb = 0x00ff & memory_address
             memory_address_msb = 0xff00 & memory_address
@@ -152,50 +295,289 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
             mode = 1  # Send an I2C message where 2 bytes are acted on
             wr = 0  # Operation is a write
             val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address_lsb) << 8 | (0xff & (memory_address_msb >> 8))
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            commands += [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
 
             #read 8 bit data
             mode = 0  # Send an I2C message where 1 byte is acted on
             wr = 1  # Operation is a read
             val = mode << 24 | (0x7f & i2c_address) << 17 | 1 << 16 | (0xff & memory_address_lsb) << 8 | 0x00
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            commands += [
+                self._fpga_config_write_command(4, 0xffff & val),
+                self._fpga_config_write_command(5, 0xffff & (val>>16)),
+                self._fpga_pulse_command(self._i2c_pulse_register),
+            ]
         else:
             self.send_message("Unknown adressing mode for reading an i2c device register", "Error")
-        return self._read_fpga_status_register(0) & 0x00ff
+        commands += [self._fpga_status_read_command(0)]
+        return commands
+
+    #  Each FPGA command is a single 32-bit word sent in network byte order. Commands with
+    # the most significant bit set are reads, for which the FPGA answers with a single word.
+    def _fpga_config_write_command(self, register_address: int, data: int) -> int:
+        return 0x00200000 + (register_address << 16) + data
+
+    def _fpga_config_read_command(self, register_address: int) -> int:
+        return 0x80200000 + (register_address << 16)
+
+    def _fpga_status_read_command(self, register_address: int) -> int:
+        return 0x80000000 + (register_address << 16)
+
+    def _fpga_pulse_command(self, register_address: int) -> int:
+        return 0x000b0000 + register_address
+
+    def _fpga_fifo_read_command(self, word_count: int) -> int:
+        if word_count < 1 or word_count > self._fifo_max_request_words:
+            raise RuntimeError("A data FIFO read must request between 1 and {} words, not {}".format(self._fifo_max_request_words, word_count))
+        return 0x00190000 + (word_count - 1)
+
+    def _is_fpga_read_command(self, command: int) -> bool:
+        return (command & 0x80000000) != 0
+
+    def _is_fpga_pulse_command(self, command: int) -> bool:
+        return (command & 0xffff0000) == 0x000b0000
+
+    def _check_not_streaming(self):
+        if self._streaming:
+            raise RuntimeError("No commands can be sent to the FPGA while its data FIFO is being streamed")
+
+    def _execute_fpga_commands(self, commands: list[int]) -> list[int]:
+        self._check_not_streaming()
+        if self.pipelined:
+            return self._execute_fpga_commands_pipelined(commands)
+
+        poll = self.completion_wait == "Poll"
+        i2c_pulse = self._fpga_pulse_command(self._i2c_pulse_register)
+
+        replies = []
+        for command in commands:
+            if command == i2c_pulse and poll:
+                self._send_fpga_command(command)
+                self._wait_i2c_completion()
+            elif self._is_fpga_pulse_command(command):
+                time.sleep(0.01)
+                self._send_fpga_command(command)
+                time.sleep(0.01)
+            elif self._is_fpga_read_command(command):
+                self._send_fpga_command(command)
+                replies += [struct.unpack('>I', self._recv_exact(4))[0]]
+            else:
+                self._send_fpga_command(command)
+        return replies
+
+    def _is_i2c_done(self, status: int) -> bool:
+        return (status & self._status_busy_mask) == 0 and (status & self._status_done_mask) != 0
+
+    def _wait_i2c_completion(self, start_time: float = None) -> int:
+        #  Poll the status register with an exponentially growing interval, so short transactions
+        # are caught quickly while long ones do not flood the FPGA with status requests. Returns
+        # the status register of the completed transaction
+        status_command = self._fpga_status_read_command(0)
+        interval = self.poll_initial_interval_us * 10**-6
+        max_interval = self.poll_max_interval_us * 10**-6
+
+        if start_time is None:
+            start_time = time.perf_counter()
+        deadline = start_time + self.poll_timeout_us * 10**-6
+        while True:
+            self._send_fpga_command(status_command)
+            status = struct.unpack('>I', self._recv_exact(4))[0]
+            if self._is_i2c_done(status):
+                break
+
+            now = time.perf_counter()
+            if now >= deadline:
+                raise I2C_Timeout_Error("Timed out after {} us waiting for the FPGA I2C transaction to complete".format(self.poll_timeout_us))
+            time.sleep(min(interval, deadline - now))
+            interval = min(interval * 2, max_interval)
+
+        self._last_i2c_transaction_time_us = (time.perf_counter() - start_time) * 10**6
+        self._logger.detailed_trace("FPGA I2C transaction completed in {:.1f} us".format(self._last_i2c_transaction_time_us))
+        return status
+
+    def _execute_fpga_commands_pipelined(self, commands: list[int]) -> list[int]:
+        reply_bytes = self._execute_fpga_commands_pipelined_raw(commands)
+        if len(reply_bytes) == 0:
+            return []
+        return list(struct.unpack('>{}I'.format(len(reply_bytes)//4), reply_bytes))
+
+    def _execute_fpga_commands_pipelined_raw(self, commands: list[int]) -> bytearray:
+        #  The I2C engine can only run one transaction at a time, so the commands are sent in
+        # buffers which end with an I2C pulse, each holding the config writes and the reads that
+        # do not touch the I2C engine. With polling, the first completion probe is sent in the same
+        # buffer and its reply is received together with the other replies, and the status read
+        # which follows a transaction is answered with the status which confirmed its completion.
+        # A transaction then costs a single round trip when it is done by the time the probe is
+        # processed, instead of a round trip for the probe plus one for the status read
+        if len(commands) == 0:
+            return bytearray()
+        self._check_not_streaming()
+
+        poll = self.completion_wait == "Poll"
+        i2c_pulse = self._fpga_pulse_command(self._i2c_pulse_register)
+        status_command = self._fpga_status_read_command(0)
+
+        segments = []
+        start = 0
+        for idx in range(len(commands)):
+            if commands[idx] == i2c_pulse:
+                segments += [commands[start:idx + 1]]
+                start = idx + 1
+        if start < len(commands):
+            segments += [commands[start:]]
+
+        reply_count = 0
+        for command in commands:
+            if self._is_fpga_read_command(command):
+                reply_count += 1
+        # One extra word is kept at the end for the reply to the completion probe
+        reply_bytes = bytearray(4 * (reply_count + 1))
+        view = memoryview(reply_bytes)
+
+        received = 0
+        completed_status = None
+        for segment in segments:
+            if completed_status is not None and segment[0] == status_command:
+                struct.pack_into('>I', reply_bytes, 4 * received, completed_status)
+                received += 1
+                segment = segment[1:]
+            completed_status = None
+
+            ends_transaction = len(segment) > 0 and segment[-1] == i2c_pulse
+            segment_replies = 0
+            for command in segment:
+                if self._is_fpga_read_command(command):
+                    segment_replies += 1
+            if ends_transaction and poll:
+                segment = segment + [status_command]
+
+            if len(segment) > 0:
+                self._socket.sendall(struct.pack('>{}I'.format(len(segment)), *segment))
+                start_time = time.perf_counter()
+
+            if ends_transaction and poll:
+                self._recv_exact_into(view[4 * received:4 * (received + segment_replies + 1)])
+                received += segment_replies
+                completed_status = struct.unpack_from('>I', reply_bytes, 4 * received)[0]
+                if self._is_i2c_done(completed_status):
+                    self._last_i2c_transaction_time_us = (time.perf_counter() - start_time) * 10**6
+                else:
+                    completed_status = self._wait_i2c_completion(start_time)
+            else:
+                if segment_replies > 0:
+                    self._recv_exact_into(view[4 * received:4 * (received + segment_replies)])
+                    received += segment_replies
+                if ends_transaction:
+                    time.sleep(0.01)
+        return reply_bytes[:4 * reply_count]
+
+    def _send_fpga_command(self, command: int):
+        self._socket.sendall(struct.pack('>I', command))
+
+    def _recv_exact(self, size: int) -> bytearray:
+        buffer = bytearray(size)
+        self._recv_exact_into(memoryview(buffer))
+        return buffer
+
+    def _recv_exact_into(self, view: memoryview):
+        # The socket may return fewer bytes than asked for, so keep receiving until the view is full
+        size = len(view)
+        received = 0
+        while received < size:
+            count = self._socket.recv_into(view[received:], size - received)
+            if count == 0:
+                raise I2C_Link_Error("The connection to the FPGA was closed while waiting for a reply")
+            received += count
 
     def _read_fpga_config_register(self, register_address: int):
-        package_data = 0x80200000 + (register_address << 16)
-        self._socket.sendall(struct.pack('I', package_data)[::-1])
-        return struct.unpack('I', self._socket.recv(4)[::-1])[0]
+        return self._execute_fpga_commands([self._fpga_config_read_command(register_address)])[0]
 
     def _write_fpga_config_register(self, register_address: int, data: int):
-        package_data = 0x00200000 + (register_address << 16) + data
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
+        self._check_not_streaming()
+        self._send_fpga_command(self._fpga_config_write_command(register_address, data))
 
     def _read_fpga_status_register(self, register_address: int):
-        package_data = 0x80000000 + (register_address << 16)
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
-        return struct.unpack('I', self._socket.recv(4)[::-1])[0]
+        return self._execute_fpga_commands([self._fpga_status_read_command(register_address)])[0]
 
     def _pulse_fpga_register(self, register_address: int):
-        package_data = 0x000b0000 + register_address
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
+        self._check_not_streaming()
+        self._send_fpga_command(self._fpga_pulse_command(register_address))
 
     def _read_fpga_data_fifo(self, count: int):
-        package_data = 0x00190000 + (count -1)
-        self._socket.sendall(struct.pack('I', package_data)[::-1])
-        fifo_data = []
-        for i in range(count):
-            fifo_data += [struct.unpack('I', self._socket.recv(4)[::-1])[0]]
-        return fifo_data
+        self._check_not_streaming()
+        self._send_fpga_command(self._fpga_fifo_read_command(count))
+        return list(struct.unpack('>{}I'.format(count), self._recv_exact(4 * count)))
+
+    def _decode_fifo_words(self, buffer: bytearray):
+        #  The FPGA sends big endian words, they are converted in bulk into a new array so the
+        # receive buffer can be reused for the next frame
+        if numpy is not None:
+            return numpy.frombuffer(buffer, dtype='>u4').astype(numpy.uint32)
+
+        words = array('I')
+        words.frombytes(buffer)
+        if sys.byteorder != 'big':
+            words.byteswap()
+        return words
+
+    def stream_fpga_data_fifo(self, frame_words: int, frame_count: int = None, request_words: int = None):
+        #  Generator of frames of frame_words words read continuously from the data FIFO, as NumPy
+        # uint32 arrays, or array('I') if NumPy is not installed. Streams until frame_count frames
+        # were read or, if it is None, until the generator is closed. Read requests of
+        # request_words words are kept one frame ahead of the frame being received, so the FPGA
+        # always has a request to answer. No other commands can be sent while streaming
+        if not self.is_connected or self._no_connect:
+            raise RuntimeError("You must first connect to the FPGA before trying to read its data FIFO")
+        if frame_words < 1:
+            raise RuntimeError("A data FIFO frame must have at least one word")
+        if request_words is None:
+            request_words = min(frame_words, self._fifo_max_request_words)
+        self._check_not_streaming()
+
+        buffer = bytearray(4 * frame_words)
+        view = memoryview(buffer)
+
+        requested_words = 0
+        received_frames = 0
+        self._streaming = True
+        try:
+            while frame_count is None or received_frames < frame_count:
+                target_words = (received_frames + 2) * frame_words
+                if frame_count is not None:
+                    target_words = min(target_words, frame_count * frame_words)
+
+                commands = []
+                while requested_words < target_words:
+                    count = min(request_words, target_words - requested_words)
+                    commands += [self._fpga_fifo_read_command(count)]
+                    requested_words += count
+                if len(commands) > 0:
+                    self._socket.sendall(struct.pack('>{}I'.format(len(commands)), *commands))
+
+                self._recv_exact_into(view)
+                received_frames += 1
+                yield self._decode_fifo_words(buffer)
+        except GeneratorExit:
+            # Receive and drop the words still in flight, so the replies to later commands are not mixed up with them
+            pending_words = requested_words - received_frames * frame_words
+            while pending_words > 0:
+                count = min(pending_words, frame_words)
+                self._recv_exact_into(view[:4 * count])
+                pending_words -= count
+            raise
+        finally:
+            self._streaming = False
+
+    def _reopen_link(self):
+        # Any replies still in flight are dropped together with the old socket
+        self._socket.close()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.connect((self.hostname, self.port))
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return True
 
     def display_in_frame(self, frame: ttk.Frame):
         if hasattr(self, '_frame') and self._frame is not None:
@@ -221,6 +603,15 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
 
         self._frame.columnconfigure(5, weight=1)
 
+        self._pipelined_check = ttk.Checkbutton(self._frame, variable=self._pipelined_var, text="Pipelined")
+        self._pipelined_check.grid(column=6, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._completion_wait_label = ttk.Label(self._frame, text="Completion:")
+        self._completion_wait_label.grid(column=7, row=0, sticky=(tk.W, tk.E))
+
+        self._completion_wait_option = ttk.OptionMenu(self._frame, self._completion_wait_var, self.completion_wait, *self._completion_wait_types)
+        self._completion_wait_option.grid(column=8, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
     def validate_connection_params(self):
         if not validate_hostname(self.hostname):
             self.send_message("Please enter a valid hostname", "Error")
@@ -243,6 +634,8 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
         if not no_connect:  # For emulated connection
             try:
                 self._socket.connect((self.hostname, self.port))
+                # The commands are small, so do not let them be held back waiting to be coalesced
+                self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             except socket.error:
                 self.send_message("Unable to connect to {} on port {}".format(self.hostname, self.port))
                 return False
@@ -251,6 +644,10 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
             self._hostname_entry.config(state="disabled")
         if hasattr(self, "_port_entry"):
             self._port_entry.config(state="disabled")
+        if hasattr(self, "_pipelined_check"):
+            self._pipelined_check.config(state="disabled")
+        if hasattr(self, "_completion_wait_option"):
+            self._completion_wait_option.config(state="disabled")
         self.send_message("Connected to {} on port {}".format(self.hostname, self.port))
         return True
 
@@ -264,4 +661,8 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
             self._hostname_entry.config(state="normal")
         if hasattr(self, "_port_entry"):
             self._port_entry.config(state="normal")
+        if hasattr(self, "_pipelined_check"):
+            self._pipelined_check.config(state="normal")
+        if hasattr(self, "_completion_wait_option"):
+            self._completion_wait_option.config(state="normal")
         self.send_message("Disconnected from {} on port {}".format(self.hostname, self.port))
\ No newline at end of file
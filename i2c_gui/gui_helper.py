@@ -31,6 +31,20 @@ class GUI_Helper:
         self._frame = frame
         self._logger = logger
 
+    @property
+    def is_headless(self):
+        if self._parent is None or not hasattr(self._parent, "is_headless"):
+            return False
+        return self._parent.is_headless
+
+    def _new_variable(self, variable_type: type[tk.Variable], value = None, name: str = None):
+        #  Headless stacks, such as the ones built by scripts, use plain Python variables instead
+        # of Tk variables, so no Tcl interpreter is needed
+        if self.is_headless:
+            from .headless_variable import headless_variable_types
+            variable_type = headless_variable_types[variable_type]
+        return variable_type(value=value, name=name)
+
     @property
     def is_connected(self):
         if self._parent is None:
@@ -0,0 +1,103 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import tkinter as tk
+
+class Headless_Variable:
+    #  Drop-in replacement for the Tk variables used by scripts, it supports the subset of the
+    # tk.Variable interface used by the library (get, set and the write traces) without needing a
+    # Tcl interpreter, so scripts can run on machines without a display
+    _default = ""
+
+    def __init__(self, master = None, value = None, name: str = None):
+        self._name = name
+        self._callbacks = {}
+        self._next_callback_id = 0
+        if value is None:
+            value = self._default
+        self._value = value
+
+    def __str__(self):
+        if self._name is None:
+            return "Headless_Variable_{}".format(id(self))
+        return self._name
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        for mode, callback in list(self._callbacks.values()):
+            if mode == 'write':
+                callback(str(self), '', 'write')
+
+    def trace_add(self, mode, callback):
+        # Only write traces are ever triggered, the library does not use the other trace modes
+        cbname = "headless_trace_{}".format(self._next_callback_id)
+        self._next_callback_id += 1
+        self._callbacks[cbname] = (mode, callback)
+        return cbname
+
+    def trace_remove(self, mode, cbname):
+        if cbname in self._callbacks:
+            del self._callbacks[cbname]
+
+    def trace_info(self):
+        return [((self._callbacks[cbname][0],), cbname) for cbname in self._callbacks]
+
+class Headless_StringVar(Headless_Variable):
+    _default = ""
+
+    def get(self):
+        return str(self._value)
+
+class Headless_IntVar(Headless_Variable):
+    _default = 0
+
+    def get(self):
+        return int(self._value)
+
+class Headless_DoubleVar(Headless_Variable):
+    _default = 0.0
+
+    def get(self):
+        return float(self._value)
+
+class Headless_BooleanVar(Headless_Variable):
+    _default = False
+
+    def get(self):
+        value = self._value
+        if isinstance(value, str):
+            return value.lower() in ["1", "true", "yes", "on"]
+        return bool(value)
+
+# The headless variable which replaces each of the Tk variable types
+headless_variable_types = {
+    tk.StringVar: Headless_StringVar,
+    tk.IntVar: Headless_IntVar,
+    tk.DoubleVar: Headless_DoubleVar,
+    tk.BooleanVar: Headless_BooleanVar,
+    tk.Variable: Headless_Variable,
+}
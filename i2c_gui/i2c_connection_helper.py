@@ -25,30 +25,82 @@ from __future__ import annotations
 from .gui_helper import GUI_Helper
 from .base_gui import Base_GUI
 from .i2c_messages import I2CMessages
+from .i2c_pacer import I2C_Pacer
+from .i2c_transaction_trace import I2C_Transaction_Trace
+from .i2c_metrics import I2C_Metrics
+from .i2c_retry_policy import Retry_Policy
+from .i2c_retry_policy import I2C_Link_Error
+from .i2c_retry_policy import I2C_Short_Read_Error
+from .i2c_retry_policy import I2C_Range_Outcome
+from .i2c_retry_policy import I2C_Partial_Transfer_Error
 
 from math import ceil
 
 import tkinter as tk
 import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
 import logging
+import threading
 import time
 
 class I2C_Connection_Helper(GUI_Helper):
+    _default_seq_byte = 8
+    _transfer_size_keys = [
+        ('read', 8, 'Normal'),
+        ('read', 16, 'Normal'),
+        ('read', 8, 'Repeated Start'),
+        ('read', 16, 'Repeated Start'),
+        ('write', 8, 'Normal'),
+        ('write', 16, 'Normal'),
+    ]
+
     _parent: Base_GUI
     def __init__(
         self,
         parent: Base_GUI,
-        max_seq_byte: int,
+        max_seq_byte: int | str,
         swap_endian: bool,
         successive_i2c_delay_us : int = 10000,
         ):
         super().__init__(parent, None, parent._logger)
+        #  max_seq_byte can be a fixed number of bytes per transfer, None to never split transfers
+        # or "Auto" to use the transfer sizes negotiated with the backend at connect, lowered to the
+        # calibrated sizes where a calibration found the backend limits to be unreliable
         self._max_seq_byte = max_seq_byte
         self._swap_endian = swap_endian
 
+        #  Negotiated transfer sizes, indexed by (operation, register_bits, access_type) where
+        # operation is either 'read' or 'write' and access_type is the read or write type
+        self._transfer_sizes: dict[tuple[str, int, str], int] = {}
+
+        # Transfer sizes found with calibrate_transfer_size, with the same indexes
+        self._calibrated_sizes: dict[tuple[str, int, str], int] = {}
+
         self._no_connect = None
 
-        self.successive_i2c_delay_us = successive_i2c_delay_us
+        #  All transactions go through the pacer, the Connection_Controller replaces it with its
+        # own so that every entry point shares the same one
+        self._pacer = I2C_Pacer(successive_i2c_delay_us)
+
+        # Every transfer is recorded in the transaction trace, which is also shared through the Connection_Controller
+        self._trace = I2C_Transaction_Trace()
+        self._metrics = I2C_Metrics()
+        self._backend_name = type(self).__name__
+
+        #  Time spent in the pacing, recovery and backend layers, the chunking layer of a block
+        # transfer is whatever is left once this time is taken out
+        self._accounted_us = 0
+
+        # Number of attempts made by the last chunk which failed, for the outcomes of block transfers
+        self._failed_chunk_attempts = 0
+
+        #  When the link to the adapter is lost, it is reopened up to reconnect_attempts times,
+        # doubling the wait between attempts, and the interrupted chunk is then retried
+        self._reconnect_attempts = 0
+        self._reconnect_backoff_s = 0.1
+        self._reconnect_max_backoff_s = 5
+
+        # Failed chunks of block transfers are retried according to the retry policy
+        self._retry_policy = Retry_Policy()
 
     def _check_i2c_device(self, address: int):
         raise RuntimeError("Derived classes must implement the individual device access functions: _check_i2c_device")
@@ -59,9 +111,45 @@ class I2C_Connection_Helper(GUI_Helper):
     def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
         raise RuntimeError("Derived classes must implement the individual device access functions: _read_i2c_device_memory")
 
+    def _read_i2c_device_memory_into(self, address: int, memory_address: int, buffer: memoryview, register_bits: int = 16, read_type: str = 'Normal'):
+        #  Derived classes which can receive straight into a writable buffer should override this,
+        # by default the bytes returned by _read_i2c_device_memory are copied into the buffer
+        data = self._read_i2c_device_memory(address, memory_address, len(buffer), register_bits, read_type)
+        if len(data) != len(buffer):
+            raise I2C_Short_Read_Error("Expected to read {} bytes from the I2C device with address 0x{:02x}, but received {}".format(len(buffer), address, len(data)))
+        buffer[:] = bytes(data)
+
     def _direct_i2c(self, commands: list[int]) -> list[int]:
         raise RuntimeError("Derived classes must implement the individual device access functions: _direct_i2c")
 
+    def _scan_i2c_devices(self, addresses: list[int]) -> list[int]:
+        #  Derived classes should override this if the backend can probe several addresses in a
+        # single transfer, by default the addresses are probed back to back
+        return [address for address in addresses if self._check_i2c_device(address)]
+
+    def _is_link_error(self, error: Exception):
+        #  Derived classes should override this if their backend reports bus errors, such as a
+        # missing ACK, with exceptions which would otherwise look like a lost link
+        if isinstance(error, TimeoutError):
+            return False
+        return isinstance(error, (OSError, I2C_Link_Error))
+
+    def _classify_error(self, error: Exception):
+        #  Derived classes should override this to map the exceptions of their backend to the
+        # kinds of error known by the Retry_Policy
+        return self._retry_policy.classify(error)
+
+    def _reopen_link(self):
+        #  Derived classes must override this to reopen the link to the adapter, returning True on
+        # success. It is called from the I/O worker thread, so it must not touch the GUI, which rules
+        # out going through disconnect and connect. By default the link can not be reopened
+        return False
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        #  Derived classes should return the largest number of bytes the backend can handle in a
+        # single transfer for the given operation and addressing mode, or None if there is no limit
+        return self._default_seq_byte
+
     def display_in_frame(self, frame: ttk.Frame):
         raise RuntimeError("Derived classes must implement the display function")
 
@@ -74,18 +162,216 @@ class I2C_Connection_Helper(GUI_Helper):
     def disconnect(self):
         raise RuntimeError("Derived classes must implement the disconnect method")
 
-    def check_i2c_device(self, address: int):
-        self._parent.send_i2c_logging_message("Trying to find the I2C device with address 0x{:02x}".format(address))
+    @property
+    def connection_id(self):
+        #  Identifies the physical connection so that negotiated transfer sizes can be reused,
+        # derived classes should return something like the port or the hostname
+        return None
+
+    @property
+    def pacer(self):
+        return self._pacer
+
+    @pacer.setter
+    def pacer(self, value: I2C_Pacer):
+        self._pacer = value
+
+    @property
+    def trace(self):
+        return self._trace
+
+    @trace.setter
+    def trace(self, value: I2C_Transaction_Trace):
+        self._trace = value
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: I2C_Metrics):
+        self._metrics = value
+
+    @property
+    def backend_name(self):
+        # Name the metrics of this connection are reported under
+        return self._backend_name
+
+    @backend_name.setter
+    def backend_name(self, value: str):
+        self._backend_name = value
+
+    @property
+    def reconnect_attempts(self):
+        return self._reconnect_attempts
+
+    @reconnect_attempts.setter
+    def reconnect_attempts(self, value: int):
+        self._reconnect_attempts = value
+
+    @property
+    def reconnect_backoff_s(self):
+        return self._reconnect_backoff_s
+
+    @reconnect_backoff_s.setter
+    def reconnect_backoff_s(self, value: float):
+        self._reconnect_backoff_s = value
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: Retry_Policy):
+        self._retry_policy = value
+
+    @property
+    def successive_i2c_delay_us(self):
+        return self._pacer.default_gap_us
+
+    @successive_i2c_delay_us.setter
+    def successive_i2c_delay_us(self, value: int):
+        self._pacer.default_gap_us = value
+
+    @property
+    def max_seq_byte(self):
+        return self._max_seq_byte
+
+    @max_seq_byte.setter
+    def max_seq_byte(self, value: int | str):
+        if value is not None and value != "Auto" and (not isinstance(value, int) or value < 1):
+            raise RuntimeError("Invalid max_seq_byte: {}".format(value))
+        self._max_seq_byte = value
+
+    @property
+    def transfer_sizes(self):
+        return dict(self._transfer_sizes)
+
+    @transfer_sizes.setter
+    def transfer_sizes(self, value: dict[tuple[str, int, str], int]):
+        self._transfer_sizes = dict(value)
+
+    @property
+    def calibrated_sizes(self):
+        return dict(self._calibrated_sizes)
+
+    @calibrated_sizes.setter
+    def calibrated_sizes(self, value: dict[tuple[str, int, str], int]):
+        self._calibrated_sizes = dict(value)
+
+    def negotiate_transfer_sizes(self, calibrated_sizes: dict[tuple[str, int, str], int] = None):
+        #  Fill the transfer sizes with the capabilities of the backend, calibrated_sizes are the
+        # sizes previously found for this connection with calibrate_transfer_size
+        for key in self._transfer_size_keys:
+            size = self._max_transfer_size(*key)
+            if size is None:
+                size = 0  # 0 means the transfer does not need to be split
+            self._transfer_sizes[key] = size
+
+        if calibrated_sizes is not None:
+            self._calibrated_sizes = dict(calibrated_sizes)
+
+        self._logger.info("Negotiated I2C transfer sizes: {}".format(self._transfer_sizes))
+        return self.transfer_sizes
+
+    def calibrate_transfer_size(self, device_address: int, memory_address: int = 0, register_bits: int = 16, read_type: str = 'Normal'):
+        #  Find the largest read size which gives the same data as reading the same registers one
+        # byte at a time. Only reads are used, so the device configuration is never changed
+        if not self.is_connected or self._no_connect:
+            raise RuntimeError("You must first connect to a device before trying to calibrate the transfer size")
+
+        key = ('read', register_bits, read_type)
+        max_size = self._max_transfer_size(*key)
+        if max_size is None or max_size == 0:
+            max_size = 256
+
+        if self._swap_endian and register_bits == 16:
+            swapped = self.swap_endian_16bit
+        else:
+            swapped = lambda address: address
+
+        reference = []
+        for i in range(max_size):
+            self._pacer.wait(device_address)
+            reference += list(self._read_i2c_device_memory(device_address, swapped(memory_address + i), 1, register_bits, read_type))
+
+        best_size = 1
+        size = max_size
+        while size > 1:
+            try:
+                self._pacer.wait(device_address)
+                data = list(self._read_i2c_device_memory(device_address, swapped(memory_address), size, register_bits, read_type))
+            except Exception as e:
+                self._logger.debug("Transfer size calibration failed for {} bytes: {}".format(size, e))
+                data = None
+            if data == reference[:size]:
+                best_size = size
+                break
+            size = size // 2
+
+        self._calibrated_sizes[key] = best_size
+        self.send_message("Calibrated {} byte reads with {} bit register addresses".format(best_size, register_bits))
+        return best_size
+
+    def _seq_byte(self, operation: str, register_bits: int, access_type: str, register_bytes: int):
+        if self._max_seq_byte != "Auto":
+            return self._max_seq_byte
+
+        key = (operation, register_bits, access_type)
+        size = self._transfer_sizes.get(key, None)
+        if size is None:
+            size = self._max_transfer_size(*key)
+            if size is None:
+                size = 0
+
+        calibrated_size = self._calibrated_sizes.get(key, None)
+        if calibrated_size is not None:
+            if size == 0:
+                size = calibrated_size
+            else:
+                size = min(size, calibrated_size)
+        if size == 0:
+            return None
+
+        # Never split a register across transfers
+        size = max(register_bytes, size - size % register_bytes)
+        return size
 
+    def check_i2c_device(self, address: int):
         if not self.is_connected or self._no_connect:
-            self._parent.send_i2c_logging_message("   The USB-ISS module is not connected or you are using software emulated mode.\n")
+            self._trace.record('Check', address, status="Not connected")
             return False
 
-        if not self._check_i2c_device(address):
-            self._parent.send_i2c_logging_message("   The I2C device can not be found.\n")
-            return False
-        self._parent.send_i2c_logging_message("   The I2C device was found.\n")
-        return True
+        slept_us = self._pacer.wait(address)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                found = self._check_i2c_device(address)
+                break
+            except Exception as error:
+                duration_us = (time.perf_counter() - start_time) * 10**6
+                self._trace.record('Check', address, status="Error: {}".format(error), duration_us=duration_us)
+                if not self._recover_link(error, address, 'check'):
+                    raise
+        duration_us = (time.perf_counter() - start_time) * 10**6
+        self._trace.record('Check', address, status="OK" if found else "Not found", duration_us=duration_us)
+        self._metrics.add_transfer(self._backend_name, address, 'check', 0, duration_us, slept_us)
+        return found
+
+    def scan_i2c_devices(self, addresses: list[int]) -> list[int]:
+        #  Probe all the addresses as a single operation, without pacing or logging each probe,
+        # and return the addresses which acknowledged
+        if not self.is_connected or self._no_connect:
+            self._trace.record('Scan', None, length=len(addresses), status="Not connected")
+            return []
+
+        slept_us = self._pacer.wait()
+        start_time = time.perf_counter()
+        found = self._scan_i2c_devices(list(addresses))
+        duration_us = (time.perf_counter() - start_time) * 10**6
+        self._trace.record('Scan', None, length=len(addresses), payload=found, duration_us=duration_us)
+        self._metrics.add_transfer(self._backend_name, None, 'scan', 0, duration_us, slept_us)
+        return found
 
     def swap_endian_16bit(self, address: int):
         from .functions import hex_0fill
@@ -94,7 +380,181 @@ class I2C_Connection_Helper(GUI_Helper):
         high_byte = tmp[-4:-2]
         return int("0x" + low_byte + high_byte, 16)
 
-    def read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal'):
+    def _recover_link(self, error: Exception, device_address: int, operation: str):
+        #  Called when a transfer fails, returns True once the link has been reopened so that the
+        # caller can retry the transfer which failed, or False if the error is not a lost link.
+        # The controller stays connected throughout, so the shadow memories of the address
+        # spaces are kept as they are
+        if self._reconnect_attempts <= 0 or self._no_connect or not self._is_link_error(error):
+            return False
+
+        self._logger.warning("Lost the link to the I2C adapter ({}), reconnecting".format(error))
+        backoff_s = self._reconnect_backoff_s
+        for attempt in range(self._reconnect_attempts):
+            start_time = time.perf_counter()
+            time.sleep(backoff_s)
+            try:
+                reopened = self._reopen_link()
+            except Exception as reopen_error:
+                self._logger.debug("Reconnect attempt {} failed: {}".format(attempt + 1, reopen_error))
+                reopened = False
+            self._add_recovery_time((time.perf_counter() - start_time) * 10**6)
+            if reopened:
+                self._trace.record('Reconnect', device_address, status="OK after {} attempts".format(attempt + 1))
+                self._metrics.add_retry(self._backend_name, device_address, operation)
+                self._logger.warning("Reconnected to the I2C adapter after {} attempts".format(attempt + 1))
+                return True
+            backoff_s = min(2 * backoff_s, self._reconnect_max_backoff_s)
+
+        self._trace.record('Reconnect', device_address, status="Failed after {} attempts".format(self._reconnect_attempts))
+        raise I2C_Link_Error("Unable to reconnect to the I2C adapter after {} attempts: {}".format(self._reconnect_attempts, error)) from error
+
+    def _should_retry(self, error: Exception, device_address: int, operation: str, attempt: int):
+        # Returns True if the transfer which failed should be attempted again, after waiting as required
+        if self._recover_link(error, device_address, operation):
+            return True
+
+        if not self._retry_policy.should_retry(self._classify_error(error), attempt):
+            return False
+
+        start_time = time.perf_counter()
+        time.sleep(self._retry_policy.backoff(attempt))
+        self._add_recovery_time((time.perf_counter() - start_time) * 10**6)
+        self._metrics.add_retry(self._backend_name, device_address, operation)
+        return True
+
+    def _add_recovery_time(self, duration_us: float):
+        self._accounted_us += duration_us
+        self._metrics.add_layer_time('recovery', duration_us)
+
+    def _read_chunk(self, device_address: int, memory_address: int, buffer: memoryview, register_bits: int, read_type: str):
+        #  Returns the number of attempts the chunk took, if the last attempt also fails its error
+        # is raised
+        register_address = memory_address
+        if self._swap_endian and register_bits == 16:
+            register_address = self.swap_endian_16bit(memory_address)
+
+        slept_us = self._pacer.wait(device_address)
+        self._accounted_us += slept_us
+        attempt = 1
+        while True:
+            start_time = time.perf_counter()
+            try:
+                self._read_i2c_device_memory_into(device_address, register_address, buffer, register_bits, read_type)
+                break
+            except Exception as error:
+                duration_us = (time.perf_counter() - start_time) * 10**6
+                self._accounted_us += duration_us
+                self._trace.record('Read', device_address, memory_address, len(buffer), status="Error: {}".format(error), duration_us=duration_us)
+                self._metrics.add_transfer(self._backend_name, device_address, 'read', len(buffer), duration_us, slept_us, ok=False)
+                if not self._should_retry(error, device_address, 'read', attempt):
+                    self._failed_chunk_attempts = attempt
+                    raise
+                attempt += 1
+                slept_us = 0
+        duration_us = (time.perf_counter() - start_time) * 10**6
+        self._accounted_us += duration_us
+        self._trace.record('Read', device_address, memory_address, len(buffer), buffer, duration_us=duration_us)
+        self._metrics.add_transfer(self._backend_name, device_address, 'read', len(buffer), duration_us, slept_us)
+        return attempt
+
+    def _write_chunk(self, device_address: int, memory_address: int, data: list[int], register_bits: int, write_type: str):
+        register_address = memory_address
+        if self._swap_endian and register_bits == 16:
+            register_address = self.swap_endian_16bit(memory_address)
+
+        slept_us = self._pacer.wait(device_address)
+        self._accounted_us += slept_us
+        attempt = 1
+        while True:
+            start_time = time.perf_counter()
+            try:
+                self._write_i2c_device_memory(device_address, register_address, data, register_bits, write_type)
+                break
+            except Exception as error:
+                duration_us = (time.perf_counter() - start_time) * 10**6
+                self._accounted_us += duration_us
+                self._trace.record('Write', device_address, memory_address, len(data), data, status="Error: {}".format(error), duration_us=duration_us)
+                self._metrics.add_transfer(self._backend_name, device_address, 'write', len(data), duration_us, slept_us, ok=False)
+                if not self._should_retry(error, device_address, 'write', attempt):
+                    self._failed_chunk_attempts = attempt
+                    raise
+                attempt += 1
+                slept_us = 0
+        duration_us = (time.perf_counter() - start_time) * 10**6
+        self._accounted_us += duration_us
+        self._trace.record('Write', device_address, memory_address, len(data), data, duration_us=duration_us)
+        self._metrics.add_transfer(self._backend_name, device_address, 'write', len(data), duration_us, slept_us)
+        return attempt
+
+    def _transfer_chunks(self, operation: str, device_address: int, memory_address: int, byte_count: int, max_seq_byte: int, register_bytes: int, transfer_chunk, data: bytearray = None):
+        #  Runs transfer_chunk(memory_address, byte_offset, length) for every chunk of a block
+        # transfer, which returns the number of attempts it took, or sets _failed_chunk_attempts
+        # before raising the error of its last attempt. A chunk which fails after all its
+        # retries is recorded and the remaining chunks are still transferred, so the parts which
+        # succeeded are kept, and an I2C_Partial_Transfer_Error with the outcome of every chunk is
+        # raised at the end. Errors which are not known I2C bus errors stop the transfer at once
+        if max_seq_byte is None:
+            max_seq_byte = max(byte_count, 1)
+        seq_calls = ceil(byte_count/max_seq_byte)
+
+        outcomes = []
+        failed_chunks = 0
+        consecutive_failures = 0
+
+        #  The progress display and the Tk event loop can only be used from the main thread,
+        # transfers running on the I/O worker thread of the controller skip them
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        lastUpdateTime = time.time_ns()
+        for i in range(seq_calls):
+            thisTime = time.time_ns()
+            if on_main_thread and thisTime - lastUpdateTime > 0.2 * 10**9:
+                self.display_progress("{}:".format("Reading" if operation == 'read' else "Writing"), i*100./seq_calls)
+                #self._frame.update_idletasks()
+                if self._frame is not None:
+                    self._frame.update()
+
+            this_block_address = int(memory_address + i*max_seq_byte/register_bytes)
+            byte_offset = i*max_seq_byte
+            length = min(max_seq_byte, byte_count - byte_offset)
+            self._failed_chunk_attempts = 1
+            try:
+                attempts = transfer_chunk(this_block_address, byte_offset, length)
+            except Exception as error:
+                if self._classify_error(error) in [None, 'link']:
+                    raise
+                outcomes += [I2C_Range_Outcome(this_block_address, byte_offset, length, self._failed_chunk_attempts, error)]
+                failed_chunks += 1
+                consecutive_failures += 1
+                if consecutive_failures >= self._retry_policy.max_failed_chunks:
+                    if byte_offset + length < byte_count:
+                        next_address = int(memory_address + (i + 1)*max_seq_byte/register_bytes)
+                        outcomes += [I2C_Range_Outcome(next_address, byte_offset + length, byte_count - byte_offset - length, 0, RuntimeError("Not attempted"))]
+                    break
+                continue
+            consecutive_failures = 0
+            outcomes += [I2C_Range_Outcome(this_block_address, byte_offset, length, attempts)]
+
+        if on_main_thread and seq_calls > 1:
+            self.clear_progress()
+
+        if failed_chunks > 0:
+            raise I2C_Partial_Transfer_Error(
+                "Failed to {} {} of {} bytes of the I2C device with address 0x{:02x}, starting at address 0x{:04x}".format(
+                    operation,
+                    sum([outcome.length for outcome in outcomes if outcome.error is not None]),
+                    byte_count,
+                    device_address,
+                    memory_address,
+                ),
+                outcomes,
+                data,
+            )
+
+    def read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> list[int]:
+        return list(self._read_device_memory_bytes(device_address, memory_address, byte_count, register_bits, register_length, read_type))
+
+    def _read_device_memory_bytes(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> bytearray:
         if not self.is_connected:
             raise RuntimeError("You must first connect to a device before trying to read registers from it")
 
@@ -102,58 +562,33 @@ class I2C_Connection_Helper(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
+        start_time = time.perf_counter()
         register_bytes = ceil(register_length/8)
+        max_seq_byte = self._seq_byte('read', register_bits, read_type, register_bytes)
 
-        #reg_chars = ceil(register_length/4)
-        addr_chars = ceil(register_bits/4)
-
-        if byte_count <= register_bytes:
-            self._parent.send_i2c_logging_message((f"Trying to read the register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(memory_address, device_address))
-        else:
-            self._parent.send_i2c_logging_message((f"Trying to read a register block with size {{}} starting at register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(byte_count, memory_address, device_address))
-
-        data = []
+        #  The full read is received into a single preallocated buffer, every chunk is filled in
+        # place through a view of its slice so no intermediate lists are built and concatenated
+        data = bytearray(byte_count)
         if self._no_connect:
             if byte_count == 1:
-                data = [42]
+                data[0] = 42
             else:
-                data = [i for i in range(byte_count)]
-            self._parent.send_i2c_logging_message("   Software emulation (no connect) is enabled, so returning dummy values.\n   {}\n".format(repr(data)))
-
-        elif self._max_seq_byte is None:
-            if self._swap_endian and register_bits == 16:
-                memory_address = self.swap_endian_16bit(memory_address)
-            data = self._read_i2c_device_memory(device_address, memory_address, byte_count, register_bits, read_type)
-            self._parent.send_i2c_logging_message("   {}\n".format(repr(data)))
+                data[:] = bytes(i & 0xff for i in range(byte_count))
+            self._trace.record('Read', device_address, memory_address, byte_count, data, status="Emulated")
         else:
-            from time import sleep
-            data = []
-            seq_calls = ceil(byte_count/self._max_seq_byte)
-            self._parent.send_i2c_logging_message("   Breaking the read into {} individual reads of {} bytes:".format(seq_calls, self._max_seq_byte))
-
-            lastUpdateTime = time.time_ns()
-            for i in range(seq_calls):
-                thisTime = time.time_ns()
-                if thisTime - lastUpdateTime > 0.2 * 10**9:
-                    self.display_progress("Reading:", i*100./seq_calls)
-                    #self._frame.update_idletasks()
-                    if self._frame is not None:
-                        self._frame.update()
-
-                this_block_address = int(memory_address + i*self._max_seq_byte/register_bytes)
-                bytes_to_read = min(self._max_seq_byte, byte_count - i*self._max_seq_byte)
-                self._parent.send_i2c_logging_message("      Read operation {}: reading {} bytes starting from 0x{:04x}".format(i, bytes_to_read, this_block_address))
-
-                if self._swap_endian and register_bits == 16:
-                    this_block_address = self.swap_endian_16bit(this_block_address)
-                this_data = self._read_i2c_device_memory(device_address, this_block_address, bytes_to_read, register_bits, read_type)
-                self._parent.send_i2c_logging_message("         {}".format(repr(this_data)))
-
-                data += this_data
-                sleep(self.successive_i2c_delay_us*10**-6)
-
-            self.clear_progress()
-            self._parent.send_i2c_logging_message("   Full data:\n      {}\n".format(repr(data)))
+            view = memoryview(data)
+            accounted_start_us = self._accounted_us
+            self._transfer_chunks(
+                'read',
+                device_address,
+                memory_address,
+                byte_count,
+                max_seq_byte,
+                register_bytes,
+                lambda address, offset, length: self._read_chunk(device_address, address, view[offset:offset + length], register_bits, read_type),
+                data,
+            )
+            self._metrics.add_layer_time('chunking', (time.perf_counter() - start_time) * 10**6 - (self._accounted_us - accounted_start_us))
         return data
 
     def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
@@ -164,51 +599,24 @@ class I2C_Connection_Helper(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
+        start_time = time.perf_counter()
         register_bytes = ceil(register_length/8)
         byte_count = len(data)
 
-        reg_chars = ceil(register_length/4)
-        addr_chars = ceil(register_bits/4)
-
-        if byte_count <= register_bytes:
-            self._parent.send_i2c_logging_message((f"Trying to write the value 0x{{:0{reg_chars}x}} to the register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(data[0], memory_address, device_address))
-        else:
-            self._parent.send_i2c_logging_message((f"Trying to write a register block with size {{}} starting at register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:\n   Writing the value array: {{}}").format(byte_count, memory_address, device_address, repr(data)))
-
         if self._no_connect:
-            self._parent.send_i2c_logging_message("   Software emulation (no connect) is enabled, so no write action is taken.\n")
+            self._trace.record('Write', device_address, memory_address, byte_count, data, status="Emulated")
             return
 
-        if self._max_seq_byte is None:
-            self._parent.send_i2c_logging_message("   Writing the full block at once\n")
-            if self._swap_endian and register_bits == 16:
-                memory_address = self.swap_endian_16bit(memory_address)
-            self._write_i2c_device_memory(device_address, memory_address, data, register_bits, write_type)
-        else:
-            from time import sleep
-            seq_calls = ceil(byte_count/self._max_seq_byte)
-            self._parent.send_i2c_logging_message("   Breaking the write into {} individual writes of {} bytes:".format(seq_calls, self._max_seq_byte))
-
-            lastUpdateTime = time.time_ns()
-            for i in range(seq_calls):
-                thisTime = time.time_ns()
-                if thisTime - lastUpdateTime > 0.2 * 10**9:
-                    self.display_progress("Writing:", i*100./seq_calls)
-                    #self._frame.update_idletasks()
-                    if self._frame is not None:
-                        self._frame.update()
-
-                this_block_address = int(memory_address + i*self._max_seq_byte/register_bytes)
-                bytes_to_write = min(self._max_seq_byte, byte_count - i*self._max_seq_byte)
-                self._parent.send_i2c_logging_message("      Write operation {}: writing {} bytes starting from 0x{:04x}".format(i, bytes_to_write, this_block_address))
-
-                this_data = data[i*self._max_seq_byte:i*self._max_seq_byte+bytes_to_write]
-                self._parent.send_i2c_logging_message("         {}".format(repr(this_data)))
-
-                if self._swap_endian and register_bits == 16:
-                    this_block_address = self.swap_endian_16bit(this_block_address)
-                self._write_i2c_device_memory(device_address, this_block_address, this_data, register_bits, write_type)
-
-                sleep(self.successive_i2c_delay_us*10**-6)
-            self._parent.send_i2c_logging_message("")
-            self.clear_progress()
\ No newline at end of file
+        max_seq_byte = self._seq_byte('write', register_bits, write_type, register_bytes)
+
+        accounted_start_us = self._accounted_us
+        self._transfer_chunks(
+            'write',
+            device_address,
+            memory_address,
+            byte_count,
+            max_seq_byte,
+            register_bytes,
+            lambda address, offset, length: self._write_chunk(device_address, address, data[offset:offset + length], register_bits, write_type),
+        )
+        self._metrics.add_layer_time('chunking', (time.perf_counter() - start_time) * 10**6 - (self._accounted_us - accounted_start_us))
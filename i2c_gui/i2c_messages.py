@@ -61,4 +61,167 @@ class I2CMessages(Enum):
     WRITE13 = 0x3c
     WRITE14 = 0x3d
     WRITE15 = 0x3e
-    WRITE16 = 0x3f
\ No newline at end of file
+    WRITE16 = 0x3f
+
+#  Precomputed tables for encoding direct I2C command sequences, indexed by message: the number
+# of operand bytes following the message and the number of bytes it reads from the bus
+_operand_bytes: dict[I2CMessages, int] = {}
+_read_bytes: dict[I2CMessages, int] = {}
+_read_messages: dict[int, I2CMessages] = {}
+_write_messages: dict[int, I2CMessages] = {}
+for _message in I2CMessages:
+    _operand_bytes[_message] = 0
+    _read_bytes[_message] = 0
+    if _message.name.startswith("READ"):
+        _read_bytes[_message] = int(_message.name[4:])
+        _read_messages[_read_bytes[_message]] = _message
+    elif _message.name.startswith("WRITE"):
+        _operand_bytes[_message] = int(_message.name[5:])
+        _write_messages[_operand_bytes[_message]] = _message
+del _message
+
+max_direct_run_bytes = 16  # Largest number of bytes a single READn or WRITEn message can handle
+
+def direct_read_commands(byte_count: int) -> list[I2CMessages]:
+    #  Messages to read byte_count bytes, split in runs of at most 16 bytes. The last byte is
+    # read after a NACK so the device releases the bus, as required at the end of an I2C read
+    if byte_count < 1:
+        raise RuntimeError("At least one byte must be read")
+
+    commands = []
+    remaining = byte_count - 1
+    while remaining > 0:
+        run = min(max_direct_run_bytes, remaining)
+        commands += [_read_messages[run]]
+        remaining -= run
+    commands += [I2CMessages.NACK, I2CMessages.READ1]
+    return commands
+
+def direct_write_commands(data: list[int]) -> list:
+    commands = []
+    for idx in range(0, len(data), max_direct_run_bytes):
+        run = data[idx:idx + max_direct_run_bytes]
+        commands += [_write_messages[len(run)]] + list(run)
+    return commands
+
+def _split_read_transaction(transaction: bytearray, read_start: int, max_payload_bytes: int = None, max_read_bytes: int = None) -> list[tuple[bytearray, int]]:
+    #  Split a transaction which ends with a run of reads, such as START, WRITE3, address,
+    # register, RESTART, WRITE1, address|1, READn..., NACK, READ1, STOP, into several transactions
+    # which fit within the limits. The first one keeps everything up to the reads, the following
+    # ones address the device for reading again and continue from where the previous one stopped,
+    # relying on the device incrementing its register pointer as for any multi byte read
+    reads = transaction[read_start:-1]
+    if (transaction[-1] != I2CMessages.STOP.value or read_start < 2 or
+            transaction[read_start - 2] != I2CMessages.WRITE1.value or (transaction[read_start - 1] & 0x01) == 0 or
+            any(command != I2CMessages.NACK.value and _read_bytes[I2CMessages(command)] == 0 for command in reads)):
+        return None
+
+    remaining = 0
+    for command in reads:
+        remaining += _read_bytes[I2CMessages(command)]
+
+    transactions = []
+    prefix = transaction[:read_start]
+    while remaining > 0:
+        count = remaining
+        if max_read_bytes is not None:
+            count = min(count, max_read_bytes)
+        piece = None
+        while count > 0:
+            piece = prefix + bytes(command.value for command in direct_read_commands(count)) + bytes([I2CMessages.STOP.value])
+            if max_payload_bytes is None or len(piece) <= max_payload_bytes:
+                break
+            count -= 1
+        if count == 0:
+            return None
+
+        transactions += [(piece, count)]
+        remaining -= count
+        prefix = bytearray([I2CMessages.START.value]) + transaction[read_start - 2:read_start]
+    return transactions
+
+def encode_direct_i2c(commands: list, max_payload_bytes: int = None, max_read_bytes: int = None) -> list[tuple[bytes, int]]:
+    #  Validate a sequence of I2CMessages (with the operand bytes following each WRITEn) and
+    # translate it into payloads of raw bytes, returned as (payload, number of bytes read) tuples.
+    # Long sequences are split across several direct transfers, but only right after a STOP, so
+    # the bus is idle between transfers and no state has to be kept by the adapter. A single
+    # transaction which does not fit within the limits is split into several transactions if it
+    # ends with a run of reads, otherwise it is rejected
+    payloads = []
+    current = bytearray()
+    current_reads = 0
+    transaction = bytearray()
+    transaction_reads = 0
+    read_start = None
+
+    idx = 0
+    command_count = len(commands)
+    while idx < command_count:
+        command = commands[idx]
+        operands = _operand_bytes.get(command, None) if isinstance(command, I2CMessages) else None
+        if operands is None:
+            raise RuntimeError("Unknown I2C command: {}".format(command))
+
+        end = idx + 1 + operands
+        if end > command_count:
+            raise RuntimeError("The I2C command {} is missing {} operand bytes".format(command.name, end - command_count))
+
+        if read_start is None and (command == I2CMessages.NACK or _read_bytes[command] > 0):
+            read_start = len(transaction)
+        transaction.append(command.value)
+        if operands > 0:
+            try:
+                transaction.extend(commands[idx + 1:end])
+            except (TypeError, ValueError):
+                raise RuntimeError("Invalid operand bytes for the I2C command {}: {}".format(command.name, commands[idx + 1:end]))
+        transaction_reads += _read_bytes[command]
+        idx = end
+
+        if command != I2CMessages.STOP and idx < command_count:
+            continue
+
+        transactions = [(transaction, transaction_reads)]
+        if (max_payload_bytes is not None and len(transaction) > max_payload_bytes) or (max_read_bytes is not None and transaction_reads > max_read_bytes):
+            transactions = None
+            if read_start is not None:
+                transactions = _split_read_transaction(transaction, read_start, max_payload_bytes, max_read_bytes)
+            if transactions is None:
+                raise RuntimeError("The I2C transaction of {} bytes reading {} bytes does not fit in a single direct transfer and does not end with reads which could be split, split it with a STOP".format(len(transaction), transaction_reads))
+
+        for piece, piece_reads in transactions:
+            if (max_payload_bytes is not None and len(current) + len(piece) > max_payload_bytes) or (max_read_bytes is not None and current_reads + piece_reads > max_read_bytes):
+                payloads += [(bytes(current), current_reads)]
+                current = bytearray()
+                current_reads = 0
+
+            current.extend(piece)
+            current_reads += piece_reads
+        transaction = bytearray()
+        transaction_reads = 0
+        read_start = None
+
+    if len(current) > 0:
+        payloads += [(bytes(current), current_reads)]
+
+    return payloads
+
+def decode_direct_i2c(payload: bytes) -> list:
+    #  Inverse of encode_direct_i2c, translate raw bytes back into I2CMessages with the operand
+    # bytes following each WRITEn
+    commands = []
+
+    idx = 0
+    while idx < len(payload):
+        try:
+            command = I2CMessages(payload[idx])
+        except ValueError:
+            raise RuntimeError("Unknown I2C command: 0x{:02x}".format(payload[idx]))
+
+        end = idx + 1 + _operand_bytes[command]
+        if end > len(payload):
+            raise RuntimeError("The I2C command {} is missing {} operand bytes".format(command.name, end - len(payload)))
+
+        commands += [command] + list(payload[idx + 1:end])
+        idx = end
+
+    return commands
@@ -0,0 +1,222 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from math import log2
+
+import threading
+
+class Latency_Histogram:
+    #  Histogram with logarithmic buckets, there are buckets_per_octave buckets for every factor
+    # of two starting at 1 us. Adding a value is a single increment, so it is cheap enough to
+    # stay enabled all the time, and percentiles are precise to within one bucket (about 9%)
+    buckets_per_octave = 8
+    octaves = 28  # Up to 2^28 us, about 4.5 minutes
+
+    def __init__(self):
+        self._counts = [0] * (self.buckets_per_octave * self.octaves)
+        self._count = 0
+        self._total_us = 0
+        self._max_us = 0
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def total_us(self):
+        return self._total_us
+
+    @property
+    def max_us(self):
+        return self._max_us
+
+    @property
+    def mean_us(self):
+        if self._count == 0:
+            return 0
+        return self._total_us / self._count
+
+    def add(self, value_us: float):
+        if value_us < 1:
+            index = 0
+        else:
+            index = min(int(log2(value_us) * self.buckets_per_octave), len(self._counts) - 1)
+        self._counts[index] += 1
+        self._count += 1
+        self._total_us += value_us
+        if value_us > self._max_us:
+            self._max_us = value_us
+
+    def percentile(self, percent: float):
+        #  The upper edge of the bucket holding the requested percentile, capped at the largest value seen
+        if self._count == 0:
+            return 0
+
+        target = self._count * percent / 100
+        cumulative = 0
+        for index in range(len(self._counts)):
+            cumulative += self._counts[index]
+            if cumulative >= target and cumulative > 0:
+                return min(2 ** ((index + 1) / self.buckets_per_octave), self._max_us)
+        return self._max_us
+
+    def summary(self):
+        return {
+            'count': self._count,
+            'total_us': self._total_us,
+            'mean_us': self.mean_us,
+            'p50_us': self.percentile(50),
+            'p95_us': self.percentile(95),
+            'p99_us': self.percentile(99),
+            'max_us': self._max_us,
+        }
+
+class Transfer_Statistics:
+    def __init__(self):
+        self.transactions = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.slept_us = 0
+        self.latency = Latency_Histogram()
+
+    def summary(self):
+        summary = {
+            'transactions': self.transactions,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'slept_us': self.slept_us,
+        }
+        latency = self.latency.summary()
+        for key in ['p50_us', 'p95_us', 'p99_us', 'max_us']:
+            summary[key] = latency[key]
+        if latency['total_us'] > 0:
+            summary['throughput_Bps'] = self.bytes / (latency['total_us'] * 10**-6)
+        else:
+            summary['throughput_Bps'] = 0
+        return summary
+
+class I2C_Metrics:
+    #  Counters and latency histograms for the I2C transfers, per (backend, device, operation),
+    # and the time spent in each layer of the software stack:
+    #   - planning: the address space controllers preparing and decoding register blocks
+    #   - pacing: sleeping to keep the minimum gap between transactions
+    #   - recovery: the backoff before retrying a failed chunk and reopening a lost link
+    #   - chunking: splitting transfers into chunks, everything in the connection helper which
+    #     is neither pacing, recovery nor the backend itself
+    #   - backend: the actual transfer through the USB-ISS, FPGA, i2c-dev...
+    layers = ['planning', 'pacing', 'recovery', 'chunking', 'backend']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._enabled = True
+        self.reset()
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        if value not in [True, False]:
+            raise TypeError("Metrics can only be enabled or disabled with true or false")
+        self._enabled = value
+
+    def reset(self):
+        with self._lock:
+            self._transfers: dict[tuple[str, int, str], Transfer_Statistics] = {}
+            self._layers = {layer: Latency_Histogram() for layer in self.layers}
+
+    def _statistics(self, backend: str, device_address: int, operation: str) -> Transfer_Statistics:
+        key = (backend, device_address, operation)
+        statistics = self._transfers.get(key, None)
+        if statistics is None:
+            statistics = Transfer_Statistics()
+            self._transfers[key] = statistics
+        return statistics
+
+    def add_transfer(self, backend: str, device_address: int, operation: str, byte_count: int, duration_us: float, slept_us: float = 0, ok: bool = True):
+        if not self._enabled:
+            return
+        with self._lock:
+            statistics = self._statistics(backend, device_address, operation)
+            statistics.transactions += 1
+            statistics.slept_us += slept_us
+            if ok:
+                statistics.bytes += byte_count
+            else:
+                statistics.errors += 1
+            statistics.latency.add(duration_us)
+            self._layers['backend'].add(duration_us)
+            self._layers['pacing'].add(slept_us)
+
+    def add_retry(self, backend: str, device_address: int, operation: str):
+        if not self._enabled:
+            return
+        with self._lock:
+            self._statistics(backend, device_address, operation).retries += 1
+
+    def add_layer_time(self, layer: str, duration_us: float):
+        if not self._enabled:
+            return
+        with self._lock:
+            self._layers[layer].add(duration_us)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'transfers': {key: self._transfers[key].summary() for key in self._transfers},
+                'layers': {layer: self._layers[layer].summary() for layer in self._layers},
+            }
+
+    def format(self) -> str:
+        snapshot = self.snapshot()
+
+        lines = ["{:<12} {:>8} {:>12} {:>12} {:>12} {:>12}".format("Layer", "Count", "Total (ms)", "p50 (us)", "p95 (us)", "p99 (us)")]
+        for layer in self.layers:
+            summary = snapshot['layers'][layer]
+            lines += ["{:<12} {:>8} {:>12.1f} {:>12.1f} {:>12.1f} {:>12.1f}".format(layer, summary['count'], summary['total_us'] / 1000, summary['p50_us'], summary['p95_us'], summary['p99_us'])]
+
+        lines += [""]
+        lines += ["{:<24} {:>6} {:<6} {:>8} {:>6} {:>7} {:>10} {:>10} {:>10} {:>10} {:>12} {:>12}".format("Backend", "Device", "Op", "Count", "Errors", "Retries", "Bytes", "p50 (us)", "p95 (us)", "p99 (us)", "Slept (ms)", "B/s")]
+        for key in sorted(snapshot['transfers'], key=lambda key: (key[0], -1 if key[1] is None else key[1], key[2])):
+            backend, device_address, operation = key
+            summary = snapshot['transfers'][key]
+            device = "raw" if device_address is None else "0x{:02x}".format(device_address)
+            lines += ["{:<24} {:>6} {:<6} {:>8} {:>6} {:>7} {:>10} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>12.0f}".format(
+                backend,
+                device,
+                operation,
+                summary['transactions'],
+                summary['errors'],
+                summary['retries'],
+                summary['bytes'],
+                summary['p50_us'],
+                summary['p95_us'],
+                summary['p99_us'],
+                summary['slept_us'] / 1000,
+                summary['throughput_Bps'],
+            )]
+        return "\n".join(lines)
@@ -0,0 +1,92 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+import threading
+import time
+
+class I2C_Pacer:
+    #  Minimum gap scheduler for the I2C bus, a transaction is only delayed by the part of the
+    # gap which has not yet elapsed since the start of the previous transaction on the bus.
+    # The gap can be configured per device, device_address=None is used for raw commands
+    def __init__(self, default_gap_us: int = 10000):
+        self._lock = threading.Lock()
+        self._default_gap_us = default_gap_us
+        self._device_gap_us: dict[int, int] = {}
+        self._last_start_ns = None
+
+        self._transactions = 0
+        self._total_wait_ns = 0
+
+    @property
+    def default_gap_us(self):
+        return self._default_gap_us
+
+    @default_gap_us.setter
+    def default_gap_us(self, value: int):
+        if value < 0:
+            raise RuntimeError("The gap between I2C transactions can not be negative")
+        self._default_gap_us = value
+
+    @property
+    def statistics(self):
+        with self._lock:
+            return {
+                'transactions': self._transactions,
+                'total_wait_us': self._total_wait_ns / 1000,
+            }
+
+    def set_device_gap(self, device_address: int, gap_us: int = None):
+        with self._lock:
+            if gap_us is None:
+                if device_address in self._device_gap_us:
+                    del self._device_gap_us[device_address]
+            else:
+                if gap_us < 0:
+                    raise RuntimeError("The gap between I2C transactions can not be negative")
+                self._device_gap_us[device_address] = gap_us
+
+    def gap_us(self, device_address: int = None):
+        return self._device_gap_us.get(device_address, self._default_gap_us)
+
+    def reset(self):
+        with self._lock:
+            self._last_start_ns = None
+
+    def wait(self, device_address: int = None):
+        #  The start time is reserved while holding the lock, so concurrent callers are spaced
+        # out correctly, but the sleep itself happens outside of the lock
+        with self._lock:
+            now = time.perf_counter_ns()
+            start = now
+            if self._last_start_ns is not None:
+                start = max(now, self._last_start_ns + self.gap_us(device_address) * 1000)
+            self._last_start_ns = start
+
+            self._transactions += 1
+            self._total_wait_ns += start - now
+
+        if start > now:
+            time.sleep((start - now) * 10**-9)
+        return (start - now) / 1000
@@ -0,0 +1,124 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+class I2C_Error(RuntimeError):
+    #  Base of the errors raised by the connection layer, kind is the classification used by the
+    # Retry_Policy to decide whether a failed transfer is worth retrying
+    kind = None
+
+class I2C_Link_Error(I2C_Error):
+    # The link to the I2C adapter itself was lost, as opposed to an error on the I2C bus
+    kind = 'link'
+
+class I2C_NACK_Error(I2C_Error):
+    kind = 'nack'
+
+class I2C_Timeout_Error(I2C_Error):
+    kind = 'timeout'
+
+class I2C_Short_Read_Error(I2C_Error):
+    kind = 'short_read'
+
+class I2C_Range_Outcome:
+    #  Outcome of the transfer of one chunk of a block read or write, byte_offset is the position
+    # of the chunk within the data of the block transfer
+    __slots__ = ('memory_address', 'byte_offset', 'length', 'attempts', 'error')
+
+    def __init__(self, memory_address: int, byte_offset: int, length: int, attempts: int = 1, error: Exception = None):
+        self.memory_address = memory_address
+        self.byte_offset = byte_offset
+        self.length = length
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return "Failed"
+        if self.attempts > 1:
+            return "Recovered"
+        return "OK"
+
+    def __repr__(self):
+        return "I2C_Range_Outcome(0x{:04x}, {} bytes, {}, {} attempts)".format(self.memory_address, self.length, self.status, self.attempts)
+
+class I2C_Partial_Transfer_Error(I2C_Error):
+    #  Some chunks of a block transfer failed even after retrying, while the others went through.
+    # The outcome of every chunk is kept, and for reads so is the data, which is only valid for
+    # the chunks which did not fail
+    kind = 'partial'
+
+    def __init__(self, message: str, outcomes: list[I2C_Range_Outcome], data: bytearray = None):
+        super().__init__(message)
+        self.outcomes = outcomes
+        self.data = data
+
+    @property
+    def failed_ranges(self):
+        return [(outcome.memory_address, outcome.byte_offset, outcome.length) for outcome in self.outcomes if outcome.error is not None]
+
+    @property
+    def completed_ranges(self):
+        return [(outcome.memory_address, outcome.byte_offset, outcome.length) for outcome in self.outcomes if outcome.error is None]
+
+class Retry_Policy:
+    #  Decides which failed transfers are retried and how long to wait before each retry, the
+    # wait doubles after each attempt up to max_backoff_s. A chunk which still fails after all the
+    # attempts does not stop the block transfer, unless max_failed_chunks chunks in a row failed
+    _error_kinds = ['nack', 'timeout', 'short_read']
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff_s: float = 0.001,
+        max_backoff_s: float = 0.1,
+        retry_on: list[str] = None,
+        max_failed_chunks: int = 4,
+    ):
+        if attempts < 1:
+            raise RuntimeError("A retry policy needs at least one attempt")
+        if retry_on is None:
+            retry_on = self._error_kinds
+        for kind in retry_on:
+            if kind not in self._error_kinds:
+                raise RuntimeError("Unknown kind of I2C error for the retry policy: {}".format(kind))
+
+        self.attempts = attempts
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.retry_on = list(retry_on)
+        self.max_failed_chunks = max_failed_chunks
+
+    def classify(self, error: Exception):
+        if isinstance(error, I2C_Error):
+            return error.kind
+        if isinstance(error, TimeoutError):
+            return 'timeout'
+        return None
+
+    def should_retry(self, kind: str, attempt: int):
+        return kind in self.retry_on and attempt < self.attempts
+
+    def backoff(self, attempt: int):
+        return min(self.backoff_s * 2**(attempt - 1), self.max_backoff_s)
@@ -0,0 +1,162 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from collections import deque
+
+import itertools
+import threading
+import time
+
+class I2C_Transaction_Record:
+    __slots__ = ('sequence', 'timestamp', 'direction', 'device_address', 'memory_address', 'length', 'payload', 'status', 'duration_us')
+
+    def __init__(self, sequence: int, timestamp: float, direction: str, device_address: int, memory_address: int, length: int, payload: bytes, status: str, duration_us: float):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.direction = direction
+        self.device_address = device_address
+        self.memory_address = memory_address
+        self.length = length
+        self.payload = payload
+        self.status = status
+        self.duration_us = duration_us
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def format(self):
+        timestamp = time.strftime("%H:%M:%S", time.localtime(self.timestamp)) + ".{:06d}".format(int((self.timestamp % 1) * 10**6))
+
+        if self.device_address is None:
+            target = "raw"
+        elif self.memory_address is None:
+            target = "0x{:02x}".format(self.device_address)
+        else:
+            target = "0x{:02x} @ 0x{:04x}".format(self.device_address, self.memory_address)
+
+        text = "{} {:<5} {} [{} bytes] {} ({:.1f} us)".format(timestamp, self.direction, target, self.length, self.status, self.duration_us)
+        if len(self.payload) > 0:
+            text += ": " + " ".join(["{:02x}".format(value) for value in self.payload])
+            if len(self.payload) < self.length:
+                text += " ..."
+        return text
+
+class I2C_Transaction_Trace:
+    #  Fixed size ring buffer of the transactions seen on the I2C bus. Recording a transaction
+    # only stores its raw fields, text is formatted when a viewer or an exporter asks for it.
+    # Records are numbered in sequence, so a viewer can fetch only the ones it has not shown yet
+    def __init__(self, capacity: int = 4096, max_payload_bytes: int = 64):
+        self._enabled = True
+        self._lock = threading.Lock()
+        self._max_payload_bytes = max_payload_bytes
+        self._records: deque[I2C_Transaction_Record] = deque(maxlen=capacity)
+        self._counter = itertools.count(1)
+        self._last_sequence = 0
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        if value not in [True, False]:
+            raise TypeError("The transaction trace can only be enabled or disabled with true or false")
+        self._enabled = value
+
+    @property
+    def capacity(self):
+        return self._records.maxlen
+
+    @capacity.setter
+    def capacity(self, value: int):
+        if value < 1:
+            raise RuntimeError("The transaction trace must be able to hold at least one record")
+        with self._lock:
+            self._records = deque(self._records, maxlen=value)
+
+    @property
+    def max_payload_bytes(self):
+        return self._max_payload_bytes
+
+    @max_payload_bytes.setter
+    def max_payload_bytes(self, value: int):
+        if value < 0:
+            raise RuntimeError("The number of payload bytes kept in the transaction trace can not be negative")
+        self._max_payload_bytes = value
+
+    @property
+    def last_sequence(self):
+        return self._last_sequence
+
+    def record(self, direction: str, device_address: int, memory_address: int = None, length: int = 0, payload = None, status: str = "OK", duration_us: float = 0):
+        if not self._enabled:
+            return
+
+        if payload is None:
+            payload = b''
+        else:
+            payload = bytes(payload[:self._max_payload_bytes])
+
+        with self._lock:
+            sequence = next(self._counter)
+            self._records.append(I2C_Transaction_Record(sequence, time.time(), direction, device_address, memory_address, length, payload, status, duration_us))
+            self._last_sequence = sequence
+
+    def records(self, since: int = 0) -> list[I2C_Transaction_Record]:
+        with self._lock:
+            records = list(self._records)
+        if since > 0:
+            records = [record for record in records if record.sequence > since]
+        return records
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def format(self, records: list[I2C_Transaction_Record] = None) -> str:
+        if records is None:
+            records = self.records()
+        return "\n".join([record.format() for record in records])
+
+    def export(self, file_name: str, file_format: str = None):
+        from pathlib import Path
+        file_name = Path(file_name)
+        if file_format is None:
+            file_format = "csv" if file_name.suffix.lower() == ".csv" else "text"
+
+        records = self.records()
+        if file_format == "text":
+            with open(file_name, "w") as out_file:
+                out_file.write(self.format(records) + "\n")
+        elif file_format == "csv":
+            import csv
+            with open(file_name, "w", newline='') as out_file:
+                writer = csv.writer(out_file)
+                writer.writerow(I2C_Transaction_Record.__slots__)
+                for record in records:
+                    row = record.as_dict()
+                    row['payload'] = row['payload'].hex()
+                    writer.writerow([row[name] for name in I2C_Transaction_Record.__slots__])
+        else:
+            raise RuntimeError("Unknown format for exporting the transaction trace: {}".format(file_format))
@@ -0,0 +1,108 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+from .fpga_eth_emulator import I2C_Slave_Model
+from .linux_i2c_dev_helper import I2C_RDWR, I2C_M_RD, I2C_Msg, I2C_RDWR_Ioctl_Data
+
+import ctypes
+import errno
+import time
+
+class Linux_I2C_Dev_Emulator:
+    #  Replacement for the Linux_OS_Layer which emulates the I2C_RDWR ioctl of /dev/i2c-N
+    # devices on top of emulated I2C devices, so the Linux_I2C_Dev_Helper can be used anywhere
+    def __init__(self, syscall_latency_us: float = 0, i2c_byte_us: float = 0):
+        self.syscall_latency_us = syscall_latency_us
+        self.i2c_byte_us = i2c_byte_us
+
+        self._devices: dict[int, I2C_Slave_Model] = {}
+        self._open_fds = {}
+        self._next_fd = 3
+
+        self.reset_statistics()
+
+    @property
+    def statistics(self):
+        return dict(self._statistics)
+
+    def reset_statistics(self):
+        self._statistics = {
+            'ioctls': 0,
+            'messages': 0,
+            'i2c_bytes': 0,
+        }
+
+    def add_device(self, address: int, memory_size: int = 65536, register_bits: int = 16, memory: bytes = None) -> I2C_Slave_Model:
+        self._devices[address] = I2C_Slave_Model(address, memory_size, register_bits, memory)
+        return self._devices[address]
+
+    def remove_device(self, address: int):
+        if address in self._devices:
+            del self._devices[address]
+
+    def get_device(self, address: int) -> I2C_Slave_Model:
+        return self._devices[address]
+
+    def open(self, path: str) -> int:
+        fd = self._next_fd
+        self._next_fd += 1
+        self._open_fds[fd] = path
+        return fd
+
+    def close(self, fd: int):
+        if fd not in self._open_fds:
+            raise OSError(errno.EBADF, "Bad file descriptor")
+        del self._open_fds[fd]
+
+    def ioctl(self, fd: int, request: int, arg):
+        if fd not in self._open_fds:
+            raise OSError(errno.EBADF, "Bad file descriptor")
+        if request != I2C_RDWR:
+            raise OSError(errno.ENOTTY, "Inappropriate ioctl for device")
+
+        arg: I2C_RDWR_Ioctl_Data
+        self._statistics['ioctls'] += 1
+
+        i2c_bytes = 0
+        for idx in range(arg.nmsgs):
+            msg: I2C_Msg = arg.msgs[idx]
+            device = self._devices.get(msg.addr, None)
+            if device is None:
+                raise OSError(errno.EREMOTEIO, "Remote I/O error")
+
+            if msg.flags & I2C_M_RD:
+                data = device.read(msg.len)
+                ctypes.memmove(msg.buf, bytes(data), msg.len)
+            elif msg.len > 0:
+                device.write([msg.buf[i] for i in range(msg.len)])
+
+            self._statistics['messages'] += 1
+            i2c_bytes += msg.len + 1
+        self._statistics['i2c_bytes'] += i2c_bytes
+
+        latency_us = self.syscall_latency_us + self.i2c_byte_us * i2c_bytes
+        if latency_us > 0:
+            time.sleep(latency_us * 10**-6)
+        return 0
@@ -0,0 +1,319 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .i2c_messages import I2CMessages
+from .base_gui import Base_GUI
+
+import tkinter as tk
+import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+import ctypes
+import errno
+import os
+
+# Definitions from linux/i2c.h and linux/i2c-dev.h
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+I2C_RDWR_IOCTL_MAX_MSGS = 42
+I2C_MAX_MSG_LENGTH = 8192  # Largest message the kernel accepts in an I2C_RDWR ioctl
+
+class I2C_Msg(ctypes.Structure):
+    _fields_ = [
+        ('addr', ctypes.c_uint16),
+        ('flags', ctypes.c_uint16),
+        ('len', ctypes.c_uint16),
+        ('buf', ctypes.POINTER(ctypes.c_uint8)),
+    ]
+
+class I2C_RDWR_Ioctl_Data(ctypes.Structure):
+    _fields_ = [
+        ('msgs', ctypes.POINTER(I2C_Msg)),
+        ('nmsgs', ctypes.c_uint32),
+    ]
+
+class Linux_OS_Layer:
+    #  Thin wrapper around the system calls used by the Linux_I2C_Dev_Helper, it can be replaced
+    # by any object with the same methods to test the helper without an I2C bus
+    def open(self, path: str) -> int:
+        return os.open(path, os.O_RDWR)
+
+    def close(self, fd: int):
+        os.close(fd)
+
+    def ioctl(self, fd: int, request: int, arg):
+        import fcntl  # Only available on unix-like systems
+        return fcntl.ioctl(fd, request, arg)
+
+class Linux_I2C_Dev_Helper(I2C_Connection_Helper):
+    def __init__(self, parent: Base_GUI, max_seq_byte: int | str = "Auto", swap_endian: bool = True, os_layer = None):
+        super().__init__(parent, max_seq_byte, swap_endian)
+
+        if os_layer is None:
+            os_layer = Linux_OS_Layer()
+        self._os = os_layer
+        self._fd = None
+
+        self._bus_var = self._new_variable(tk.IntVar, value=1)
+
+    @property
+    def bus(self):
+        return self._bus_var.get()
+
+    @bus.setter
+    def bus(self, value: int):
+        self._bus_var.set(value)
+
+    @property
+    def device_path(self):
+        return "/dev/i2c-{}".format(self.bus)
+
+    @property
+    def os_layer(self):
+        return self._os
+
+    @property
+    def connection_id(self):
+        return self.device_path
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        if operation == 'read':
+            return I2C_MAX_MSG_LENGTH
+        return I2C_MAX_MSG_LENGTH - register_bits//8
+
+    def _i2c_rdwr(self, messages: list[tuple[int, bool, list[int] | int | memoryview]]) -> list[list[int]]:
+        #  Run a combined transaction, the messages are (address, is_read, data or byte count) and
+        # are separated by repeated starts with a single stop at the end. The data of the read
+        # messages is returned in order. A read message can also be given a writable buffer
+        # instead of a byte count, the kernel then fills that buffer directly
+        if len(messages) > I2C_RDWR_IOCTL_MAX_MSGS:
+            raise RuntimeError("A combined I2C transaction can not have more than {} messages".format(I2C_RDWR_IOCTL_MAX_MSGS))
+
+        msgs = (I2C_Msg * len(messages))()
+        buffers = []
+        for idx in range(len(messages)):
+            address, is_read, data = messages[idx]
+            if is_read:
+                if isinstance(data, int):
+                    length = data
+                    buffer = (ctypes.c_uint8 * length)()
+                else:
+                    length = len(data)
+                    buffer = (ctypes.c_uint8 * length).from_buffer(data)
+                msgs[idx].flags = I2C_M_RD
+            else:
+                length = len(data)
+                buffer = (ctypes.c_uint8 * length)(*data)
+                msgs[idx].flags = 0
+            if length > I2C_MAX_MSG_LENGTH:
+                raise RuntimeError("An I2C message can not be longer than {} bytes".format(I2C_MAX_MSG_LENGTH))
+            msgs[idx].addr = address
+            msgs[idx].len = length
+            msgs[idx].buf = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_uint8))
+            buffers += [buffer]  # Keep the buffers alive until the ioctl returns
+
+        ioctl_data = I2C_RDWR_Ioctl_Data(ctypes.cast(msgs, ctypes.POINTER(I2C_Msg)), len(messages))
+        self._os.ioctl(self._fd, I2C_RDWR, ioctl_data)
+
+        retVal = []
+        for idx in range(len(messages)):
+            if messages[idx][1]:
+                if isinstance(messages[idx][2], int):
+                    retVal += [list(buffers[idx])]
+                else:
+                    retVal += [messages[idx][2]]
+        return retVal
+
+    def _register_address_bytes(self, memory_address: int, register_bits: int):
+        if register_bits == 16:
+            return [(memory_address >> 8) & 0xff, memory_address & 0xff]
+        elif register_bits == 8:
+            return [memory_address & 0xff]
+        raise RuntimeError("Unknown bit size trying to be sent")
+
+    def _check_i2c_device(self, address: int):
+        #  A zero length write only addresses the device, it fails if nobody acknowledges
+        try:
+            self._i2c_rdwr([(address, False, [])])
+        except OSError:
+            return False
+        return True
+
+    def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        if write_type != 'Normal':
+            raise RuntimeError("Unknown write type chosen for the Linux I2C device")
+
+        self._i2c_rdwr([(address, False, self._register_address_bytes(memory_address, register_bits) + list(data))])
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        data = bytearray(byte_count)
+        self._read_i2c_device_memory_into(address, memory_address, memoryview(data), register_bits, read_type)
+        return list(data)
+
+    def _read_i2c_device_memory_into(self, address: int, memory_address: int, buffer: memoryview, register_bits: int = 16, read_type: str = 'Normal'):
+        register_address = self._register_address_bytes(memory_address, register_bits)
+
+        if read_type == 'Normal':
+            # Set the register pointer and read back in two separate transactions
+            self._i2c_rdwr([(address, False, register_address)])
+            self._i2c_rdwr([(address, True, buffer)])
+        elif read_type == "Repeated Start":
+            self._i2c_rdwr([(address, False, register_address), (address, True, buffer)])
+        else:
+            raise RuntimeError("Unknown read type chosen for the Linux I2C device")
+
+    def _direct_i2c(self, commands: list[int]) -> list[int]:
+        #  The sequence is translated into combined transactions, every START or RESTART starts a
+        # new message and every STOP ends the transaction. The first byte written after a (re)start
+        # is the address byte, the kernel sends the NACK before the end of a read on its own
+        retVal = []
+        transaction = []
+        message = None
+
+        idx = 0
+        while idx < len(commands):
+            command = commands[idx]
+            idx += 1
+
+            if command in [I2CMessages.START, I2CMessages.RESTART, I2CMessages.STOP]:
+                if message is not None:
+                    transaction += [message]
+                    message = None
+                if command == I2CMessages.STOP and len(transaction) > 0:
+                    retVal += self._run_direct_transaction(transaction)
+                    transaction = []
+            elif command == I2CMessages.NACK:
+                pass
+            elif isinstance(command, I2CMessages) and command.name.startswith("WRITE"):
+                count = int(command.name[5:])
+                data = commands[idx:idx + count]
+                if len(data) != count:
+                    raise RuntimeError("The I2C command {} is missing {} operand bytes".format(command.name, count - len(data)))
+                idx += count
+
+                for value in data:
+                    if message is None:
+                        message = [value >> 1, (value & 0x01) == 1, []]
+                    elif message[1]:
+                        raise RuntimeError("Unable to write data in an I2C read message")
+                    else:
+                        message[2] += [value]
+            elif isinstance(command, I2CMessages) and command.name.startswith("READ"):
+                if message is None or not message[1]:
+                    raise RuntimeError("Read in the I2C direct command sequence without addressing a device for reading")
+                message[2] += [None for _ in range(int(command.name[4:]))]
+            else:
+                raise RuntimeError("Unknown I2C command: {}".format(command))
+
+        if message is not None:
+            transaction += [message]
+        if len(transaction) > 0:
+            retVal += self._run_direct_transaction(transaction)
+
+        return retVal
+
+    def _run_direct_transaction(self, transaction):
+        messages = []
+        for address, is_read, data in transaction:
+            if is_read:
+                messages += [(address, True, len(data))]
+            else:
+                messages += [(address, False, data)]
+
+        retVal = []
+        for data in self._i2c_rdwr(messages):
+            retVal += data
+        return retVal
+
+    def display_in_frame(self, frame: ttk.Frame):
+        if hasattr(self, '_frame') and self._frame is not None:
+            tmp = self._frame.children.copy()
+            for widget in tmp:
+                tmp[widget].destroy()
+
+        self._frame = frame
+        self._bus_label = ttk.Label(self._frame, text="Bus: /dev/i2c-")
+        self._bus_label.grid(column=0, row=0, sticky=(tk.W, tk.E))
+
+        self._bus_entry = ttk.Entry(self._frame, textvariable=self._bus_var, width=4)
+        self._bus_entry.grid(column=1, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(2, weight=1)
+
+    def validate_connection_params(self):
+        try:
+            bus = self.bus
+        except tk.TclError:
+            bus = -1
+        if bus < 0:
+            self.send_message("Please enter a valid I2C bus number", "Error")
+            return False
+
+        return True
+
+    def _is_link_error(self, error: Exception):
+        #  A missing ACK is also reported as an OSError, only the errors which mean the adapter
+        # itself went away are treated as a lost link
+        return isinstance(error, OSError) and error.errno in [errno.ENODEV, errno.EBADF, errno.ESHUTDOWN]
+
+    def _classify_error(self, error: Exception):
+        if isinstance(error, OSError):
+            if error.errno in [errno.EREMOTEIO, errno.ENXIO]:
+                return 'nack'
+            if error.errno == errno.ETIMEDOUT:
+                return 'timeout'
+        return super()._classify_error(error)
+
+    def _reopen_link(self):
+        if self._fd is not None:
+            try:
+                self._os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+        self._fd = self._os.open(self.device_path)
+        return True
+
+    def connect(self, no_connect: bool = False):
+        self._no_connect = no_connect
+        if not no_connect:  # For emulated connection
+            try:
+                self._fd = self._os.open(self.device_path)
+            except (OSError, ImportError):
+                self.send_message("Unable to open the I2C bus {}".format(self.device_path))
+                return False
+
+        if hasattr(self, "_bus_entry"):
+            self._bus_entry.config(state="disabled")
+        self.send_message("Connected to the I2C bus {}".format(self.device_path))
+        return True
+
+    def disconnect(self):
+        if not self._no_connect and self._fd is not None:
+            self._os.close(self._fd)
+        self._fd = None
+
+        if hasattr(self, "_bus_entry"):
+            self._bus_entry.config(state="normal")
+        self.send_message("Disconnected from the I2C bus {}".format(self.device_path))
@@ -29,13 +29,14 @@ import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to t
 import logging
 
 import importlib.resources
-from PIL import ImageTk, Image
 
 class Multi_GUI(Base_GUI):
     def __init__(self, root: tk.Tk, logger: logging.Logger):
         super().__init__("Multi I2C GUI", root, logger)
 
     def _about_contents(self, element: tk.Tk, column: int, row: int):
+        from PIL import ImageTk, Image
+
         self._about_img = ImageTk.PhotoImage(Image.open(importlib.resources.open_binary("i2c_gui.static", "ETROC1.png")))
         self._about_img_label = tk.Label(element, image = self._about_img)
         self._about_img_label.grid(column=column, row=row, sticky='')
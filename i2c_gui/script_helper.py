@@ -28,9 +28,18 @@ import tkinter as tk
 import logging
 
 class ScriptHelper(GUI_Helper):
-    def __init__(self, logger: logging.Logger):
-        # self._root = tk.Tk()  # Needed for some of the variables to work correctly
-        super().__init__("Script Helper", tk.Tk(), logger)
+    def __init__(self, logger: logging.Logger, headless: bool = True):
+        #  By default scripts run headless, with plain Python variables and without a Tk root, a
+        # Tk root is only created when requested, for scripts which also open Tk windows
+        self._headless = headless
+        root = None
+        if not headless:
+            root = tk.Tk()
+        super().__init__("Script Helper", root, logger)
+
+    @property
+    def is_headless(self):
+        return self._headless
 
     def _local_status_update(self, value):
         self._logger.info("Updating local status to: {}".format(value))
@@ -0,0 +1,249 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+from math import ceil
+
+class Transaction_Handle:
+    def __init__(self, operation: str, device_address: int, memory_address: int, byte_count: int, key: tuple, data: list[int] = None):
+        self._operation = operation
+        self._device_address = device_address
+        self._memory_address = memory_address
+        self._byte_count = byte_count
+        self._key = key
+        self._data = data
+
+        self._done = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    @property
+    def operation(self):
+        return self._operation
+
+    @property
+    def device_address(self):
+        return self._device_address
+
+    @property
+    def memory_address(self):
+        return self._memory_address
+
+    @property
+    def done(self):
+        return self._done
+
+    @property
+    def exception(self):
+        return self._exception
+
+    @property
+    def result(self):
+        if not self._done:
+            raise RuntimeError("The batch with this transaction has not been executed yet")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def add_done_callback(self, function):
+        if self._done:
+            function(self)
+        else:
+            self._callbacks += [function]
+
+    def _set_result(self, result = None, exception: Exception = None):
+        self._result = result
+        self._exception = exception
+        self._done = True
+
+        callbacks = self._callbacks
+        self._callbacks = []
+        for function in callbacks:
+            function(self)
+
+class Transaction_Batch:
+    #  Reads and writes are queued and only sent when the batch is executed, then coalesced per
+    # device into the fewest block transfers. The order between reads and writes touching the same
+    # registers is kept, so a queued read always sees the writes queued before it
+    def __init__(self, i2c_controller, max_read_gap: int = 0):
+        self._i2c_controller = i2c_controller
+        self._max_read_gap = max_read_gap  # Number of unrequested registers a read may span to merge two ranges
+
+        self._operations: list[Transaction_Handle] = []
+        self._executed = False
+        self._transfer_count = 0
+
+    @property
+    def operation_count(self):
+        return len(self._operations)
+
+    @property
+    def transfer_count(self):
+        return self._transfer_count
+
+    def read_device_memory(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> Transaction_Handle:
+        if self._executed:
+            raise RuntimeError("Unable to queue a read in a batch which was already executed")
+
+        handle = Transaction_Handle('read', device_address, memory_address, byte_count, (device_address, register_bits, register_length, read_type))
+        self._operations += [handle]
+        return handle
+
+    def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal') -> Transaction_Handle:
+        if self._executed:
+            raise RuntimeError("Unable to queue a write in a batch which was already executed")
+
+        register_bytes = ceil(register_length/8)
+        if len(data) % register_bytes != 0:
+            raise RuntimeError("The data to write must contain a whole number of registers of {} bytes".format(register_bytes))
+
+        handle = Transaction_Handle('write', device_address, memory_address, len(data), (device_address, register_bits, register_length, write_type), list(data))
+        self._operations += [handle]
+        return handle
+
+    def _registers(self, handle: Transaction_Handle):
+        device_address, register_bits, register_length, access_type = handle._key
+        register_count = ceil(handle._byte_count/ceil(register_length/8))
+        return [(device_address, handle.memory_address + idx) for idx in range(register_count)]
+
+    def _phases(self):
+        #  Reads and writes are placed in alternating phases. Each operation goes into the earliest
+        # phase of its kind which still comes after every earlier operation it depends on: a read
+        # after the writes to the same registers and a write after the reads and writes to them
+        phases = []
+        first_kind = None
+        last_phase = {'read': {}, 'write': {}}
+        for handle in self._operations:
+            if first_kind is None:
+                first_kind = handle.operation
+            registers = self._registers(handle)
+
+            minimum = 0
+            for register in registers:
+                if register in last_phase['write']:
+                    minimum = max(minimum, last_phase['write'][register])
+                if handle.operation == 'write' and register in last_phase['read']:
+                    minimum = max(minimum, last_phase['read'][register] + 1)
+
+            index = minimum
+            if (index % 2 == 0) != (handle.operation == first_kind):
+                index += 1
+
+            while len(phases) <= index:
+                phases += [[]]
+            phases[index] += [handle]
+
+            for register in registers:
+                last_phase[handle.operation][register] = max(index, last_phase[handle.operation].get(register, 0))
+
+        return [phase for phase in phases if len(phase) > 0]
+
+    def _group(self, handles: list[Transaction_Handle]):
+        # Groups are kept in the order in which they first appear in the batch
+        groups = {}
+        for handle in handles:
+            if handle._key not in groups:
+                groups[handle._key] = []
+            groups[handle._key] += [handle]
+        return groups
+
+    def _execute_reads(self, handles: list[Transaction_Handle]):
+        groups = self._group(handles)
+        for key in groups:
+            device_address, register_bits, register_length, read_type = key
+            register_bytes = ceil(register_length/8)
+
+            ranges = []
+            for handle in sorted(groups[key], key=lambda handle: handle.memory_address):
+                start = handle.memory_address
+                end = start + ceil(handle._byte_count/register_bytes)
+                if len(ranges) > 0 and start <= ranges[-1][1] + self._max_read_gap:
+                    ranges[-1][1] = max(ranges[-1][1], end)
+                    ranges[-1][2] += [handle]
+                else:
+                    ranges += [[start, end, [handle]]]
+
+            for start, end, range_handles in ranges:
+                data = self._i2c_controller.read_device_memory(device_address, start, (end - start) * register_bytes, register_bits, register_length, read_type)
+                self._transfer_count += 1
+
+                for handle in range_handles:
+                    offset = (handle.memory_address - start) * register_bytes
+                    handle._set_result(data[offset:offset + handle._byte_count])
+
+    def _execute_writes(self, handles: list[Transaction_Handle]):
+        groups = self._group(handles)
+        for key in groups:
+            device_address, register_bits, register_length, write_type = key
+            register_bytes = ceil(register_length/8)
+
+            # Later writes to the same register replace earlier ones
+            registers = {}
+            for handle in groups[key]:
+                for idx in range(len(handle._data) // register_bytes):
+                    registers[handle.memory_address + idx] = handle._data[idx * register_bytes:(idx + 1) * register_bytes]
+
+            start = None
+            data = []
+            for address in sorted(registers) + [None]:
+                if start is not None and (address is None or address != start + len(data) // register_bytes):
+                    self._i2c_controller.write_device_memory(device_address, start, data, register_bits, register_length, write_type)
+                    self._transfer_count += 1
+                    start = None
+                    data = []
+                if address is None:
+                    break
+                if start is None:
+                    start = address
+                data += registers[address]
+
+            for handle in groups[key]:
+                handle._set_result()
+
+    def execute(self):
+        if self._executed:
+            raise RuntimeError("A batch can only be executed once")
+        self._executed = True
+
+        try:
+            for phase in self._phases():
+                if phase[0].operation == 'read':
+                    self._execute_reads(phase)
+                else:
+                    self._execute_writes(phase)
+        except Exception as e:
+            for handle in self._operations:
+                if not handle.done:
+                    handle._set_result(exception=e)
+            raise
+
+    def __enter__(self):
+        self._i2c_controller._push_batch(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._i2c_controller._pop_batch(self)
+        if exc_type is None:
+            self.execute()
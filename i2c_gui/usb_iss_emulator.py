@@ -0,0 +1,211 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .fpga_eth_emulator import I2C_Slave_Model
+from .i2c_messages import I2CMessages
+from .i2c_retry_policy import I2C_NACK_Error
+
+import time
+
+class UsbIss_I2C_Emulator:
+    #  Transfer limits of the USB-ISS firmware, every command has to fit in a single 64 byte
+    # USB packet together with its header bytes
+    max_read_bytes = 64
+    max_write_ad1_bytes = 60
+    max_write_ad2_bytes = 59
+    max_direct_bytes = 60
+
+    def __init__(self, parent: UsbIss_Emulator):
+        self._parent = parent
+
+    def _device(self, address: int) -> I2C_Slave_Model:
+        device = self._parent._devices.get(address, None)
+        if device is None:
+            raise I2C_NACK_Error("No ACK from the emulated I2C device with address 0x{:02x}".format(address))
+        return device
+
+    def test(self, address: int) -> bool:
+        self._parent._transfer(command_bytes=2, response_bytes=1, i2c_bytes=1)
+        return address in self._parent._devices
+
+    def read_ad1(self, address: int, register: int, byte_count: int) -> list[int]:
+        if byte_count > self.max_read_bytes:
+            raise RuntimeError("The USB-ISS can not read more than {} bytes in a single transfer".format(self.max_read_bytes))
+        self._parent._transfer(command_bytes=4, response_bytes=byte_count, i2c_bytes=byte_count + 4)
+        device = self._device(address)
+        device.write([register & 0xff])
+        return device.read(byte_count)
+
+    def read_ad2(self, address: int, register: int, byte_count: int) -> list[int]:
+        if byte_count > self.max_read_bytes:
+            raise RuntimeError("The USB-ISS can not read more than {} bytes in a single transfer".format(self.max_read_bytes))
+        self._parent._transfer(command_bytes=5, response_bytes=byte_count, i2c_bytes=byte_count + 5)
+        device = self._device(address)
+        device.write([(register >> 8) & 0xff, register & 0xff])  # The USB-ISS sends the high byte first
+        return device.read(byte_count)
+
+    def write_ad1(self, address: int, register: int, data: list[int]):
+        if len(data) > self.max_write_ad1_bytes:
+            raise RuntimeError("The USB-ISS can not write more than {} bytes in a single transfer".format(self.max_write_ad1_bytes))
+        self._parent._transfer(command_bytes=4 + len(data), response_bytes=1, i2c_bytes=len(data) + 2)
+        self._device(address).write([register & 0xff] + list(data))
+
+    def write_ad2(self, address: int, register: int, data: list[int]):
+        if len(data) > self.max_write_ad2_bytes:
+            raise RuntimeError("The USB-ISS can not write more than {} bytes in a single transfer".format(self.max_write_ad2_bytes))
+        self._parent._transfer(command_bytes=5 + len(data), response_bytes=1, i2c_bytes=len(data) + 3)
+        self._device(address).write([(register >> 8) & 0xff, register & 0xff] + list(data))
+
+    def direct(self, data: list[int]) -> list[int]:
+        if len(data) > self.max_direct_bytes:
+            raise RuntimeError("The USB-ISS can not send more than {} bytes in a single direct command".format(self.max_direct_bytes))
+
+        read_lengths = {}
+        write_lengths = {}
+        for idx in range(16):
+            read_lengths[I2CMessages.READ1.value + idx] = idx + 1
+            write_lengths[I2CMessages.WRITE1.value + idx] = idx + 1
+
+        retVal = []
+        i2c_bytes = 0
+        #  Whether the adapter keeps the bus state between direct commands is not known, so every
+        # direct command starts with an idle bus
+        device = None
+        address_byte = None
+        write_buffer = []
+
+        idx = 0
+        while idx < len(data):
+            command = data[idx]
+            idx += 1
+
+            if command in [I2CMessages.START.value, I2CMessages.RESTART.value, I2CMessages.STOP.value]:
+                if device is not None and len(write_buffer) > 0:
+                    device.write(write_buffer)
+                device = None
+                address_byte = None
+                write_buffer = []
+            elif command == I2CMessages.NACK.value:
+                pass
+            elif command in write_lengths:
+                count = write_lengths[command]
+                payload = data[idx:idx + count]
+                if len(payload) != count:
+                    raise RuntimeError("Truncated write in the USB-ISS direct command sequence")
+                idx += count
+                i2c_bytes += count
+
+                for value in payload:
+                    if address_byte is None:
+                        address_byte = value
+                        device = self._device(value >> 1)
+                    else:
+                        write_buffer += [value]
+            elif command in read_lengths:
+                count = read_lengths[command]
+                if device is None or (address_byte & 0x01) == 0:
+                    raise RuntimeError("Read in the USB-ISS direct command sequence without addressing a device for reading")
+                retVal += device.read(count)
+                i2c_bytes += count
+            else:
+                raise RuntimeError("Unknown command in the USB-ISS direct command sequence: 0x{:02x}".format(command))
+
+        if device is not None and len(write_buffer) > 0:
+            device.write(write_buffer)
+
+        self._parent._transfer(command_bytes=len(data) + 1, response_bytes=len(retVal) + 2, i2c_bytes=i2c_bytes)
+        return retVal
+
+class UsbIss_Emulator:
+    def __init__(self, transfer_latency_us: float = 1000, serial_byte_us: float = 0, sleep: bool = True):
+        #  Every transfer pays a fixed USB round trip latency, the time for the command and
+        # response bytes on the serial link and the time the bytes take on the I2C bus
+        self.transfer_latency_us = transfer_latency_us
+        self.serial_byte_us = serial_byte_us
+        self.sleep = sleep
+
+        self._devices: dict[int, I2C_Slave_Model] = {}
+        self._is_open = False
+        self._port = None
+        self._clock_khz = 100
+
+        self.i2c = UsbIss_I2C_Emulator(self)
+
+        self.reset_statistics()
+
+    @property
+    def statistics(self):
+        return dict(self._statistics)
+
+    def reset_statistics(self):
+        self._statistics = {
+            'transfers': 0,
+            'serial_bytes': 0,
+            'i2c_bytes': 0,
+            'modelled_time_us': 0,
+        }
+
+    def add_device(self, address: int, memory_size: int = 65536, register_bits: int = 16, memory: bytes = None) -> I2C_Slave_Model:
+        self._devices[address] = I2C_Slave_Model(address, memory_size, register_bits, memory)
+        return self._devices[address]
+
+    def remove_device(self, address: int):
+        if address in self._devices:
+            del self._devices[address]
+
+    def get_device(self, address: int) -> I2C_Slave_Model:
+        return self._devices[address]
+
+    def open(self, port: str):
+        self._port = port
+        self._is_open = True
+
+    def close(self):
+        self._is_open = False
+
+    def setup_i2c(self, clock_khz: int = 400, use_i2c_hardware: bool = True, io1_type = None, io2_type = None):
+        self._clock_khz = clock_khz
+
+    def read_module_id(self):
+        return 7
+
+    def read_fw_version(self):
+        return 9
+
+    def _transfer(self, command_bytes: int, response_bytes: int, i2c_bytes: int):
+        if not self._is_open:
+            raise RuntimeError("The emulated USB-ISS port is not open")
+
+        # Each I2C byte takes 9 clock cycles (8 data bits plus the ACK)
+        i2c_time_us = i2c_bytes * 9 * 1000 / self._clock_khz
+        serial_time_us = (command_bytes + response_bytes) * self.serial_byte_us
+        transfer_time_us = self.transfer_latency_us + serial_time_us + i2c_time_us
+
+        self._statistics['transfers'] += 1
+        self._statistics['serial_bytes'] += command_bytes + response_bytes
+        self._statistics['i2c_bytes'] += i2c_bytes
+        self._statistics['modelled_time_us'] += transfer_time_us
+
+        if self.sleep and transfer_time_us > 0:
+            time.sleep(transfer_time_us * 10**-6)
@@ -24,6 +24,9 @@ from __future__ import annotations
 
 from .i2c_connection_helper import I2C_Connection_Helper
 from .i2c_messages import I2CMessages
+from .i2c_messages import encode_direct_i2c
+from .i2c_messages import direct_read_commands
+from .i2c_retry_policy import I2C_Short_Read_Error
 from .base_gui import Base_GUI
 
 import tkinter as tk
@@ -31,21 +34,38 @@ import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to t
 import logging
 import time
 
-from usb_iss import UsbIss, defs
+from usb_iss import UsbIss
+from usb_iss.exceptions import UsbIssError
 
 class USB_ISS_Helper(I2C_Connection_Helper):
-    def __init__(self, parent: Base_GUI, max_seq_byte: int = 8, swap_endian: bool = True):
+    #  Largest transfers accepted by the USB-ISS firmware, each command has to fit in a single
+    # 64 byte USB packet together with its header bytes
+    _max_read_bytes = 64
+    _max_write_ad1_bytes = 60
+    _max_write_ad2_bytes = 59
+    _max_direct_bytes = 60
+    _max_direct_read_bytes = 60
+
+    def __init__(self, parent: Base_GUI, max_seq_byte: int | str = "Auto", swap_endian: bool = True, iss = None):
         super().__init__(parent, max_seq_byte, swap_endian)
 
-        self._iss = UsbIss()
+        #  Any object with the same interface as UsbIss can be used instead of the real adapter,
+        # for instance the UsbIss_Emulator from usb_iss_emulator
+        if iss is None:
+            iss = UsbIss()
+        self._iss = iss
         #self._iss = UsbIss(verbose=True)
 
-        self._port_var = tk.StringVar()
+        self._port_var = self._new_variable(tk.StringVar)
         self._port_var.set("COM3")
 
-        self._clk_var = tk.IntVar(self._frame)
+        self._clk_var = self._new_variable(tk.IntVar)
         self._clk_var.set(100)
 
+    @property
+    def iss(self):
+        return self._iss
+
     @property
     def port(self):
         return self._port_var.get()
@@ -62,6 +82,19 @@ class USB_ISS_Helper(I2C_Connection_Helper):
     def clk(self, value):
         self._clk_var.set(value)
 
+    @property
+    def connection_id(self):
+        return self.port
+
+    def _max_transfer_size(self, operation: str, register_bits: int, access_type: str) -> int:
+        if operation == 'read':
+            if access_type == 'Repeated Start':
+                return self._max_direct_read_bytes  # The whole read is a single direct transfer
+            return self._max_read_bytes
+        if register_bits == 8:
+            return self._max_write_ad1_bytes
+        return self._max_write_ad2_bytes
+
     def _check_i2c_device(self, address: int):
         return self._iss.i2c.test(address)
 
@@ -88,18 +121,18 @@ class USB_ISS_Helper(I2C_Connection_Helper):
                 self.send_message("Unknown bit size trying to be sent", "Error")
                 return []
         elif read_type == "Repeated Start":
-            direct_msg = [defs.I2CDirect.START]
+            direct_msg = [I2CMessages.START]
 
             device_address_byte = address << 1
             if register_bits == 8:
                 direct_msg += [
-                    defs.I2CDirect.WRITE2,
+                    I2CMessages.WRITE2,
                     device_address_byte,
                     memory_address & 0xff,
                 ]
             elif register_bits == 16:
                 direct_msg += [
-                    defs.I2CDirect.WRITE3,
+                    I2CMessages.WRITE3,
                     device_address_byte,
                     (memory_address >> 8) & 0xff,
                     memory_address & 0xff,
@@ -109,226 +142,30 @@ class USB_ISS_Helper(I2C_Connection_Helper):
                 return []
 
             direct_msg += [
-                defs.I2CDirect.RESTART,
-                defs.I2CDirect.WRITE1,
+                I2CMessages.RESTART,
+                I2CMessages.WRITE1,
                 device_address_byte | 0x01,
             ]
+            direct_msg += direct_read_commands(byte_count)
+            direct_msg += [I2CMessages.STOP]
 
-            #byte_count += 1  # Why do I need to do this... maybe something is misconfigured
-            if byte_count <= 16:
-                if byte_count > 1:
-                    direct_msg += [
-                        getattr(defs.I2CDirect, f"READ{byte_count-1}"),
-                    ]
-            else:
-                raise RuntimeError("USB ISS does not support a block read of more than 16 bytes")
-
-            direct_msg += [
-                defs.I2CDirect.NACK,
-                defs.I2CDirect.READ1,
-                defs.I2CDirect.STOP,
-            ]
-
-            retVal = self._iss.i2c.direct(direct_msg)
+            retVal = self._direct_i2c(direct_msg)
 
             if len(retVal) != byte_count:
-                raise RuntimeError(f"Did not receive the expected number of bytes")
+                raise I2C_Short_Read_Error(f"Did not receive the expected number of bytes")
             else:
                 return retVal
         else:
             raise RuntimeError("Unknown read type chosen for the USB ISS")
 
     def _direct_i2c(self, commands: list[int]) -> list[int]:
-        direct_msg = []
-
-        #print("Got commands:")
-        #print(commands)
-
-        idx = 0
-        while True:
-            if idx >= len(commands):
-                break
-
-            command = commands[idx]
-            if command not in I2CMessages:
-                raise RuntimeError("Unknown I2C command")
-
-            direct_msg += [command.value]
-            if command == I2CMessages.WRITE1:
-                direct_msg += [commands[idx+1]]
-                idx += 2
-            elif command == I2CMessages.WRITE2:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                idx += 3
-            elif command == I2CMessages.WRITE3:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                idx += 4
-            elif command == I2CMessages.WRITE4:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                idx += 5
-            elif command == I2CMessages.WRITE5:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                idx += 6
-            elif command == I2CMessages.WRITE6:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                idx += 7
-            elif command == I2CMessages.WRITE7:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                idx += 8
-            elif command == I2CMessages.WRITE8:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                idx += 9
-            elif command == I2CMessages.WRITE9:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                idx += 10
-            elif command == I2CMessages.WRITE10:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                idx += 11
-            elif command == I2CMessages.WRITE11:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                idx += 12
-            elif command == I2CMessages.WRITE12:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                direct_msg += [commands[idx+12]]
-                idx += 13
-            elif command == I2CMessages.WRITE13:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                direct_msg += [commands[idx+12]]
-                direct_msg += [commands[idx+13]]
-                idx += 14
-            elif command == I2CMessages.WRITE14:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                direct_msg += [commands[idx+12]]
-                direct_msg += [commands[idx+13]]
-                direct_msg += [commands[idx+14]]
-                idx += 15
-            elif command == I2CMessages.WRITE15:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                direct_msg += [commands[idx+12]]
-                direct_msg += [commands[idx+13]]
-                direct_msg += [commands[idx+14]]
-                direct_msg += [commands[idx+15]]
-                idx += 16
-            elif command == I2CMessages.WRITE16:
-                direct_msg += [commands[idx+1]]
-                direct_msg += [commands[idx+2]]
-                direct_msg += [commands[idx+3]]
-                direct_msg += [commands[idx+4]]
-                direct_msg += [commands[idx+5]]
-                direct_msg += [commands[idx+6]]
-                direct_msg += [commands[idx+7]]
-                direct_msg += [commands[idx+8]]
-                direct_msg += [commands[idx+9]]
-                direct_msg += [commands[idx+10]]
-                direct_msg += [commands[idx+11]]
-                direct_msg += [commands[idx+12]]
-                direct_msg += [commands[idx+13]]
-                direct_msg += [commands[idx+14]]
-                direct_msg += [commands[idx+15]]
-                direct_msg += [commands[idx+16]]
-                idx += 17
-            else:
-                idx += 1
-
-        #print("Translated commands:")
-        #print(direct_msg)
-
-        return self._iss.i2c.direct(direct_msg)
+        retVal = []
+        for payload, read_count in encode_direct_i2c(commands, self._max_direct_bytes, self._max_direct_read_bytes):
+            data = self._iss.i2c.direct(list(payload))
+            if len(data) != read_count:
+                raise I2C_Short_Read_Error("Expected {} bytes from the I2C direct command but got {}".format(read_count, len(data)))
+            retVal += data
+        return retVal
 
     def display_in_frame(self, frame: ttk.Frame):
         if hasattr(self, '_frame') and self._frame is not None:
@@ -371,6 +208,28 @@ class USB_ISS_Helper(I2C_Connection_Helper):
 
         return True
 
+    def _classify_error(self, error: Exception):
+        #  The usb_iss package reports a failed I2C transaction, such as a missing ACK, with its
+        # own exception type, while serial port errors are OSErrors. Anything else is left to the
+        # Retry_Policy, which does not retry errors it does not know
+        kind = super()._classify_error(error)
+        if kind is None and isinstance(error, UsbIssError):
+            kind = 'nack'
+        return kind
+
+    def _reopen_link(self):
+        try:
+            self._iss.close()
+        except Exception:
+            pass  # The serial port is usually already gone at this point
+
+        use_hardware = True
+        if self._clk_var.get() < 100:
+            use_hardware = False
+        self._iss.open(self.port)
+        self._iss.setup_i2c(clock_khz=self.clk, use_i2c_hardware=use_hardware)
+        return True
+
     def connect(self, no_connect: bool = False):
         # Give preference to hardware I2C for clk which support both hardware and bit bashed
         use_hardware = True
@@ -0,0 +1,159 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import logging
+import unittest
+
+from i2c_gui.script_helper import ScriptHelper
+from i2c_gui.i2c_metrics import I2C_Metrics
+from i2c_gui.chips.address_space_controller import Address_Space_Controller
+
+register_map = {
+    "Config": {
+        "Base Address": 0x00,
+        "Registers": {
+            "Reg0": {"offset": 0, "default": 0x10},
+            "Reg1": {"offset": 1, "default": 0x11},
+            "Reg2": {"offset": 2, "default": 0x12},
+            "Reg3": {"offset": 3, "default": 0x13},
+        },
+    },
+    "Status": {
+        "Base Address": 0x20,
+        "Registers": {
+            "Stat0": {"offset": 0, "default": 0x00, "read_only": True},
+            "Stat1": {"offset": 1, "default": 0x00, "read_only": True},
+        },
+    },
+}
+
+class Headless_Chip(ScriptHelper):
+    # Headless parent of the address space, standing in for a chip
+    def __init__(self):
+        super().__init__(logging.getLogger("test_address_space_dirty"))
+
+    def update_whether_modified(self):
+        pass
+
+class Memory_I2C_Controller:
+    #  Stands in for the connection controller, with a device whose memory is a bytearray and
+    # which can be told to ignore writes to some addresses
+    def __init__(self, size: int):
+        self.memory = bytearray(size)
+        self.stuck = set()
+        self.metrics = I2C_Metrics()
+        self.active_batch = None
+
+    def _read_device_memory_bytes(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal') -> bytearray:
+        return bytearray(self.memory[memory_address:memory_address + byte_count])
+
+    def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
+        for idx, value in enumerate(data):
+            if memory_address + idx not in self.stuck:
+                self.memory[memory_address + idx] = value
+
+class Dirty_Tracking_Test(unittest.TestCase):
+    def setUp(self):
+        self.controller = Memory_I2C_Controller(0x30)
+        self.controller.memory[0x00:0x04] = bytes([0x10, 0x11, 0x12, 0x13])
+        self.controller.memory[0x20:0x22] = bytes([0xaa, 0xbb])
+        self.space = Address_Space_Controller(
+            Headless_Chip(),
+            "Test",
+            0x72,
+            0x30,
+            self.controller,
+            register_map,
+            None,
+            register_bits=8,
+        )
+
+    def test_not_read_is_unknown(self):
+        self.assertEqual(self.space.is_modified, "Unknown")
+        self.assertEqual(self.space.modified_addresses, [0x00, 0x01, 0x02, 0x03, 0x20, 0x21])
+
+    def test_read_clears(self):
+        self.space.read_all()
+        self.assertFalse(self.space.is_modified)
+        self.assertEqual(self.space.modified_addresses, [])
+        self.assertEqual(self.space.get_pending_block(0x20, 2), [0xaa, 0xbb])
+
+    def test_read_of_different_value_is_not_modified(self):
+        self.controller.memory[0x01] = 0x55
+        self.space.read_all()
+        self.assertFalse(self.space.is_modified)
+        self.assertEqual(self.space.get_pending_block(0x01, 1), [0x55])
+
+    def test_set_pending(self):
+        self.space.read_all()
+        self.space.set_pending_block(0x01, [0x21, 0x12])
+        self.assertTrue(self.space.is_modified)
+        self.assertEqual(self.space.modified_addresses, [0x01])
+
+        # Setting the read back value again is no longer a modification
+        self.space.set_pending_block(0x01, [0x11])
+        self.assertFalse(self.space.is_modified)
+
+    def test_set_pending_values(self):
+        self.space.read_all()
+        self.space.set_pending_values({0x00: 0x10, 0x03: 0x33})
+        self.assertEqual(self.space.modified_addresses, [0x03])
+
+    def test_revert(self):
+        self.space.read_all()
+        self.space.set_pending_block(0x00, [0x01, 0x02])
+        self.space.revert()
+        self.assertFalse(self.space.is_modified)
+        self.assertEqual(self.space.get_pending_block(0x00, 2), [0x10, 0x11])
+
+    def test_reset(self):
+        self.controller.memory[0x02] = 0x77
+        self.space.read_all()
+        self.space.reset()
+        # The read only registers are also reset to their defaults, which differ from the read back values
+        self.assertEqual(self.space.modified_addresses, [0x02, 0x20, 0x21])
+
+    def test_write_modified(self):
+        self.space.read_all()
+        self.space.set_pending_block(0x01, [0x21])
+        self.space.set_pending_block(0x03, [0x23])
+        self.assertTrue(self.space.write_modified())
+        self.assertFalse(self.space.is_modified)
+        self.assertEqual(list(self.controller.memory[0x00:0x04]), [0x10, 0x21, 0x12, 0x23])
+
+    def test_failed_write_stays_modified(self):
+        self.space.read_all()
+        self.controller.stuck.add(0x02)
+        self.space.set_pending_block(0x02, [0x22])
+        self.assertFalse(self.space.write_modified())
+        self.assertEqual(self.space.modified_addresses, [0x02])
+
+    def test_pending_values_only_declared(self):
+        self.space.set_pending_block(0x10, [0x01])
+        self.assertIn(0x10, self.space.modified_addresses)
+        self.assertNotIn(0x10, self.space.get_pending_values())
+        self.assertEqual(sorted(self.space.get_pending_values()), [0x00, 0x01, 0x02, 0x03, 0x20, 0x21])
+
+if __name__ == '__main__':
+    unittest.main()
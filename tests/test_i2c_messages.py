@@ -0,0 +1,131 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import unittest
+
+from i2c_gui.i2c_messages import I2CMessages, encode_direct_i2c, decode_direct_i2c, direct_read_commands, direct_write_commands
+
+M = I2CMessages
+
+def read_transaction(device_address: int, register: int, byte_count: int) -> list:
+    # Write the register pointer, then read byte_count bytes after a repeated start
+    return [M.START, M.WRITE2, device_address << 1, register, M.RESTART, M.WRITE1, (device_address << 1) | 1] + direct_read_commands(byte_count) + [M.STOP]
+
+def payload_reads(payloads: list[tuple[bytes, int]]) -> int:
+    return sum([reads for _, reads in payloads])
+
+class Direct_Commands_Test(unittest.TestCase):
+    def test_read_commands(self):
+        self.assertEqual(direct_read_commands(1), [M.NACK, M.READ1])
+        self.assertEqual(direct_read_commands(2), [M.READ1, M.NACK, M.READ1])
+        self.assertEqual(direct_read_commands(17), [M.READ16, M.NACK, M.READ1])
+        self.assertEqual(direct_read_commands(20), [M.READ16, M.READ3, M.NACK, M.READ1])
+
+    def test_read_commands_need_a_byte(self):
+        with self.assertRaises(RuntimeError):
+            direct_read_commands(0)
+
+    def test_write_commands(self):
+        self.assertEqual(direct_write_commands([1, 2]), [M.WRITE2, 1, 2])
+        data = list(range(20))
+        self.assertEqual(direct_write_commands(data), [M.WRITE16] + data[:16] + [M.WRITE4] + data[16:])
+
+class Encode_Direct_I2C_Test(unittest.TestCase):
+    def test_single_transaction(self):
+        commands = [M.START, M.WRITE3, 0xe4, 0x00, 0x10, M.STOP]
+        self.assertEqual(encode_direct_i2c(commands), [(bytes([0x01, 0x32, 0xe4, 0x00, 0x10, 0x03]), 0)])
+
+    def test_counts_reads(self):
+        payloads = encode_direct_i2c(read_transaction(0x72, 0x05, 20))
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(payloads[0][1], 20)
+
+    def test_round_trip(self):
+        commands = read_transaction(0x72, 0x05, 20) + [M.START, M.WRITE1, 0xe4, M.STOP]
+        payloads = encode_direct_i2c(commands)
+        self.assertEqual(decode_direct_i2c(payloads[0][0]), commands)
+
+    def test_unknown_command(self):
+        with self.assertRaises(RuntimeError):
+            encode_direct_i2c([M.START, 0x30, M.STOP])
+
+    def test_missing_operands(self):
+        with self.assertRaises(RuntimeError):
+            encode_direct_i2c([M.START, M.WRITE3, 0xe4, 0x00])
+
+    def test_invalid_operands(self):
+        with self.assertRaises(RuntimeError):
+            encode_direct_i2c([M.START, M.WRITE1, 0x100, M.STOP])
+
+    def test_splits_only_after_stop(self):
+        transaction = [M.START, M.WRITE3, 0xe4, 0x00, 0x10, M.STOP]
+        payloads = encode_direct_i2c(transaction * 5, max_payload_bytes=14)
+        self.assertEqual([len(payload) for payload, _ in payloads], [12, 12, 6])
+        for payload, _ in payloads:
+            self.assertEqual(payload[-1], M.STOP.value)
+
+    def test_splits_on_read_limit(self):
+        transaction = read_transaction(0x72, 0x00, 10)
+        payloads = encode_direct_i2c(transaction * 3, max_read_bytes=25)
+        self.assertEqual([reads for _, reads in payloads], [20, 10])
+
+    def test_splits_oversized_read(self):
+        payloads = encode_direct_i2c(read_transaction(0x72, 0x00, 61), max_payload_bytes=60, max_read_bytes=60)
+        self.assertEqual([reads for _, reads in payloads], [60, 1])
+        self.assertEqual(payload_reads(payloads), 61)
+
+        # The first part sets the register pointer, the others only address the device for reading again
+        first = decode_direct_i2c(payloads[0][0])
+        self.assertEqual(first[:7], [M.START, M.WRITE2, 0xe4, 0x00, M.RESTART, M.WRITE1, 0xe5])
+        self.assertEqual(first[-3:], [M.NACK, M.READ1, M.STOP])
+        self.assertEqual(decode_direct_i2c(payloads[1][0]), [M.START, M.WRITE1, 0xe5, M.NACK, M.READ1, M.STOP])
+
+    def test_splits_oversized_read_on_payload_size(self):
+        payloads = encode_direct_i2c(read_transaction(0x72, 0x00, 150), max_payload_bytes=16)
+        self.assertEqual(payload_reads(payloads), 150)
+        for payload, _ in payloads:
+            self.assertLessEqual(len(payload), 16)
+
+    def test_rejects_oversized_transaction_not_ending_with_reads(self):
+        commands = [M.START, M.WRITE1, 0xe5] + direct_read_commands(61) + [M.RESTART, M.WRITE1, 0xe4, M.STOP]
+        with self.assertRaises(RuntimeError):
+            encode_direct_i2c(commands, max_payload_bytes=60, max_read_bytes=60)
+
+        with self.assertRaises(RuntimeError):
+            encode_direct_i2c([M.START] + direct_write_commands(list(range(64))) + [M.STOP], max_payload_bytes=60)
+
+class Decode_Direct_I2C_Test(unittest.TestCase):
+    def test_decode(self):
+        self.assertEqual(decode_direct_i2c(bytes([0x01, 0x31, 0xe4, 0x07, 0x03])), [M.START, M.WRITE2, 0xe4, 0x07, M.STOP])
+
+    def test_unknown_command(self):
+        with self.assertRaises(RuntimeError):
+            decode_direct_i2c(bytes([0x01, 0x10, 0x03]))
+
+    def test_missing_operands(self):
+        with self.assertRaises(RuntimeError):
+            decode_direct_i2c(bytes([0x01, 0x32, 0xe4]))
+
+if __name__ == '__main__':
+    unittest.main()
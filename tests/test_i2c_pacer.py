@@ -0,0 +1,115 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+from i2c_gui import i2c_pacer
+from i2c_gui.i2c_pacer import I2C_Pacer
+
+class Fake_Clock:
+    # Clock which only moves forward when slept on or advanced by the test
+    def __init__(self):
+        self.now_ns = 10**9
+        self.sleeps = []
+
+    def perf_counter_ns(self):
+        return self.now_ns
+
+    def sleep(self, seconds: float):
+        self.sleeps += [seconds]
+        self.now_ns += round(seconds * 10**9)
+
+    def advance_us(self, microseconds: int):
+        self.now_ns += microseconds * 1000
+
+class I2C_Pacer_Test(unittest.TestCase):
+    def setUp(self):
+        self.clock = Fake_Clock()
+        patcher = mock.patch.object(i2c_pacer, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_transaction_does_not_wait(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        self.assertEqual(pacer.wait(0x72), 0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_for_the_gap(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        pacer.wait(0x72)
+        self.assertEqual(pacer.wait(0x72), 1000)
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.001)
+
+    def test_only_waits_for_the_remaining_gap(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        pacer.wait(0x72)
+        self.clock.advance_us(600)
+        self.assertEqual(pacer.wait(0x72), 400)
+
+        self.clock.advance_us(5000)
+        self.assertEqual(pacer.wait(0x72), 0)
+
+    def test_device_gap(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        pacer.set_device_gap(0x72, 100)
+        self.assertEqual(pacer.gap_us(0x72), 100)
+        self.assertEqual(pacer.gap_us(0x73), 1000)
+        self.assertEqual(pacer.gap_us(None), 1000)
+
+        pacer.wait(0x73)
+        self.assertEqual(pacer.wait(0x72), 100)
+
+        pacer.set_device_gap(0x72)
+        self.assertEqual(pacer.gap_us(0x72), 1000)
+
+    def test_zero_gap(self):
+        pacer = I2C_Pacer(default_gap_us=0)
+        pacer.wait()
+        self.assertEqual(pacer.wait(), 0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_negative_gap(self):
+        pacer = I2C_Pacer()
+        with self.assertRaises(RuntimeError):
+            pacer.default_gap_us = -1
+        with self.assertRaises(RuntimeError):
+            pacer.set_device_gap(0x72, -1)
+
+    def test_reset(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        pacer.wait()
+        pacer.reset()
+        self.assertEqual(pacer.wait(), 0)
+
+    def test_statistics(self):
+        pacer = I2C_Pacer(default_gap_us=1000)
+        pacer.wait()
+        pacer.wait()
+        pacer.wait()
+        self.assertEqual(pacer.statistics, {'transactions': 3, 'total_wait_us': 2000})
+
+if __name__ == '__main__':
+    unittest.main()
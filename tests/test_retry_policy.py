@@ -0,0 +1,92 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import unittest
+
+from i2c_gui.i2c_retry_policy import Retry_Policy, I2C_Range_Outcome, I2C_Partial_Transfer_Error
+from i2c_gui.i2c_retry_policy import I2C_Error, I2C_Link_Error, I2C_NACK_Error, I2C_Timeout_Error, I2C_Short_Read_Error
+
+class Retry_Policy_Test(unittest.TestCase):
+    def test_classify(self):
+        policy = Retry_Policy()
+        self.assertEqual(policy.classify(I2C_NACK_Error("nack")), 'nack')
+        self.assertEqual(policy.classify(I2C_Timeout_Error("timeout")), 'timeout')
+        self.assertEqual(policy.classify(I2C_Short_Read_Error("short")), 'short_read')
+        self.assertEqual(policy.classify(I2C_Link_Error("link")), 'link')
+        self.assertEqual(policy.classify(TimeoutError()), 'timeout')
+        self.assertIsNone(policy.classify(I2C_Error("unclassified")))
+        self.assertIsNone(policy.classify(RuntimeError("other")))
+        self.assertIsNone(policy.classify(ValueError("other")))
+
+    def test_i2c_errors_are_runtime_errors(self):
+        for error_type in [I2C_Link_Error, I2C_NACK_Error, I2C_Timeout_Error, I2C_Short_Read_Error]:
+            self.assertTrue(issubclass(error_type, RuntimeError))
+
+    def test_should_retry(self):
+        policy = Retry_Policy(attempts=3)
+        self.assertTrue(policy.should_retry('nack', 1))
+        self.assertTrue(policy.should_retry('timeout', 2))
+        self.assertFalse(policy.should_retry('short_read', 3))
+        self.assertFalse(policy.should_retry('link', 1))
+        self.assertFalse(policy.should_retry('partial', 1))
+        self.assertFalse(policy.should_retry(None, 1))
+
+    def test_retry_on(self):
+        policy = Retry_Policy(retry_on=['timeout'])
+        self.assertTrue(policy.should_retry('timeout', 1))
+        self.assertFalse(policy.should_retry('nack', 1))
+
+    def test_single_attempt(self):
+        self.assertFalse(Retry_Policy(attempts=1).should_retry('nack', 1))
+
+    def test_invalid(self):
+        with self.assertRaises(RuntimeError):
+            Retry_Policy(attempts=0)
+        with self.assertRaises(RuntimeError):
+            Retry_Policy(retry_on=['link'])
+
+    def test_backoff(self):
+        policy = Retry_Policy(backoff_s=0.001, max_backoff_s=0.005)
+        self.assertEqual([policy.backoff(attempt) for attempt in range(1, 6)], [0.001, 0.002, 0.004, 0.005, 0.005])
+
+class Partial_Transfer_Error_Test(unittest.TestCase):
+    def test_outcome_status(self):
+        self.assertEqual(I2C_Range_Outcome(0x00, 0, 8).status, "OK")
+        self.assertEqual(I2C_Range_Outcome(0x00, 0, 8, attempts=2).status, "Recovered")
+        self.assertEqual(I2C_Range_Outcome(0x00, 0, 8, attempts=1, error=I2C_NACK_Error("nack")).status, "Failed")
+
+    def test_ranges(self):
+        error = I2C_Partial_Transfer_Error("partial", [
+            I2C_Range_Outcome(0x00, 0, 8),
+            I2C_Range_Outcome(0x08, 8, 8, 3, I2C_NACK_Error("nack")),
+            I2C_Range_Outcome(0x10, 16, 4, 2),
+        ], bytearray(20))
+        self.assertEqual(error.kind, 'partial')
+        self.assertEqual(error.failed_ranges, [(0x08, 8, 8)])
+        self.assertEqual(error.completed_ranges, [(0x00, 0, 8), (0x10, 16, 4)])
+        self.assertEqual(len(error.data), 20)
+        self.assertEqual(Retry_Policy().classify(error), 'partial')
+
+if __name__ == '__main__':
+    unittest.main()
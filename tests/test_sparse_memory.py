@@ -0,0 +1,113 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import unittest
+
+from i2c_gui.chips.sparse_memory import Sparse_Memory
+
+def new_memory(ranges: list[tuple[int, int]] = None) -> Sparse_Memory:
+    return Sparse_Memory({
+        'memory': ('B', 0),
+        'flags': ('B', 1),
+        'names': (None, ''),
+    }, ranges)
+
+class Sparse_Memory_Test(unittest.TestCase):
+    def test_empty(self):
+        memory = new_memory()
+        self.assertEqual(memory.size, 0)
+        self.assertEqual(memory.ranges, [])
+        self.assertIsNone(memory.index(0))
+        self.assertFalse(memory.is_mapped(0))
+
+    def test_ranges_are_sorted_and_merged(self):
+        memory = new_memory([(0x20, 4), (0x00, 4), (0x04, 2), (0x22, 4), (0x40, 0)])
+        self.assertEqual(memory.ranges, [(0x00, 6), (0x20, 6)])
+        self.assertEqual(memory.size, 12)
+        self.assertEqual(list(memory.addresses()), list(range(0x00, 0x06)) + list(range(0x20, 0x26)))
+
+    def test_index(self):
+        memory = new_memory([(0x00, 4), (0x100, 4)])
+        self.assertEqual(memory.index(0x03), 3)
+        self.assertEqual(memory.index(0x100), 4)
+        self.assertEqual(memory.index(0x103), 7)
+        self.assertIsNone(memory.index(0x04))
+        self.assertIsNone(memory.index(0x104))
+
+    def test_is_mapped(self):
+        memory = new_memory([(0x10, 4)])
+        self.assertTrue(memory.is_mapped(0x10, 4))
+        self.assertFalse(memory.is_mapped(0x10, 5))
+        self.assertFalse(memory.is_mapped(0x0f))
+
+    def test_segments(self):
+        memory = new_memory([(0x00, 4), (0x08, 4)])
+        self.assertEqual(memory.segments(0x02, 8), [(0x02, 2, 2), (0x08, 4, 2)])
+        self.assertEqual(memory.segments(0x04, 4), [])
+
+    def test_plane_defaults(self):
+        memory = new_memory([(0x00, 2)])
+        self.assertEqual(list(memory.plane('memory')), [0, 0])
+        self.assertEqual(list(memory.plane('flags')), [1, 1])
+        self.assertEqual(memory.plane('names'), ['', ''])
+
+    def test_get_unmapped_reads_default(self):
+        memory = new_memory([(0x02, 2)])
+        memory.set('memory', 0x02, [5, 6])
+        self.assertEqual(memory.get('memory', 0x00, 6), [0, 0, 5, 6, 0, 0])
+        self.assertEqual(memory.get('flags', 0x00, 3), [1, 1, 1])
+
+    def test_mapping_keeps_values(self):
+        memory = new_memory([(0x10, 2), (0x20, 2)])
+        memory.set('memory', 0x10, [1, 2])
+        memory.set('memory', 0x20, [3, 4])
+        memory.set('names', 0x21, ['a'])
+        memory.map_ranges([(0x00, 2), (0x12, 0x0e)])
+        self.assertEqual(memory.ranges, [(0x00, 2), (0x10, 0x12)])
+        self.assertEqual(memory.get('memory', 0x10, 2), [1, 2])
+        self.assertEqual(memory.get('memory', 0x20, 2), [3, 4])
+        self.assertEqual(memory.get('names', 0x20, 2), ['', 'a'])
+
+    def test_set_maps_on_demand(self):
+        memory = new_memory([(0x00, 4)])
+        memory.set('memory', 0x80, [7, 8])
+        self.assertEqual(memory.ranges, [(0x00, 4), (0x80, 2)])
+        self.assertEqual(memory.get('memory', 0x80, 2), [7, 8])
+
+        # Addresses mapped on demand are stored but not declared
+        self.assertEqual(memory.declared_ranges, [(0x00, 4)])
+        self.assertEqual(list(memory.declared_addresses()), [0, 1, 2, 3])
+
+    def test_set_nothing(self):
+        memory = new_memory()
+        memory.set('memory', 0x10, [])
+        self.assertEqual(memory.ranges, [])
+
+    def test_array_plane_rejects_out_of_range_values(self):
+        memory = new_memory([(0x00, 1)])
+        with self.assertRaises(OverflowError):
+            memory.set('memory', 0x00, [0x100])
+
+if __name__ == '__main__':
+    unittest.main()